@@ -0,0 +1,203 @@
+#############################################################################
+# ParaMark: Benchmarking Suite for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#############################################################################
+
+# fs/aio.py
+# Asynchronous I/O Engine
+
+import os
+import io
+import sys
+import threading
+from array import array
+
+from modules.verbose import *
+from modules import clock
+from modules import bufpool
+from record import NS_TYPECODE
+
+__all__ = ['run']
+
+def _libc_calls():
+    """Return pread() and pwrite() of libc through ctypes, or None"""
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        pread = getattr(libc, "pread64", libc.pread)
+        pwrite = getattr(libc, "pwrite64", libc.pwrite)
+    except (ImportError, OSError, AttributeError):
+        return None
+    for f in [pread, pwrite]:
+        f.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+            ctypes.c_longlong]
+        f.restype = ctypes.c_ssize_t
+    return ctypes, pread, pwrite
+
+LIBC = _libc_calls()
+if LIBC is not None: name = "pread/pwrite"
+else: name = "lseek+read/write"
+
+class Engine:
+    """
+    Keep up to iodepth requests of an I/O primitive in flight by a pool
+    of iodepth threads, each issuing the requests of a contiguous range
+    of blocks one after another. Requests are pread()/pwrite() of libc
+    through ctypes, which releases the interpreter lock in the system
+    call, or lseek() and read()/write() on a private descriptor of each
+    thread if libc is not accessible.
+    """
+    def __init__(self, op, fd, idx, ramp, deadline, char=None):
+        self.op = op
+        self.fd = fd
+        self.idx = idx
+        self.ramp = ramp
+        self.deadline = deadline
+        self.char = char
+        self.write = char is not None
+        # Submit-to-complete nanoseconds of requests of each thread
+        self.lats = []
+        self.lat = array(NS_TYPECODE)
+        self.lock = threading.Lock()
+        self.start = None
+        self.end = 0
+        self.short = 0
+        self.error = None
+
+    def run(self):
+        """Return nanoseconds from first submission to last completion"""
+        op = self.op
+        if LIBC is None:
+            # Each thread positions its own descriptor
+            flags = op.flags & \
+                ~(os.O_CREAT | os.O_EXCL | os.O_TRUNC | os.O_APPEND)
+            fds = [os.open(op.f, flags) for i in range(op.iodepth)]
+        else:
+            fds = [self.fd] * op.iodepth
+        bounds = [op.opcnt * k // op.iodepth for k in range(op.iodepth + 1)]
+        workers = [threading.Thread(target=self.work,
+            args=(fd, bounds[k], bounds[k + 1]))
+            for k, fd in enumerate(fds)]
+        for w in workers: w.start()
+        for w in workers: w.join()
+        if LIBC is None:
+            for fd in fds: os.close(fd)
+
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+        if self.short > 0:
+            warning("%s: %d requests transferred less than bsize (%d)"
+                % (op.name, self.short, op.bsize))
+        for lat in self.lats: self.lat.extend(lat)
+        if self.start is None: return 0
+        return self.end - self.start
+
+    def work(self, fd, lo, hi):
+        """
+        Issue requests of blocks lo to hi - 1, over again in a duration
+        run, requests submitted in ramp-up are issued but not recorded
+        """
+        if lo == hi: return
+        op = self.op
+        bsize = op.bsize
+        idx = self.idx
+        ramp = self.ramp
+        deadline = self.deadline
+        again = op.runtime is not None
+        # Requests are counted in progress as they complete
+        slot = op.elapsed.slot
+        unit = op.elapsed.unit
+        lat = array(NS_TYPECODE)
+        start = None
+        end = 0
+        short = 0
+        if self.write:
+            # Random windows are private to and stamped by each thread
+            args = (bsize, op.pattern, self.char, op.opcnt,
+                op.direct == "on")
+            if LIBC is not None: srcs = bufpool.addresses(*args)
+            else: srcs = bufpool.blocks(*args)
+            stamp = bufpool.stamper(bsize, op.pattern, op.opcnt,
+                op.direct == "on")
+        elif LIBC is not None:
+            buf = bufpool.address(bufpool.readbuf(bsize))
+        else:
+            buf = bufpool.readbuf(bsize)
+            readinto = io.FileIO(fd, 'r', closefd=False).readinto
+        if LIBC is not None: ctypes, pread, pwrite = LIBC
+
+        i = lo
+        try:
+            while self.error is None:
+                if idx is not None: n = idx[i]
+                else: n = i
+                off = n * bsize
+                if self.write and stamp is not None: stamp(i, n)
+                s = clock.clock()
+                if s >= deadline: break
+                if LIBC is None:
+                    os.lseek(fd, off, os.SEEK_SET)
+                    if self.write: res = os.write(fd, srcs[i % len(srcs)])
+                    else: res = readinto(buf)
+                elif self.write:
+                    res = pwrite(fd, srcs[i % len(srcs)], bsize, off)
+                else:
+                    res = pread(fd, buf, bsize, off)
+                e = clock.clock()
+                if res < 0:
+                    err = ctypes.get_errno()
+                    raise OSError(err, os.strerror(err))
+                if s >= ramp:
+                    if start is None: start = s
+                    lat.append(e - s)
+                    end = e
+                    if slot is not None:
+                        self.lock.acquire()
+                        slot[0] += 1
+                        slot[1] += unit
+                        self.lock.release()
+                if res != bsize: short += 1
+                i += 1
+                if i == hi:
+                    if not again: break
+                    i = lo
+        except:
+            self.error = sys.exc_info()
+
+        self.lock.acquire()
+        self.lats.append(lat)
+        if start is not None and (self.start is None or start < self.start):
+            self.start = start
+        if end > self.end: self.end = end
+        self.short += short
+        self.lock.release()
+
+def run(op, fd, idx, ramp, deadline, char=None):
+    """
+    Read, or write blocks filled with char, of op on fd keeping iodepth
+    requests in flight until all blocks are done or clock passes deadline,
+    add submit-to-complete latencies of requests submitted after ramp to
+    op.elapsed and return seconds of them overlapped by other requests
+    """
+    engine = Engine(op, fd, idx, ramp, deadline, char)
+    wall = engine.run()
+    # Already counted in progress by the engine
+    slot, op.elapsed.slot = op.elapsed.slot, None
+    for e in engine.lat: op.elapsed.add(e)
+    op.elapsed.slot = slot
+    return sum([clock.corrected(e) for e in engine.lat]) - \
+        clock.corrected(wall)
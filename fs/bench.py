@@ -21,23 +21,32 @@
 
 import os
 import sys
+import errno
+import math
 import stat
 import random
 import shutil
 import socket
 import copy
 import pwd
-import cPickle
 import StringIO
+import Queue
 import threading
+import multiprocessing
+from array import array
 
 import version
 from modules.verbose import *
 from modules.common import *
 from modules import num
 from modules import gxp
+from modules import clock
+from modules.hist import Histogram
 from load import *
 import oper
+import record
+import offsets
+import progress
 from data import Database as Database
 
 VERBOSE = 1
@@ -46,6 +55,21 @@ VERBOSE_ALL = VERBOSE_MORE + 1
 
 __all__ = ['Bench']
 
+def direct_ops(results):
+    """Return name and direct I/O status of operations of results"""
+    return [(o["name"], o.get("direct")) for r in results for o in r.opset]
+
+def merge_summary(summary, other):
+    """Merge summary of results other into summary"""
+    summary["tables"].update(other["tables"])
+    for table, rows in other["rows"].items():
+        summary["rows"].setdefault(table, []).extend(rows)
+    for key, h in other["hists"].items():
+        if summary["hists"].has_key(key): summary["hists"][key].merge(h)
+        else: summary["hists"][key] = h
+    summary["direct"].extend(other["direct"])
+    summary["shards"].extend(other["shards"])
+
 class Bench:
     def __init__(self, opts):
         self.opts = opts
@@ -62,16 +86,27 @@ class Bench:
         self.runtime.cmdline = " ".join(sys.argv)
         self.runtime.mountpoint = get_filesystem_info(self.cfg.wdir)
         self.runtime.wdir = self.cfg.wdir
+        self.runtime.clock = clock.name
+        self.runtime.clock_overhead, self.runtime.clock_resolution = \
+            clock.calibrate()
+        if self.cfg.runtime is not None:
+            self.runtime.duration = "%s seconds per I/O operation, " \
+                "first %s seconds excluded as ramp-up" % \
+                (self.cfg.runtime, self.cfg.ramp_time)
         # May be set later in GXP mode
         self.runtime.hid = 0
         self.runtime.nhosts = 1
 
         self.cfg.hid = self.runtime.hid
         self.cfg.pid = self.runtime.pid
+        record.mode = self.cfg.record
+        offsets.stride = self.cfg.stride
+        offsets.theta = self.cfg.zipf_theta
         self.loader = BenchLoad(self.cfg)
         self.threads = []
         self.db = None
         self.gxp = None
+        self.reporter = None
        
     def load(self):
         if self.cfg.gxpmode:
@@ -80,23 +115,49 @@ class Bench:
             self.gxp.rp = os.fdopen(4, "rb")
             self.gxp.rank = gxp.get_rank()
             self.gxp.size = gxp.get_size()
+            self.gxp.chan = gxp.Channel(self.gxp.wp, self.gxp.rp,
+                self.gxp.size, self.gxp.rank, self.cfg.compress)
+            self.gxp.chan.start()
             self.runtime.hid = self.gxp.rank
             self.runtime.nhosts = self.gxp.size
             self.cfg.hid = self.runtime.hid
-        
-        self.threadsync = ThreadSync(self.cfg.nthreads)
+            
+        if self.cfg.engine == "process":
+            self.threadsync = ProcessSync(self.cfg.nthreads)
+            worker = BenchProcess
+        else:
+            self.threadsync = ThreadSync(self.cfg.nthreads)
+            worker = BenchThread
+        slots = [None] * self.cfg.nthreads
+        if self.cfg.progress is not None or \
+            self.cfg.timeseries is not None:
+            slots = progress.new_slots(self.cfg.nthreads)
+        if self.cfg.progress is not None:
+            chan = None
+            if self.cfg.gxpmode: chan = self.gxp.chan
+            self.reporter = progress.Reporter(slots, self.cfg.progress,
+                self.cfg.progress_format, self.cfg.progress_file,
+                self.runtime.hid, chan)
         for i in range(0, self.cfg.nthreads):
-            self.threads.append(BenchThread(i, self.threadsync, 
-                self.loader, self.gxp))
+            self.threads.append(worker(i, self.threadsync, 
+                self.loader, self.gxp, slots[i]))
 
     def run(self):
         if self.runtime.hid == 0:
             message("Start benchmarking ...")
         
         self.start = timer()
-        for t in self.threads: t.start()
+        for t in self.threads:
+            t.epoch = self.start
+            t.start()
+        if self.reporter is not None: self.reporter.start()
+        # Results must be drained before join, or a child process blocks
+        # on flushing its result queue and never exits
+        for t in self.threads:
+            if not t.collect(): self.abort(t)
         for t in self.threads: t.join()
         self.end = timer()
+        if self.reporter is not None: self.reporter.stop()
 
         if self.cfg.dryrun and self.runtime.hid == 0: 
             message("Dryrun, nothing was executed.\n")
@@ -104,17 +165,30 @@ class Bench:
         self.runtime.start = "%r" % self.start
         self.runtime.end = "%r" % self.end
 
+    def abort(self, dead):
+        # Siblings would wait forever in the barrier for the dead worker
+        for t in self.threads:
+            if t is not dead and t.is_alive(): t.terminate()
+        if self.reporter is not None: self.reporter.stop()
+        fatal("%s exited with code %s without results"
+              % (dead.name, dead.exitcode))
+
     def save(self):
         if self.cfg.dryrun: return
         
+        summary = None
         if self.cfg.gxpmode:
             # Gather results
-            self.send_res()
-            if self.gxp.rank == 0:
-                reslist = []
-                for i in range(0, self.gxp.size):
-                    reslist.append(self.recv_res())
-            else: return
+            if self.cfg.shards is not None:
+                summary = self.gather()
+                if summary is None: return
+            else:
+                self.send_res(self.get_res())
+                if self.gxp.rank == 0:
+                    reslist = []
+                    for i in range(0, self.gxp.size):
+                        reslist.append(self.recv_res())
+                else: return
         
         if self.cfg.logdir is None:  # generate random logdir in cwd
             self.cfg.logdir = os.path.abspath("./pmlog-%s-%s" %
@@ -141,19 +215,195 @@ class Bench:
         # Save results
         if self.cfg.nolog: self.db = Database(":memory:")
         else: self.db = Database("%s/fsbench.db" % logdir)
-        self.db.insert_runtime(self.runtime)
-        self.db.insert_conf(self.opts.cfgParser)
-
+        if summary is not None:
+            self.direct_status(summary["direct"])
+            self.db.insert_runtime(self.runtime)
+            self.db.insert_conf(self.opts.cfgParser)
+            self.db.put_rows(summary["tables"], summary["rows"])
+            for (name, x, y, qd), h in sorted(summary["hists"].items()):
+                self.db.insert_hist(name, -1, -1, -1, x, y, h, iodepth=qd)
+            if len(summary["shards"]) > 0:
+                self.db.insert_shards(sorted(summary["shards"]))
+            self.db.commit()
+            if self.cfg.noreport: self.db.close()
+            return
+        
         if self.cfg.gxpmode:
-            for res in reslist:
-                for r in res: self.db.insert_rawdata(r)
+            results = []
+            for res in reslist: results.extend(res)
         else:
-            for t in self.threads:
-                self.db.insert_rawdata(t.get_res())
+            results = self.get_res()
+        self.direct_status(direct_ops(results))
+        
+        self.db.insert_runtime(self.runtime)
+        self.db.insert_conf(self.opts.cfgParser)
+        for r in results: self.db.insert_rawdata(r)
+        if record.mode == "hist": self.merge_hists(results)
+        else: self.merge_dirs(results)
+        if self.cfg.timeseries is not None: self.merge_series(results)
         
         self.db.commit() 
         if self.cfg.noreport: self.db.close()
     
+    def gather(self):
+        """
+        Return summary of results of all hosts on the first host, None on
+        others, which send their summaries to it
+        """
+        summary = self.summarize()
+        if self.gxp.rank != 0:
+            self.send_res(summary)
+            return None
+        for i in range(1, self.gxp.size):
+            merge_summary(summary, self.recv_res())
+        return summary
+
+    def summarize(self):
+        """
+        Return rows of statistics of threads of this host without their
+        latencies of calls, which are saved into a shard if enabled
+        """
+        results = self.get_res()
+        shards = []
+        if self.cfg.shards is not None:
+            if not os.path.isdir(self.cfg.shards):
+                # Shards of all hosts may share one directory
+                try: os.makedirs(self.cfg.shards)
+                except OSError: pass
+            path = "%s/fsbench-%d.db" % (self.cfg.shards, self.gxp.rank)
+            for f in [path, "%s.col" % os.path.splitext(path)[0]]:
+                if os.path.exists(f): os.remove(f)
+            shard = Database(path)
+            for r in results: shard.insert_rawdata(r)
+            shard.close()
+            shards.append((self.gxp.rank, socket.gethostname(), path))
+        
+        # Rows are only queued, never written to this database
+        self.db = Database(":memory:")
+        for r in results: self.db.insert_rawdata(r, raw=False)
+        hists = {}
+        if record.mode == "hist": hists = self.merge_hists(results, False)
+        if self.cfg.timeseries is not None: self.merge_series(results)
+        tables, rows = self.db.take_rows()
+        self.db.close()
+        self.db = None
+        return {"tables": tables, "rows": rows, "hists": hists,
+            "direct": direct_ops(results), "shards": shards}
+
+    def direct_status(self, ops):
+        """
+        Record whether direct I/O was used or refused in runtime, given
+        name and direct status of operations
+        """
+        used = []
+        refused = []
+        for name, direct in ops:
+            if direct == "on": used.append(name)
+            elif direct == "refused": refused.append(name)
+        if len(refused) > 0:
+            self.runtime.direct = "refused by file system (%s), " \
+                "fell back to buffered I/O" % ", ".join(list_unique(refused))
+        elif len(used) > 0:
+            self.runtime.direct = "O_DIRECT (%s)" % \
+                ", ".join(list_unique(used))
+
+    def merge_hists(self, results, overall=True):
+        """
+        Merge latency histograms of threads into per-host (tid=-1) and
+        overall (hid=-1) histograms, return overall histograms and leave
+        them out of database unless overall is True
+        """
+        hosts = {}
+        hists = {}
+        for r in results:
+            for o in r.opset:
+                h = o["elapsed"]
+                # Listing passes are always kept raw
+                if oper.optype(o["name"]) == oper.TYPE_LIST: continue
+                if oper.optype(o["name"]) == oper.TYPE_IO:
+                    key = (o["name"], o["fsize"], o["bsize"],
+                        o.get("iodepth", 1))
+                    h = h.inner()
+                else:
+                    key = (o["name"], o["opcnt"], o["factor"], 1)
+                hosts.setdefault((r.hid, r.pid) + key, Histogram()).merge(h)
+                hists.setdefault(key, Histogram()).merge(h)
+        
+        for (hid, pid, name, x, y, qd), h in sorted(hosts.items()):
+            self.db.insert_hist(name, hid, pid, -1, x, y, h, iodepth=qd)
+        if not overall: return hists
+        for (name, x, y, qd), h in sorted(hists.items()):
+            self.db.insert_hist(name, -1, -1, -1, x, y, h, iodepth=qd)
+        return hists
+
+    def merge_dirs(self, results):
+        """
+        Merge latencies of metadata calls of all threads by shared
+        directory into per-directory contention statistics, only sampled
+        calls are counted if calls are sampled
+        """
+        dirs = {}
+        for r in results:
+            for o in r.opset:
+                if o.get("dirs") is None: continue
+                key = (o["name"], o["opcnt"], o["factor"])
+                elapsed = o["elapsed"]
+                # Sampled calls are mapped to directories by call index
+                if isinstance(elapsed, record.ElapsedSample):
+                    pairs = [(o["dirs"][i], e) for i, e in
+                        zip(elapsed.calls, elapsed.samples)]
+                else: pairs = zip(o["dirs"], elapsed)
+                for d, e in pairs:
+                    lats, ranks = dirs.setdefault(key + (d,), ([], {}))
+                    lats.append(e)
+                    ranks[(r.hid, r.tid)] = True
+        
+        for (name, opcnt, factor, d), (lats, ranks) in sorted(dirs.items()):
+            self.db.insert_dirs(name, opcnt, factor, d, lats, len(ranks))
+
+    def merge_series(self, results):
+        """
+        Insert time series of threads and their sums of each host as
+        per-host (tid=-1) series, buckets of threads of a host end at
+        the same ticks, buckets ending at ends of operations are summed
+        into the bucket of the next tick
+        """
+        hosts = {}
+        for r in results:
+            for o in r.opset:
+                s = o.get("series")
+                # Listing cost is kept per pass, not over time
+                if s is None or oper.optype(o["name"]) == oper.TYPE_LIST:
+                    continue
+                if oper.optype(o["name"]) == oper.TYPE_IO:
+                    key = (r.hid, r.pid, o["name"], o["fsize"], o["bsize"],
+                        o.get("iodepth", 1))
+                else: key = (r.hid, r.pid, o["name"], o["opcnt"],
+                    o["factor"], 1)
+                self.db.insert_series(o["name"], r.hid, r.pid, r.tid,
+                    key[3], key[4], s, self.cfg.stall, iodepth=key[5])
+                hosts.setdefault(key, []).append(s)
+        
+        interval = self.cfg.timeseries
+        for (hid, pid, name, x, y, qd), series in sorted(hosts.items()):
+            # Series start with an empty bucket marking their start
+            start = min([s["time"][0] for s in series])
+            end = max([s["time"][-1] for s in series])
+            buckets = {start: (0.0, 0.0)}
+            for s in series:
+                for t, c, b in zip(s["time"][1:], s["calls"][1:],
+                    s["bytes"][1:]):
+                    t = min(math.ceil(t / interval - 1e-6) * interval, end)
+                    pc, pb = buckets.get(t, (0.0, 0.0))
+                    buckets[t] = (pc + c, pb + b)
+            times = sorted(buckets.keys())
+            self.db.insert_series(name, hid, pid, -1, x, y, {
+                "interval": self.cfg.timeseries,
+                "time": array('d', times),
+                "calls": array('d', [buckets[t][0] for t in times]),
+                "bytes": array('d', [buckets[t][1] for t in times])},
+                self.cfg.stall, iodepth=qd)
+
     def report(self):
         if self.cfg.dryrun or self.cfg.noreport: return
         if self.cfg.gxpmode and self.gxp.rank != 0: return
@@ -172,16 +422,14 @@ class Bench:
             self.report = report.HTMLReport(logdir, self.db, self.cfg)
         self.report.write()
          
-    def send_res(self):
-        # Packing string without newlines
-        res = cPickle.dumps([t.get_res() for t in self.threads], 0)
-        self.gxp.wp.write('|'.join(res.split('\n')))
-        self.gxp.wp.write("\n")
-        self.gxp.wp.flush()
+    def get_res(self):
+        return [t.get_res() for t in self.threads]
+
+    def send_res(self, res, dest=0):
+        self.gxp.chan.send_result(dest, res)
 
     def recv_res(self):
-        res = self.gxp.rp.readline().strip('\n')
-        return cPickle.loads('\n'.join(res.split('|')))
+        return self.gxp.chan.receive()
     
     def vs(self, msg):
         sys.stderr.write(msg)
@@ -194,7 +442,12 @@ class ThreadSync:
         self.event = threading.Event()
         self.cv = threading.Condition(self.lock)
         self.barrier = self.barrier_condition
+        # Clock reading when the last barrier was released
+        self.released = 0
     
+    def release_time(self):
+        return self.released
+
     def barrier_condition(self):
         """
         Barrier using condition variable
@@ -203,6 +456,7 @@ class ThreadSync:
         self.cnt += 1
         if self.cnt == self.n:
             self.cnt = 0
+            self.released = clock.clock()
             self.cv.notifyAll()
         else:
             self.cv.wait()
@@ -218,36 +472,107 @@ class ThreadSync:
         self.cnt += 1
         if self.cnt == self.n:
             self.cnt = 0
+            self.released = clock.clock()
             self.lock.release()
             self.event.set()
         else:
             self.lock.release()
             self.event.wait()
 
-class BenchThread(threading.Thread):
-    def __init__(self, tid, sync, loader, gxp=None):
-        threading.Thread.__init__(self)
-        
+class ProcessSync:
+    """
+    Barrier shared by worker processes, counterpart of ThreadSync
+    """
+    def __init__(self, nthreads):
+        self.n = nthreads
+        self.cnt = multiprocessing.Value('i', 0)
+        self.cv = multiprocessing.Condition(self.cnt.get_lock())
+        self.barrier = self.barrier_condition
+        # Monotonic clock is system-wide, comparable among processes
+        self.released = multiprocessing.Value('d', 0, lock=False)
+
+    def release_time(self):
+        return int(self.released.value)
+
+    def barrier_condition(self):
+        """
+        Barrier using process-shared condition variable
+        """
+        self.cv.acquire()
+        self.cnt.value += 1
+        if self.cnt.value == self.n:
+            self.cnt.value = 0
+            self.released.value = clock.clock()
+            self.cv.notify_all()
+        else:
+            self.cv.wait()
+        self.cv.release()
+
+class BenchWorker:
+    """
+    Common routines of benchmark workers, either threads or processes
+    """
+    def init_worker(self, tid, sync, loader, gxp, slot=None):
         self.tid = tid
         self.sync = sync
         self.gxpmode = loader.cfg.gxpmode
         self.dryrun = loader.cfg.dryrun
         self.hid = loader.cfg.hid
-        self.pid = loader.cfg.pid
-        self.name = "Thread h%s:p%s:t%s" % (self.hid, self.pid, self.tid)
+        # multiprocessing.Process.pid is read-only, keep runtime pid aside
+        self.rpid = loader.cfg.pid
+        self.name = "Thread h%s:p%s:t%s" % (self.hid, self.rpid, self.tid)
         self.wdir, self.load = loader.generate(self.tid)
+        self.shared = loader.shared_dirs()
+        self.sharedroot = loader.shared
         self.synctime = 0.0
         self.gxp = gxp
+        self.slot = slot
+        self.interval = loader.cfg.timeseries
+        self.epoch = None
+        self.timeline = None
 
     def run(self):
-        if not self.dryrun: os.makedirs(self.wdir)
+        if not self.dryrun:
+            os.makedirs(self.wdir)
+            # Every worker makes sure shared directories exist before
+            # its first operation, regardless of other hosts
+            for d in self.shared:
+                try: os.makedirs(d)
+                except OSError, e:
+                    if e.errno != errno.EEXIST: raise
         self.barrier()
         
-        for op in self.load:
+        # Calls recorded by this worker are counted in its progress slot
+        record.current.slot = self.slot
+        if self.interval is not None:
+            self.timeline = progress.Timeline(self.slot, self.interval,
+                self.epoch)
+            self.timeline.start()
+        for i, op in enumerate(self.load):
+            if hasattr(op, "prepare"):
+                # Set up out of timing, then all workers start together
+                op.prepare()
+                self.barrier()
+            # Duration runs of all workers end together, counted from
+            # the release of the barrier they have just passed
+            op.start = self.sync.release_time()
+            record.current.unit = getattr(op, "bsize", 0)
+            if self.timeline is not None:
+                ramp, deadline = 0, None
+                if getattr(op, "runtime", None) is not None:
+                    ramp, deadline = oper.window(op)
+                self.timeline.begin(i, ramp, deadline)
             op.exe()
+            if self.timeline is not None: self.timeline.end()
             op.synctime = self.barrier()
+        if self.timeline is not None: self.timeline.stop()
         
         if not self.dryrun: shutil.rmtree(self.wdir)
+        # Past the last barrier, the first thread of the first host is the
+        # last one to use shared directories
+        if not self.dryrun and len(self.shared) > 0 and \
+            self.hid == 0 and self.tid == 0:
+            shutil.rmtree(self.sharedroot, ignore_errors=True)
 
     def barrier(self):
         self.sync.barrier()
@@ -258,17 +583,54 @@ class BenchThread(threading.Thread):
         return self.synctime - previous
 
     def gxp_barrier(self):
-        self.gxp.wp.write('\n')
-        self.gxp.wp.flush()
-        for i in range(self.gxp.size):
-            r = self.gxp.rp.readline()
-            if r == "": return 1
-        return 0
+        self.gxp.chan.barrier()
+
+    def collect(self):
+        return True
 
     def get_res(self):
         val = Values()
         val.hid = self.hid
-        val.pid = self.pid
+        val.pid = self.rpid
         val.tid = self.tid
         val.opset = [o.get() for o in self.load]
+        if self.timeline is not None:
+            for i, o in enumerate(val.opset):
+                o["series"] = self.timeline.get(i)
         return val
+
+class BenchThread(BenchWorker, threading.Thread):
+    def __init__(self, tid, sync, loader, gxp=None, slot=None):
+        threading.Thread.__init__(self)
+        self.init_worker(tid, sync, loader, gxp, slot)
+
+class BenchProcess(BenchWorker, multiprocessing.Process):
+    """
+    Worker running in its own process, results are sent back through queue
+    """
+    POLL = 1.0    # seconds between liveness checks while collecting
+
+    def __init__(self, tid, sync, loader, gxp=None, slot=None):
+        multiprocessing.Process.__init__(self)
+        self.init_worker(tid, sync, loader, gxp, slot)
+        self.name = "Process h%s:p%s:t%s" % (self.hid, self.rpid, self.tid)
+        self.resq = multiprocessing.Queue()
+        self.res = None
+
+    def run(self):
+        BenchWorker.run(self)
+        self.resq.put(BenchWorker.get_res(self))
+
+    def collect(self):
+        while self.res is None:
+            try:
+                self.res = self.resq.get(timeout=self.POLL)
+            except Queue.Empty:
+                if self.is_alive(): continue
+                # The result may have been flushed just before exit
+                try: self.res = self.resq.get(timeout=self.POLL)
+                except Queue.Empty: break
+        return self.res is not None
+
+    def get_res(self):
+        return self.res
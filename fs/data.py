@@ -22,11 +22,89 @@
 # Benchmark Data Persistence and Retrieving
 #
 
+import os
+import math
+import mmap
 import sqlite3
 import cPickle
+from array import array
 
 from modules import num
+from modules import hist
 import oper
+import progress
+from record import ElapsedSample
+
+def hist_throughput(h, size):
+    """
+    Return average, min, max and std of per-call throughput (size/elapsed)
+    estimated from latency histogram h
+    """
+    items = h.items()
+    if len(items) == 0: return 0.0, 0.0, 0.0, 0.0
+    n, avg, lo, hi, var = num.welford([e for e, c in items],
+        [c for e, c in items], size)
+    return avg, lo, hi, math.sqrt(var)
+
+class ColumnFile:
+    """
+    Append-only file of doubles holding the array columns of a database,
+    whose rows keep "#col:offset:count" pointers into it. The file is
+    memory-mapped on read, arrays are views of it with NumPy.
+    """
+    MAGIC = "#col:"
+    ITEMSIZE = 8
+
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+        self.map = None
+        self.old = []
+
+    def store(self, a):
+        if self.f is None: self.f = open(self.path, "ab")
+        if a.typecode != 'd': a = array('d', a)
+        self.f.seek(0, os.SEEK_END)
+        offset = self.f.tell() // self.ITEMSIZE
+        a.tofile(self.f)
+        return "%s%d:%d" % (self.MAGIC, offset, len(a))
+
+    def load(self, s):
+        # Arrays of earlier logs are stored in rows as raw bytes
+        if not s.startswith(self.MAGIC): return num.frombuffer(s)
+        offset, count = map(int, s[len(self.MAGIC):].split(':'))
+        # An empty file cannot be mapped
+        if count == 0: return array('d')
+        start = offset * self.ITEMSIZE
+        end = start + count * self.ITEMSIZE
+        if self.map is None or end > len(self.map):
+            self.flush()
+            # Arrays loaded earlier are views of the old map, it is kept
+            # open until close()
+            if self.map is not None: self.old.append(self.map)
+            fp = open(self.path, "rb")
+            self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            fp.close()
+        return num.frombuffer(buffer(self.map, start, end - start))
+
+    def flush(self):
+        if self.f is not None: self.f.flush()
+
+    def close(self):
+        if self.f is not None: self.f.close()
+        if self.map is not None: self.map.close()
+        for m in self.old: m.close()
+        self.f = None
+        self.map = None
+        self.old = []
+
+class Column(str):
+    """
+    Raw value of an array column as read from any database, decoded by
+    the database it was read from, since converters of sqlite3 are global
+    """
+
+sqlite3.register_converter("ARRAY", Column)
 
 class Database:
     """Store/Retrieve benchmark results data"""
@@ -38,20 +116,66 @@ class Database:
             ('val', 'TEXT')]
         self.FORMATS['io'] = [('hid','INTEGER'), ('pid','INTEGER'),
             ('tid','INTEGER'), ('fsize', 'INTEGER'), ('bsize', 'INTEGER'),
-            ('elapsed', 'BLOB'), ('sync', 'REAL'),
+            ('elapsed', 'ARRAY'), ('sync', 'REAL'),
             ('agg', 'REAL'), ('aggnoclose', 'REAL'),
             ('opavg', 'REAL'), ('opmin', 'REAL'), ('opmax', 'REAL'),
-            ('opstd', 'REAL')]
+            ('opstd', 'REAL'), ('access', 'TEXT'), ('seed', 'INTEGER'),
+            ('iodepth', 'INTEGER'), ('bytes', 'INTEGER')]
         self.FORMATS['meta'] = [('hid','INTEGER'), ('pid','INTEGER'),
             ('tid','INTEGER'), ('opcnt', 'INTEGER'), ('factor', 'INTEGER'),
-            ('elapsed', 'BLOB'), ('sync', 'REAL'),
+            ('elapsed', 'ARRAY'), ('sync', 'REAL'),
             ('agg', 'REAL'), ('opavg', 'REAL'),
             ('opmin', 'REAL'), ('opmax', 'REAL'), ('opstd', 'REAL')]
+        # Latency histograms in recording mode "hist", per-host and overall
+        # histograms are merged from threads with tid and hid set to -1
+        self.FORMATS['io_hist'] = [('hid','INTEGER'), ('pid','INTEGER'),
+            ('tid','INTEGER'), ('fsize', 'INTEGER'), ('bsize', 'INTEGER'),
+            ('hist', 'HIST'), ('count', 'INTEGER'), ('p50', 'REAL'),
+            ('p99', 'REAL'), ('p999', 'REAL'), ('max', 'REAL'),
+            ('iodepth', 'INTEGER')]
+        self.FORMATS['meta_hist'] = [('hid','INTEGER'), ('pid','INTEGER'),
+            ('tid','INTEGER'), ('opcnt', 'INTEGER'), ('factor', 'INTEGER'),
+            ('hist', 'HIST'), ('count', 'INTEGER'), ('p50', 'REAL'),
+            ('p99', 'REAL'), ('p999', 'REAL'), ('max', 'REAL')]
+        # Listing passes of a directory of entries, agg is entries/sec and
+        # cost is per-entry time of a pass
+        self.FORMATS['list'] = [('hid','INTEGER'), ('pid','INTEGER'),
+            ('tid','INTEGER'), ('entries', 'INTEGER'), ('passes', 'INTEGER'),
+            ('elapsed', 'ARRAY'), ('sync', 'REAL'), ('agg', 'REAL'),
+            ('costavg', 'REAL'), ('costmin', 'REAL'), ('costmax', 'REAL'),
+            ('coststd', 'REAL')]
+        # Time series of calls and bytes completed in each bucket, median
+        # is of throughput of buckets, stalls are buckets below stall
+        # percent of it
+        self.FORMATS['meta_ts'] = [('hid','INTEGER'), ('pid','INTEGER'),
+            ('tid','INTEGER'), ('opcnt','INTEGER'), ('factor','INTEGER'),
+            ('interval','REAL'), ('time','ARRAY'), ('calls','ARRAY'),
+            ('bytes','ARRAY'), ('median','REAL'), ('stalls','INTEGER'),
+            ('stalled','REAL')]
+        self.FORMATS['io_ts'] = [('hid','INTEGER'), ('pid','INTEGER'),
+            ('tid','INTEGER'), ('fsize','INTEGER'), ('bsize','INTEGER'),
+            ('interval','REAL'), ('time','ARRAY'), ('calls','ARRAY'),
+            ('bytes','ARRAY'), ('median','REAL'), ('stalls','INTEGER'),
+            ('stalled','REAL'), ('iodepth','INTEGER')]
+        # Latency of metadata calls in each shared directory, over all
+        # threads of all hosts
+        self.FORMATS['meta_dirs'] = [('opcnt', 'INTEGER'),
+            ('factor', 'INTEGER'), ('dir', 'INTEGER'), ('count', 'INTEGER'),
+            ('threads', 'INTEGER'), ('avg', 'REAL'), ('std', 'REAL'),
+            ('p99', 'REAL'), ('max', 'REAL')]
+        # Raw results saved by each host in GXP mode
+        self.FORMATS['shards'] = [('hid', 'INTEGER'), ('host', 'TEXT'),
+            ('path', 'TEXT')]
         self.FORMATS['aggdata'] = [('hostid','INTEGER'), ('pid','INTEGER'),
             ('tid','INTEGER'), ('oper','TEXT'), ('optype', 'INTEGER'), 
             ('min','REAL'), ('max','REAL'), ('avg','REAL'), ('agg','REAL'), 
             ('std','REAL'), ('time', 'REAL')]
         
+        # Indexes of raw data tables on columns selected by reports
+        self.INDEXES = {}
+        self.INDEXES['io'] = ['hid', 'pid', 'tid', 'fsize', 'bsize']
+        self.INDEXES['meta'] = ['hid', 'opcnt', 'factor']
+
         self.FORMATS_LEN = {}
         for k, v in self.FORMATS.items():
             self.FORMATS_LEN[k] = len(self.FORMATS[k])
@@ -59,40 +183,120 @@ class Database:
         sqlite3.register_converter("BLOB", lambda s:cPickle.loads(str(s)))
         sqlite3.register_adapter(list, cPickle.dumps)
         sqlite3.register_adapter(dict, cPickle.dumps)
+        # Typed arrays are kept in column file next to database, or as
+        # raw bytes of doubles in rows of a database in memory, stored by
+        # flush_rows() and loaded by selects of this database
+        if path == ":memory:":
+            self.cols = None
+            self.load = num.frombuffer
+            self.store = lambda a:sqlite3.Binary(a.tostring())
+        else:
+            self.cols = ColumnFile("%s.col" % os.path.splitext(path)[0])
+            self.load = self.cols.load
+            self.store = self.cols.store
+        sqlite3.register_converter("HIST", hist.fromstring)
+        sqlite3.register_adapter(hist.Histogram,
+            lambda h:sqlite3.Binary(h.tostring()))
         self.db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
         self.cur = self.db.cursor()
+        if path != ":memory:":
+            # Results are written once by one process and can be
+            # regenerated, trade durability for speed of saving
+            self.cur.execute("PRAGMA journal_mode=WAL")
+            self.cur.execute("PRAGMA synchronous=OFF")
         self.tables = []    # all tables in database
+        self.formats = {}   # format and index of each created table
+        self.rows = {}      # rows of each table waiting for flush_rows()
 
     def __del__(self):
         """In case user forget to flush/close database"""
         if self.db is not None:
-            self.db.commit()
+            self.commit()
             self.db.close()
+            if self.cols is not None: self.cols.close()
     
     def commit(self):
+        self.flush_rows()
+        if self.cols is not None: self.cols.flush()
         self.db.commit()
 
+    def queue(self, table, vals):
+        """Queue a row of vals to be inserted into table by flush_rows()"""
+        self.rows.setdefault(table, []).append(vals)
+
+    def take_rows(self):
+        """
+        Return formats of tables and their queued rows, leaving them to
+        be inserted into another database by put_rows()
+        """
+        rows = self.rows
+        self.rows = {}
+        return dict([(t, self.formats[t]) for t in rows.keys()]), rows
+
+    def put_rows(self, formats, rows, overwrite=False):
+        for table, r in rows.items():
+            format, index = formats[table]
+            self.create_table(table, format, overwrite, index)
+            self.rows.setdefault(table, []).extend(r)
+
+    def flush_rows(self):
+        """
+        Insert all queued rows within the transaction ended by commit(),
+        one prepared statement per table
+        """
+        for table, rows in self.rows.items():
+            self.cur.executemany("INSERT INTO %s VALUES (%s)" % (table,
+                ",".join(["?"] * len(rows[0]))), map(self.encode, rows))
+        self.rows = {}
+
+    def encode(self, row):
+        """Return row with its arrays stored by this database"""
+        vals = list(row)
+        for i, v in enumerate(vals):
+            if isinstance(v, array): vals[i] = self.store(v)
+        return vals
+
+    def decode(self, rows):
+        """Return selected rows with their array columns loaded"""
+        res = []
+        for r in rows:
+            vals = list(r)
+            for i, v in enumerate(vals):
+                if isinstance(v, Column): vals[i] = self.load(v)
+            res.append(tuple(vals))
+        return res
+
     def close(self):
         """Flush and close database"""
-        self.db.commit()
+        self.commit()
         self.db.close()
         self.db = None
+        if self.cols is not None: self.cols.close()
     
     # Table
-    def create_table(self, name, format, drop=False):
+    def create_table(self, name, format, drop=False, index=None):
         """Create a table given a table name and format
         Drop existing table if the drop option is True
         name: table name
         format: a list describe the field and its type
-        drop: True/False"""
-        if drop: self.cur.execute("DROP TABLE IF EXISTS %s" % name)
+        drop: True/False
+        index: a list of indexed fields"""
+        if drop:
+            self.cur.execute("DROP TABLE IF EXISTS %s" % name)
+            self.rows.pop(name, None)
         
         if name in self.tables: return
         
         formatstr =", ".join(["%s %s" % item for item in format]) 
         self.cur.execute("CREATE TABLE IF NOT EXISTS %s (%s)" 
             % (name, formatstr))
+        if index is not None: self.create_index(name, index)
         self.tables.append("%s" % name)
+        self.formats[name] = (format, index)
+
+    def create_index(self, name, fields):
+        self.cur.execute("CREATE INDEX IF NOT EXISTS %s_idx ON %s (%s)"
+            % (name, name, ",".join(fields)))
 
     def drop_tables(self, tables=None):
         if tables is None:
@@ -124,62 +328,217 @@ class Database:
                 self.cur.execute('INSERT INTO %s VALUES (?,?,?)' % table,
                     (sec, opt, val))
 
-    def insert_rawdata(self, res, overwrite=False):
+    def insert_rawdata(self, res, overwrite=False, raw=True):
         """
-        Insert raw data for the series of operation in each *thread*
+        Insert raw data for the series of operation in each *thread*,
+        per-call latencies are left out unless raw is True
         """
         for o in res.opset:
             if oper.optype(o["name"]) == oper.TYPE_META:
-                # Aggregated throughput
-                total_elapsed = num.sum(o["elapsed"])
-                agg = o["opcnt"] / total_elapsed # ops/sec
-                
-                # Per-operation throughput
-                tlist = map(lambda e:1/e, o["elapsed"])
-                opavg = num.average(tlist)
-                opmin = num.min(tlist)
-                opmax = num.max(tlist)
-                opstd = num.std(tlist)
-
-                self.create_table(o["name"], self.FORMATS["meta"], overwrite)
-                self.cur.execute(
-                    "INSERT INTO %s VALUES (?,?,?,?,?,?,?,?,?,?,?,?)"
-                    % o["name"], (res.hid, res.pid, res.tid, o["opcnt"],
-                      o["factor"], o["elapsed"], o['synctime'],
-                      agg, opavg, opmin, opmax, opstd))
+                if isinstance(o["elapsed"], hist.Histogram):
+                    self.insert_hist(o["name"], res.hid, res.pid, res.tid,
+                        o["opcnt"], o["factor"], o["elapsed"].copy(),
+                        overwrite)
+                    total_elapsed = o["elapsed"].sum
+                    agg = o["opcnt"] / total_elapsed # ops/sec
+                    opavg, opmin, opmax, opstd = \
+                        hist_throughput(o["elapsed"], 1)
+                    elapsed = None
+                elif isinstance(o["elapsed"], ElapsedSample):
+                    # Exact aggregated throughput and extremes, average
+                    # and deviation estimated from sampled calls
+                    total_elapsed = o["elapsed"].sum
+                    agg = o["opcnt"] / total_elapsed # ops/sec
+                    elapsed = o["elapsed"].points()
+                    opavg, _, _, opstd = num.stats(elapsed, 1.0)
+                    opmin = 1 / o["elapsed"].max
+                    opmax = 1 / o["elapsed"].min
+                else:
+                    # Aggregated throughput
+                    total_elapsed = num.sum(o["elapsed"])
+                    agg = o["opcnt"] / total_elapsed # ops/sec
+                    
+                    # Per-operation throughput
+                    opavg, opmin, opmax, opstd = \
+                        num.stats(o["elapsed"], 1.0)
+                    elapsed = o["elapsed"]
+
+                if not raw: elapsed = None
+                self.create_table(o["name"], self.FORMATS["meta"], overwrite,
+                    self.INDEXES["meta"])
+                self.queue(o["name"], (res.hid, res.pid, res.tid,
+                    o["opcnt"], o["factor"], elapsed, o['synctime'],
+                    agg, opavg, opmin, opmax, opstd))
 
             elif oper.optype(o["name"]) == oper.TYPE_IO:
-                # Aggregated throughput
-                total_elapsed = num.sum(o["elapsed"])
-                agg = o["fsize"] / total_elapsed # KB/sec
-                aggnoclose = o["fsize"] / (total_elapsed - o["elapsed"][-1])
-
-                # Per-operation throughput
-                tlist = map(lambda e:o["bsize"]/e, o["elapsed"][1:-1])
-                opavg = num.average(tlist)
-                opmin = num.min(tlist)
-                opmax = num.max(tlist)
-                opstd = num.std(tlist)
-
-                self.create_table(o["name"], self.FORMATS["io"], overwrite)
-                self.cur.execute(
-                    "INSERT INTO %s VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)"
-                    % o["name"], (res.hid, res.pid, res.tid, o["fsize"], 
-                      o["bsize"], o["elapsed"], o['synctime'],
-                      agg, aggnoclose, opavg, opmin, opmax, opstd))
+                # Bytes and wall time of steady-state window in duration
+                # runs, ramp-up excluded
+                size = o.get("bytes", o["fsize"])
+                sync = o["synctime"]
+                if o.get("runtime") is not None: sync -= o["ramp_time"]
+                if isinstance(o["elapsed"], hist.Histogram):
+                    # open() and close() excluded as in elapsed[1:-1]
+                    calls = o["elapsed"].inner()
+                    self.insert_hist(o["name"], res.hid, res.pid, res.tid,
+                        o["fsize"], o["bsize"], calls, overwrite,
+                        o.get("iodepth", 1))
+                    total_elapsed = o["elapsed"].sum - \
+                        o.get("overlap", 0.0)
+                    agg = size / total_elapsed # KB/sec
+                    aggnoclose = size / \
+                        (total_elapsed - o["elapsed"].last)
+                    opavg, opmin, opmax, opstd = \
+                        hist_throughput(calls, o["bsize"])
+                    elapsed = None
+                elif isinstance(o["elapsed"], ElapsedSample):
+                    # Total time is exact, per-call throughput estimated
+                    # from sampled calls, open() and close() kept aside
+                    total_elapsed = o["elapsed"].sum - \
+                        o.get("overlap", 0.0)
+                    agg = size / total_elapsed # KB/sec
+                    aggnoclose = size / \
+                        (total_elapsed - o["elapsed"].last)
+                    calls = o["elapsed"].inner()
+                    if len(calls) == 0:
+                        # No call sampled, take the average call
+                        calls = array('d', [(o["elapsed"].sum -
+                            o["elapsed"].first - o["elapsed"].last) /
+                            max(len(o["elapsed"]) - 2, 1)])
+                    opavg, opmin, opmax, opstd = \
+                        num.stats(calls, o["bsize"])
+                    elapsed = array('d', [o["elapsed"].first]) + calls + \
+                        array('d', [o["elapsed"].last])
+                else:
+                    # Aggregated throughput, concurrent requests of
+                    # asynchronous engine counted once
+                    total_elapsed = num.sum(o["elapsed"]) - \
+                        o.get("overlap", 0.0)
+                    agg = size / total_elapsed # KB/sec
+                    aggnoclose = size / \
+                        (total_elapsed - o["elapsed"][-1])
+
+                    # Per-operation throughput
+                    opavg, opmin, opmax, opstd = \
+                        num.stats(o["elapsed"][1:-1], o["bsize"])
+                    elapsed = o["elapsed"]
+
+                if not raw: elapsed = None
+                self.create_table(o["name"], self.FORMATS["io"], overwrite,
+                    self.INDEXES["io"])
+                self.queue(o["name"], (res.hid, res.pid, res.tid,
+                    o["fsize"], o["bsize"], elapsed, sync,
+                    agg, aggnoclose, opavg, opmin, opmax, opstd,
+                    o["access"], o["seed"], o.get("iodepth", 1), size))
+
+            elif oper.optype(o["name"]) == oper.TYPE_LIST:
+                entries = o["entries"]
+                agg = entries * len(o["elapsed"]) / num.sum(o["elapsed"])
+                self.create_table(o["name"], self.FORMATS["list"], overwrite)
+                self.queue(o["name"], (res.hid, res.pid, res.tid, entries,
+                    o["passes"], o["elapsed"], o['synctime'], agg)
+                    + tuple([v / entries for v in num.stats(o["elapsed"])]))
+
+    def insert_shards(self, shards, overwrite=False):
+        """Index databases of raw results of hosts, not loaded"""
+        table = 'shards'
+        self.create_table(table, self.FORMATS[table], overwrite)
+        for hid, host, path in shards: self.queue(table, (hid, host, path))
+
+    def insert_hist(self, name, hid, pid, tid, x, y, h, overwrite=False,
+        iodepth=1):
+        """
+        Insert latency histogram h of operation name, where x and y are
+        opcnt and factor for metadata, or fsize and bsize for I/O operation
+        """
+        vals = (hid, pid, tid, x, y, h, len(h), h.percentile(50),
+            h.percentile(99), h.percentile(99.9), h.max)
+        if oper.optype(name) == oper.TYPE_META: format = "meta_hist"
+        else:
+            format = "io_hist"
+            vals += (iodepth,)
+        table = "%s_hist" % name
+        self.create_table(table, self.FORMATS[format], overwrite)
+        self.queue(table, vals)
+
+    def insert_series(self, name, hid, pid, tid, x, y, series, stall,
+        overwrite=False, iodepth=1):
+        """
+        Insert time series of operation name, where x and y are as in
+        insert_hist(), throughput is bytes/sec of I/O operations and
+        ops/sec of metadata operations, stall is percent of its median
+        """
+        if oper.optype(name) == oper.TYPE_META: vals = series["calls"]
+        else: vals = series["bytes"]
+        r = progress.rates(series["time"], vals, series["interval"])
+        med, idx = progress.stalls(r, stall)
+        t = series["time"]
+        stalled = sum([t[i] - t[i - 1] for i in idx])
+        vals = (hid, pid, tid, x, y, series["interval"], series["time"],
+            series["calls"], series["bytes"], med, len(idx), stalled)
+        if oper.optype(name) == oper.TYPE_META: format = "meta_ts"
+        else:
+            format = "io_ts"
+            vals += (iodepth,)
+        table = "%s_ts" % name
+        self.create_table(table, self.FORMATS[format], overwrite)
+        self.queue(table, vals)
+
+    def insert_dirs(self, name, opcnt, factor, d, lats, nthreads,
+        overwrite=False):
+        """
+        Insert latency statistics of calls of metadata operation name in
+        shared directory d made by nthreads threads
+        """
+        lats = sorted(lats)
+        p99 = lats[max(0, int(math.ceil(len(lats) * 0.99)) - 1)]
+        table = "%s_dirs" % name
+        self.create_table(table, self.FORMATS["meta_dirs"], overwrite)
+        self.queue(table, (opcnt, factor, d, len(lats), nthreads,
+            num.average(lats), num.std(lats), p99, lats[-1]))
 
     def select_rawdata_all(self, table):
         self.cur.execute("SELECT * FROM %s" % table)
-        return self.cur.fetchall()
+        return self.decode(self.cur.fetchall())
     
-    def select_rawdata_cols(self, table, cols):
-        self.cur.execute("SELECT %s FROM %s" % (cols, table))
-        return self.cur.fetchall()
+    def select_rawdata_cols(self, table, cols, hid=None):
+        """Select only cols, of host hid if given, leaving others unloaded"""
+        if hid is None: self.cur.execute("SELECT %s FROM %s" % (cols, table))
+        else:
+            self.cur.execute("SELECT %s FROM %s WHERE hid=?" % (cols, table),
+                (hid,))
+        return self.decode(self.cur.fetchall())
+
+    def select_thread_stats(self, table, keys, size=None, hid=None,
+        values=False):
+        """
+        Return statistics of threads grouped by keys, of host hid if
+        given, in rows of keys followed by number of threads, average
+        sync time, total of column size, average, minimum, maximum and
+        deviation of agg, and agg of each thread if values is True
+        """
+        cols = keys + ["COUNT(*)", "AVG(sync)", "SUM(%s)" % (size or 0),
+            "AVG(agg)", "MIN(agg)", "MAX(agg)", "AVG(agg*agg)"]
+        if values: cols.append("GROUP_CONCAT(agg)")
+        qstr = "SELECT %s FROM %s" % (",".join(cols), table)
+        args = ()
+        if hid is not None:
+            qstr += " WHERE hid=?"
+            args = (hid,)
+        qstr += " GROUP BY %s ORDER BY %s" % ((",".join(keys),) * 2)
+        self.cur.execute(qstr, args)
+        res = []
+        n = len(keys)
+        for r in self.cur.fetchall():
+            avg, sqavg = r[n + 3], r[n + 6]
+            row = list(r[:n + 6]) + [math.sqrt(max(sqavg - avg * avg, 0))]
+            if values: row.append(map(float, r[n + 7].split(",")))
+            res.append(row)
+        return res
 
     def select_rawdata_hid(self, table, hid):
         self.cur.execute("SELECT * FROM %s WHERE hid=%d" 
             % (table, hid))
-        return self.cur.fetchall()
+        return self.decode(self.cur.fetchall())
         
     def get_hids(self, oper):
         self.cur.execute("SELECT hid FROM %s GROUP BY hid" % oper)
@@ -203,8 +562,9 @@ class Database:
         self.cur.execute(qstr)
         if one:
             res = self.cur.fetchone()
+            if res is not None: res = self.decode([res])[0]
         else:
-            res = self.cur.fetchall()
+            res = self.decode(self.cur.fetchall())
         if len(columns) == 1:
             return map(lambda (v,):v, res)
         else:
@@ -21,8 +21,11 @@
 
 import os
 import random
+import zlib
+from array import array
 
 from modules.verbose import *
+from modules.common import get_logical_blocksize
 import oper
 
 __all__ = ['BenchLoad']
@@ -32,83 +35,178 @@ class BenchLoad:
         self.cfg = cfg
         self.dir = '%s/paramark-%03d-%d-%d' % \
             (self.cfg.wdir, random.randint(0,999), self.cfg.hid, self.cfg.pid)
-        self.meta = {}
+        # Known to all hosts without communication
+        self.shared = '%s/paramark-shared' % self.cfg.wdir
+        self.seed = self.cfg.seed
+        if self.seed is None: self.seed = random.randint(0, 2**31 - 1)
+        self.check_direct()
+        self.check_runtime()
 
     def generate(self, tid):
         self.threaddir = '%s-%d' % (self.dir, tid)
         load = self.generate_meta(tid)
         load.extend(self.generate_io(tid))
+        load.extend(self.generate_list(tid))
         return self.threaddir, load
 
+    def shared_dirs(self):
+        """Return directories shared by all threads, none if private"""
+        if self.cfg.layout != "shared": return []
+        return ['%s/d%d' % (self.shared, i)
+            for i in range(self.cfg.shared_dirs)]
+
+    def get_flags(self, o):
+        flags = getattr(self.cfg, o).flags
+        if self.cfg.direct: flags |= oper.O_DIRECT
+        return flags
+
+    def check_direct(self):
+        """
+        Direct I/O transfers must be multiples of the logical block size
+        of the device holding working directory
+        """
+        opers = [o for o in self.cfg.io if o in oper.OPS_DIRECT
+            and self.get_flags(o) & oper.O_DIRECT]
+        if len(opers) == 0: return
+        lbs = get_logical_blocksize(self.cfg.wdir)
+        for size in self.cfg.fsize + self.cfg.bsize:
+            if size % lbs != 0:
+                fatal("%s with O_DIRECT: size %d is not a multiple of "
+                    "logical block size %d of %s" % (",".join(opers),
+                    size, lbs, self.cfg.wdir))
+
+    def check_runtime(self):
+        """Ramp-up must leave a steady-state window in duration runs"""
+        if self.cfg.runtime is None: return
+        if self.cfg.ramp_time >= self.cfg.runtime:
+            fatal("ramp_time (%ss) must be shorter than runtime (%ss)"
+                % (self.cfg.ramp_time, self.cfg.runtime))
+
     def generate_io(self, tid):
         load = []
         for o in self.cfg.io:
+            # Queue depth applies to primitives run by asynchronous engine
+            if o in oper.OPS_ASYNC: iodepths = self.cfg.iodepth
+            else: iodepths = [1]
             for fs in self.cfg.fsize:
                 for bs in self.cfg.bsize:
-                    if o == 'write':
-                        op = oper.write(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            flags=self.cfg.write.flags,
-                            mode=self.cfg.write.mode,
-                            fsync=self.cfg.write.fsync,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'rewrite':
-                        op = oper.rewrite(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            flags=self.cfg.rewrite.flags,
-                            mode=self.cfg.rewrite.mode,
-                            fsync=self.cfg.rewrite.fsync,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'read':
-                        op = oper.read(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            flags=self.cfg.read.flags,
-                            mode=self.cfg.read.mode,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'reread':
-                        op = oper.reread(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            flags=self.cfg.reread.flags,
-                            mode=self.cfg.reread.mode,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'fread':
-                        op = oper.fread(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            mode=self.cfg.fread.mode,
-                            bufsize=self.cfg.fread.bufsize,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'freread':
-                        op = oper.freread(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            mode=self.cfg.freread.mode,
-                            bufsize=self.cfg.freread.bufsize,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'fwrite':
-                        op = oper.fwrite(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            mode=self.cfg.fwrite.mode,
-                            bufsize=self.cfg.fwrite.bufsize,
-                            fsync=self.cfg.fwrite.fsync,
-                            dryrun=self.cfg.dryrun)
-                    elif o == 'frewrite':
-                        op = oper.frewrite(
-                            f=self.get_io_load(tid, fs, bs),
-                            fsize=fs, bsize=bs,
-                            mode=self.cfg.frewrite.mode,
-                            bufsize=self.cfg.frewrite.bufsize,
-                            fsync=self.cfg.frewrite.fsync,
-                            dryrun=self.cfg.dryrun)
-                    else:
-                        warning("unknow I/O operation \"%s\", ignored" % o)
-                        continue
-                    load.append(op)
+                    for qd in iodepths:
+                        if o == 'write':
+                            op = oper.write(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                flags=self.get_flags('write'),
+                                mode=self.cfg.write.mode,
+                                fsync=self.cfg.write.fsync,
+                                pattern=self.cfg.write.pattern,
+                                access=self.cfg.write.access_pattern,
+                                seed=self.seed + tid,
+                                iodepth=qd,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.write.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'rewrite':
+                            op = oper.rewrite(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                flags=self.get_flags('rewrite'),
+                                mode=self.cfg.rewrite.mode,
+                                fsync=self.cfg.rewrite.fsync,
+                                pattern=self.cfg.rewrite.pattern,
+                                access=self.cfg.rewrite.access_pattern,
+                                seed=self.seed + tid,
+                                iodepth=qd,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.rewrite.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'read':
+                            op = oper.read(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                flags=self.get_flags('read'),
+                                mode=self.cfg.read.mode,
+                                readinto=self.cfg.read.readinto,
+                                access=self.cfg.read.access_pattern,
+                                seed=self.seed + tid,
+                                iodepth=qd,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.read.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'reread':
+                            op = oper.reread(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                flags=self.get_flags('reread'),
+                                mode=self.cfg.reread.mode,
+                                readinto=self.cfg.reread.readinto,
+                                access=self.cfg.reread.access_pattern,
+                                seed=self.seed + tid,
+                                iodepth=qd,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.reread.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'fread':
+                            op = oper.fread(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                mode=self.cfg.fread.mode,
+                                bufsize=self.cfg.fread.bufsize,
+                                readinto=self.cfg.fread.readinto,
+                                access=self.cfg.fread.access_pattern,
+                                seed=self.seed + tid,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.fread.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'freread':
+                            op = oper.freread(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                mode=self.cfg.freread.mode,
+                                bufsize=self.cfg.freread.bufsize,
+                                readinto=self.cfg.freread.readinto,
+                                access=self.cfg.freread.access_pattern,
+                                seed=self.seed + tid,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.freread.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'fwrite':
+                            op = oper.fwrite(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                mode=self.cfg.fwrite.mode,
+                                bufsize=self.cfg.fwrite.bufsize,
+                                fsync=self.cfg.fwrite.fsync,
+                                pattern=self.cfg.fwrite.pattern,
+                                access=self.cfg.fwrite.access_pattern,
+                                seed=self.seed + tid,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.fwrite.sampling,
+                                dryrun=self.cfg.dryrun)
+                        elif o == 'frewrite':
+                            op = oper.frewrite(
+                                f=self.get_io_load(tid, fs, bs),
+                                fsize=fs, bsize=bs,
+                                mode=self.cfg.frewrite.mode,
+                                bufsize=self.cfg.frewrite.bufsize,
+                                fsync=self.cfg.frewrite.fsync,
+                                pattern=self.cfg.frewrite.pattern,
+                                access=self.cfg.frewrite.access_pattern,
+                                seed=self.seed + tid,
+                                runtime=self.cfg.runtime,
+                                ramp_time=self.cfg.ramp_time,
+                                sampling=self.cfg.frewrite.sampling,
+                                dryrun=self.cfg.dryrun)
+                        else:
+                            warning("unknow I/O operation \"%s\", ignored" % o)
+                            continue
+                        load.append(op)
         return load
     
     def generate_meta(self, tid):
@@ -120,12 +218,17 @@ class BenchLoad:
                         op = oper.mkdir(
                             files=self.get_meta_load(tid, ct, ft)[0],
                             opcnt=ct, factor=ft,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.mkdir.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'rmdir':
-                        files = list(self.get_meta_load(tid, ct, ft)[0])
-                        files.reverse()
+                        files = self.get_meta_load(tid, ct, ft)[0]
                         op = oper.rmdir(
-                            files=files, opcnt=ct, factor=ft,
+                            files=files.reversed(), opcnt=ct, factor=ft,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.rmdir.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'creat':
                         op = oper.creat(
@@ -133,12 +236,16 @@ class BenchLoad:
                             opcnt=ct, factor=ft,
                             flags=self.cfg.creat.flags,
                             mode=self.cfg.creat.mode,
+                            sampling=self.cfg.creat.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'access':
                         op = oper.access(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
                             mode=self.cfg.access.mode,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.access.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'open':
                         op = oper.open(
@@ -146,6 +253,7 @@ class BenchLoad:
                             opcnt=ct, factor=ft,
                             flags=self.cfg.open.flags,
                             mode=self.cfg.open.mode,
+                            sampling=self.cfg.open.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'open_close':
                         op = oper.open_close(
@@ -153,38 +261,53 @@ class BenchLoad:
                             opcnt=ct, factor=ft,
                             flags=self.cfg.open_close.flags,
                             mode=self.cfg.open_close.mode,
+                            sampling=self.cfg.open_close.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'stat_exist':
                         op = oper.stat_exist(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.stat_exist.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'stat_non':
                         op = oper.stat_non(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
+                            sampling=self.cfg.stat_non.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'utime':
                         op = oper.utime(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
                             times=self.cfg.utime.times,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.utime.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'chmod':
                         op = oper.chmod(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
                             mode=self.cfg.chmod.mode,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.chmod.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'rename':
                         op = oper.rename(
                             files=self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
+                            sampling=self.cfg.rename.sampling,
                             dryrun=self.cfg.dryrun)
                     elif o == 'unlink':
                         op = oper.unlink(
                             files = self.get_meta_load(tid, ct, ft)[1],
                             opcnt=ct, factor=ft,
+                            batch=self.cfg.batch,
+                            batch_sample=self.cfg.batch_sample,
+                            sampling=self.cfg.unlink.sampling,
                             dryrun=self.cfg.dryrun)
                     else:
                         warning("unknow meta operation \"%s\", ignored" % o)
@@ -192,28 +315,178 @@ class BenchLoad:
                     load.append(op)
         return load
 
+    def generate_list(self, tid):
+        """
+        Grow one directory of the thread through dirsize entries and
+        list it by each listing operation at every size
+        """
+        load = []
+        if len(self.cfg.listing) == 0: return load
+        grower = DirGrower('%s/listing' % self.threaddir,
+            max(self.cfg.dirsize))
+        for n in sorted(self.cfg.dirsize):
+            for o in self.cfg.listing:
+                if o == 'readdir':
+                    op = oper.readdir(grower.dir, grower, n,
+                        passes=self.cfg.passes, dryrun=self.cfg.dryrun)
+                elif o == 'scandir':
+                    op = oper.scandir(grower.dir, grower, n,
+                        passes=self.cfg.passes, dryrun=self.cfg.dryrun)
+                elif o == 'stat_all':
+                    op = oper.stat_all(grower.dir, grower, n,
+                        passes=self.cfg.passes, dryrun=self.cfg.dryrun)
+                else:
+                    warning("unknow listing operation \"%s\", ignored" % o)
+                    continue
+                load.append(op)
+        return load
+
     def get_io_load(self, tid, fsize, bsize):
         if self.cfg.use_files and len(self.cfg.use_files) == self.cfg.nthreads:
             return self.cfg.use_files[tid];
         return '%s/io-t%d-%d-%d.tmp' % (self.threaddir, tid, fsize, bsize)
 
     def get_meta_load(self, tid, opcnt, factor):
-        key = "%d.%d.%d" % (tid, opcnt, factor)
-        if self.meta.has_key(key): return self.meta[key]
-        else:
-            queue = [ str(self.threaddir) ]
-            i = l = 0
-            dirs = []
-            files = []
-            while i < opcnt:
-                if i % factor == 0:
-                    parent = queue.pop(0)
-                    l += 1
-                child = os.path.normpath("%s/L%d-%d-%d-%d" 
-                    % (parent, l, i, opcnt, factor))
-                dirs.append(child)
-                files.append("%s/%d-%d.tmp" % (child, l, i))
-                queue.append(child)
-                i += 1
-            self.meta[key] = (dirs, files)
-            return self.meta[key]
+        """
+        Return paths of directories and files of metadata load, computed
+        on demand so that memory does not grow with opcnt
+        """
+        if self.cfg.layout == "shared":
+            rank = self.cfg.hid * self.cfg.nthreads + tid
+            return tuple([SharedPaths(self.shared, self.cfg.shared_dirs,
+                rank, opcnt, factor, self.cfg.placement, files)
+                for files in [False, True]])
+        return (TreePaths(self.threaddir, opcnt, factor),
+            TreePaths(self.threaddir, opcnt, factor, files=True))
+
+class TreePaths:
+    """
+    Paths of a directory tree filled breadth-first, where every directory
+    holds factor subdirectories, or of one file in each of them. Path of
+    index i is computed from i: directory i is created in directory
+    i/factor-1, the root for i below factor.
+    """
+    def __init__(self, root, opcnt, factor, files=False, reverse=False):
+        self.root = os.path.normpath(root)
+        self.opcnt = opcnt
+        self.factor = factor
+        self.files = files
+        self.reverse = reverse
+
+    def __len__(self):
+        return self.opcnt
+
+    def __getitem__(self, i):
+        if i < 0: i += self.opcnt
+        if i < 0 or i >= self.opcnt: raise IndexError(i)
+        if self.reverse: i = self.opcnt - 1 - i
+        return self.path(self.dir(i // self.factor - 1), i)
+
+    def __iter__(self):
+        if self.reverse: order = xrange(self.opcnt - 1, -1, -1)
+        else: order = xrange(self.opcnt)
+        # Siblings share parent, computed once for factor paths
+        p = parent = None
+        for i in order:
+            if i // self.factor - 1 != p:
+                p = i // self.factor - 1
+                parent = self.dir(p)
+            yield self.path(parent, i)
+
+    def reversed(self):
+        return TreePaths(self.root, self.opcnt, self.factor, self.files,
+            not self.reverse)
+
+    def dirs(self):
+        """Paths are private to the thread, no shared directories"""
+        return None
+
+    def name(self, i):
+        return "L%d-%d-%d-%d" % (i // self.factor + 1, i, self.opcnt,
+            self.factor)
+
+    def dir(self, i):
+        """Return path of directory i, the root if i is -1"""
+        names = []
+        while i >= 0:
+            names.append(self.name(i))
+            i = i // self.factor - 1
+        names.append(self.root)
+        names.reverse()
+        return "/".join(names)
+
+    def path(self, parent, i):
+        if self.files:
+            return "%s/%s/%d-%d.tmp" % (parent, self.name(i),
+                i // self.factor + 1, i)
+        return "%s/%s" % (parent, self.name(i))
+
+class DirGrower:
+    """
+    Directory grown by listing operations, entries are subdirectories
+    named by a tree of one level, i.e., factor equal to the largest size,
+    so that a smaller directory is a prefix of a larger one
+    """
+    def __init__(self, d, maxsize):
+        self.dir = d
+        self.paths = TreePaths(d, maxsize, maxsize)
+        self.size = 0
+
+    def grow(self, size):
+        if self.size == 0: os.mkdir(self.dir)
+        for i in xrange(self.size, size): os.mkdir(self.paths[i])
+        self.size = max(size, self.size)
+
+class SharedPaths:
+    """
+    Paths of one thread in ndirs directories shared by threads of all
+    hosts. Entry i of thread rank is placed in directory i % ndirs, so
+    that threads progressing together contend on the same directory,
+    or in the directory hashed from rank and i.
+    """
+    def __init__(self, root, ndirs, rank, opcnt, factor, placement,
+        files=False, reverse=False):
+        self.root = os.path.normpath(root)
+        self.ndirs = ndirs
+        self.rank = rank
+        self.opcnt = opcnt
+        self.factor = factor
+        self.placement = placement
+        self.files = files
+        self.reverse = reverse
+
+    def __len__(self):
+        return self.opcnt
+
+    def __getitem__(self, i):
+        if i < 0: i += self.opcnt
+        if i < 0 or i >= self.opcnt: raise IndexError(i)
+        if self.reverse: i = self.opcnt - 1 - i
+        return self.path(i)
+
+    def __iter__(self):
+        if self.reverse: order = xrange(self.opcnt - 1, -1, -1)
+        else: order = xrange(self.opcnt)
+        for i in order: yield self.path(i)
+
+    def reversed(self):
+        return SharedPaths(self.root, self.ndirs, self.rank, self.opcnt,
+            self.factor, self.placement, self.files, not self.reverse)
+
+    def dir_index(self, i):
+        if self.placement == "hash":
+            return (zlib.crc32("%d-%d" % (self.rank, i)) & 0xffffffff) \
+                % self.ndirs
+        return i % self.ndirs
+
+    def dirs(self):
+        """Return shared directory index of each entry in visiting order"""
+        if self.reverse: order = xrange(self.opcnt - 1, -1, -1)
+        else: order = xrange(self.opcnt)
+        return array('l', [self.dir_index(i) for i in order])
+
+    def path(self, i):
+        if self.files: kind = "F"
+        else: kind = "D"
+        return "%s/d%d/%s-r%d-%d-%d-%d" % (self.root, self.dir_index(i),
+            kind, self.rank, i, self.opcnt, self.factor)
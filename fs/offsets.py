@@ -0,0 +1,77 @@
+#############################################################################
+# ParaMark: Benchmarking Suite for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#############################################################################
+
+# fs/offsets.py
+# Access Patterns of I/O Primitives
+
+import bisect
+import random
+from array import array
+
+__all__ = ['ACCESSES', 'blocks']
+
+# Access patterns
+#   seq: blocks in order from offset 0
+#   random: every block once in uniformly random order
+#   zipf: blocks drawn with Zipf popularity, hot blocks scattered in file
+#   stride: every stride-th block, then shifted by one, until all visited
+#   reverse: blocks in order from the last one
+ACCESSES = ["seq", "random", "zipf", "stride", "reverse"]
+
+# Set from configuration before loads are generated
+stride = 16
+theta = 1.2
+
+def blocks(access, count, seed=None):
+    """
+    Return indexes of count blocks in visiting order in a compact array,
+    None for sequential access which needs no positioning
+    """
+    if access == "seq": return None
+    elif access == "reverse":
+        return array('l', xrange(count - 1, -1, -1))
+    elif access == "stride":
+        idx = array('l')
+        for start in xrange(min(stride, count)):
+            idx.extend(xrange(start, count, stride))
+        return idx
+
+    rand = random.Random(seed)
+    if access == "random":
+        idx = array('l', xrange(count))
+        rand.shuffle(idx)
+        return idx
+    elif access == "zipf":
+        return zipf(count, theta, rand)
+
+def zipf(count, theta, rand):
+    """
+    Return count block indexes drawn from Zipf distribution of exponent
+    theta, ranks are mapped to random blocks
+    """
+    cdf = array('d')
+    acc = 0.0
+    for k in xrange(1, count + 1):
+        acc += k ** -theta
+        cdf.append(acc)
+    rank = array('l', xrange(count))
+    rand.shuffle(rank)
+    idx = array('l', [0]) * count
+    for i in xrange(count):
+        idx[i] = rank[bisect.bisect_left(cdf, rand.random() * acc)]
+    return idx
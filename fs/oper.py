@@ -19,18 +19,34 @@
 # fs/ops.py
 # File Operation Primitives
 
+import sys
 import os
+import io
+import errno
 import stat
+from itertools import islice
 from __builtin__ import open as _open
 
 from modules.verbose import *
 from modules.common import *
+from modules.clock import clock, share
+from modules.bufpool import blocks, stamper, readbuf
+from record import *
+import offsets
+import aio
+
+# os.scandir() is Python 3.5+, scandir module provides it on Python 2
+try: from os import scandir as _scandir
+except ImportError:
+    try: from scandir import scandir as _scandir
+    except ImportError: _scandir = None
 
 VERBOSE = 1
 VERBOSE_MORE = VERBOSE + 1
 
 TYPE_META = 1
 TYPE_IO = 0
+TYPE_LIST = 2
 
 OPS_META = ["mkdir", "creat", "access", "open", "open_close", "stat_exist", 
     "stat_non", "utime", "chmod", "rename", "unlink", "rmdir"]
@@ -38,31 +54,133 @@ OPS_META = ["mkdir", "creat", "access", "open", "open_close", "stat_exist",
 OPS_IO = ["write", "rewrite", "read", "reread", "fwrite", "frewrite", 
     "fread", "freread"]
 
+# Directory listing primitives, run on one directory grown in size
+OPS_LIST = ["readdir", "scandir", "stat_all"]
+
 DEFAULT_FSIZE = 1024
 DEFAULT_BLKSIZE = 1024
 
 DEFAULT_OPCNT = 100
 DEFAULT_FACTOR = 16
 
+DEFAULT_PASSES = 3
+
+INFINITY = float("inf")
+
+
+# Primitives able to bypass page cache by O_DIRECT (Linux only)
+OPS_DIRECT = ["write", "rewrite", "read", "reread"]
+O_DIRECT = getattr(os, "O_DIRECT", 0)
+
+# Primitives able to keep multiple requests in flight by fs/aio.py
+OPS_ASYNC = ["write", "rewrite", "read", "reread"]
+
+# Metadata primitives able to time calls in batches by batched()
+OPS_BATCH = ["mkdir", "rmdir", "access", "stat_exist", "utime", "chmod",
+    "unlink"]
 
 # Utilities
 def optype(opname):
     if opname in OPS_META: return TYPE_META
     elif opname in OPS_IO: return TYPE_IO
+    elif opname in OPS_LIST: return TYPE_LIST
+
+def direct_refused(op):
+    """
+    Called when os.open() of op failed, drop O_DIRECT from op.flags if
+    the file system refuses direct I/O, otherwise re-raise the error
+    """
+    e = sys.exc_info()[1]
+    if not op.flags & O_DIRECT or e.errno != errno.EINVAL: raise
+    warning("%s: O_DIRECT refused on %s, fall back to buffered I/O"
+        % (op.name, op.f))
+    op.flags &= ~O_DIRECT
+    op.direct = "refused"
+
+def direct_state(flags):
+    if flags & O_DIRECT: return "on"
+    return "off"
+
+def window(op):
+    """
+    Return clock values when ramp-up and run of I/O primitive op end,
+    calls issued before the former are warm-up and not recorded, calls
+    are repeated over the file until the latter in a duration run
+    """
+    if op.runtime is None: return 0, INFINITY
+    start = op.start
+    if start is None: start = clock()
+    return start + int(op.ramp_time * 1e9), start + int(op.runtime * 1e9)
+
+def transferred(op):
+    """Return bytes moved by recorded calls of I/O primitive op"""
+    if op.runtime is None: return op.fsize
+    return (len(op.elapsed) - 2 - int(getattr(op, "fsync", 0))) * op.bsize
+
+def batched(op, call, *args):
+    """
+    Run call(f, *args) on every f of op.files with op.batch calls timed
+    by one pair of clock() readings around map(), i.e., a loop in C, and
+    record an equal share of it for each call; calls of one batch in
+    every op.batch_sample batches are timed one by one as per-call
+    samples
+    """
+    files = iter(op.files)
+    argv = [[a] * op.batch for a in args]
+    n = 0
+    while True:
+        batch = list(islice(files, op.batch))
+        k = len(batch)
+        if k == 0: break
+        if k < op.batch: argv = [a[:k] for a in argv]
+        if op.batch_sample > 0 and n % op.batch_sample == 0:
+            for f in batch:
+                s = clock()
+                call(f, *args)
+                op.elapsed.add(clock() - s)
+        else:
+            s = clock()
+            map(call, batch, *argv)
+            e = share(clock() - s, k)
+            for i in xrange(k): op.elapsed.add(e)
+        n += 1
+
+def shared_dirs(files):
+    """
+    Return index of shared directory of each entry in files of metadata
+    primitive, None if files are not in shared directories
+    """
+    if hasattr(files, "dirs"): return files.dirs()
+    return None
 
 # I/O Primitives
 class read:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE, 
-        flags=os.O_RDONLY, mode=stat.S_IRUSR, dryrun=False):
+        flags=os.O_RDONLY, mode=stat.S_IRUSR, readinto=True,
+        access="seq", seed=None, iodepth=1, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = "read"
         self.f = f
         self.fsize = fsize
         self.bsize = bsize
         self.flags = flags
         self.mode = mode
+        self.direct = direct_state(flags)
+        # Direct I/O needs aligned buffers, not the strings os.read() returns
+        self.readinto = readinto or self.direct == "on"
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.iodepth = iodepth
+        self.overlap = 0.0
+        self.sampling = sampling
         self.dryrun = dryrun
         self.opcnt = 0
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -74,27 +192,54 @@ class read:
         cnt = int(self.fsize / self.bsize)
         if self.fsize % self.bsize != 0: cnt += 1
         self.opcnt = cnt
+        # open() + cnt * read() + close()
+        self.elapsed = new_elapsed(cnt + 2, self.sampling)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
 
         verbose(" read: os.open(%s, %d)" % (self.f, self.flags), VERBOSE_MORE)
-        s = timer()
-        fd = os.open(self.f, self.flags)
-        self.elapsed.append(timer() - s)
+        s = clock()
+        try: fd = os.open(self.f, self.flags)
+        except OSError:
+            direct_refused(self)
+            s = clock()
+            fd = os.open(self.f, self.flags)
+        add_control(self.elapsed, clock() - s)
 
         verbose(" read: os.read(%s, %d) * %d" %
             (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
-        while cnt > 0:
-            s = timer()
-            res = os.read(fd, self.bsize)
-            self.elapsed.append(timer() - s)
-            if len(res) != self.bsize:
-                warning("read bytes (%d) != bsize (%d)"
-                    % (len(res), self.bsize))
-            cnt -= 1
+        if self.iodepth > 1:
+            self.overlap = aio.run(self, fd, idx, ramp, deadline)
+        else:
+            readinto = None
+            if self.readinto:
+                buf = readbuf(self.bsize)
+                readinto = io.FileIO(fd, 'r', closefd=False).readinto
+            while cnt > 0:
+                if idx is not None:
+                    os.lseek(fd, idx[self.opcnt - cnt] * self.bsize,
+                        os.SEEK_SET)
+                s = clock()
+                if readinto: res = readinto(buf)
+                else: res = len(os.read(fd, self.bsize))
+                e = clock()
+                if s >= ramp: self.elapsed.add(e - s)
+                if res != self.bsize:
+                    warning("read bytes (%d) != bsize (%d)"
+                        % (res, self.bsize))
+                cnt -= 1
+                if e >= deadline: break
+                if cnt == 0 and self.runtime is not None:
+                    # Duration run, start over the file
+                    cnt = self.opcnt
+                    if idx is None: os.lseek(fd, 0, os.SEEK_SET)
         
         verbose(" read: os.close(%d)" % fd, VERBOSE_MORE)
-        s = timer()
+        s = clock()
         os.close(fd)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
 
     def get(self):
         out = {}
@@ -103,21 +248,45 @@ class read:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["flags"] = self.flags
-        out["elapsed"] = self.elapsed
+        out["direct"] = self.direct
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["iodepth"] = self.iodepth
+        out["overlap"] = self.overlap
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class reread:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE, 
-        flags=os.O_RDONLY, mode=stat.S_IRUSR, dryrun=False):
+        flags=os.O_RDONLY, mode=stat.S_IRUSR, readinto=True,
+        access="seq", seed=None, iodepth=1, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = "reread"
         self.f = f
         self.fsize = fsize
         self.bsize = bsize
         self.flags = flags
+        self.direct = direct_state(flags)
+        # Direct I/O needs aligned buffers, not the strings os.read() returns
+        self.readinto = readinto or self.direct == "on"
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.iodepth = iodepth
+        self.overlap = 0.0
+        self.sampling = sampling
         self.dryrun = dryrun
         self.opcnt = 0
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -130,28 +299,55 @@ class reread:
         
         if self.fsize % self.bsize != 0: cnt += 1
         self.opcnt = cnt
+        # open() + cnt * read() + close()
+        self.elapsed = new_elapsed(cnt + 2, self.sampling)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
 
         verbose(" reread: os.open(%s, %d)" % 
             (self.f, self.flags), VERBOSE_MORE)
-        s = timer()
-        fd = os.open(self.f, self.flags)
-        self.elapsed.append(timer() - s)
+        s = clock()
+        try: fd = os.open(self.f, self.flags)
+        except OSError:
+            direct_refused(self)
+            s = clock()
+            fd = os.open(self.f, self.flags)
+        add_control(self.elapsed, clock() - s)
 
         verbose(" reread: os.read(%s, %d) * %d" %
             (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
-        while cnt > 0:
-            s = timer()
-            res = os.read(fd, self.bsize)
-            self.elapsed.append(timer() - s)
-            if len(res) != self.bsize:
-                warning("read bytes (%d) != bsize (%d)"
-                    % (len(res), self.bsize))
-            cnt -= 1
+        if self.iodepth > 1:
+            self.overlap = aio.run(self, fd, idx, ramp, deadline)
+        else:
+            readinto = None
+            if self.readinto:
+                buf = readbuf(self.bsize)
+                readinto = io.FileIO(fd, 'r', closefd=False).readinto
+            while cnt > 0:
+                if idx is not None:
+                    os.lseek(fd, idx[self.opcnt - cnt] * self.bsize,
+                        os.SEEK_SET)
+                s = clock()
+                if readinto: res = readinto(buf)
+                else: res = len(os.read(fd, self.bsize))
+                e = clock()
+                if s >= ramp: self.elapsed.add(e - s)
+                if res != self.bsize:
+                    warning("read bytes (%d) != bsize (%d)"
+                        % (res, self.bsize))
+                cnt -= 1
+                if e >= deadline: break
+                if cnt == 0 and self.runtime is not None:
+                    # Duration run, start over the file
+                    cnt = self.opcnt
+                    if idx is None: os.lseek(fd, 0, os.SEEK_SET)
         
         verbose(" reread: os.close(%d)" % fd, VERBOSE_MORE)
-        s = timer()
+        s = clock()
         os.close(fd)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
 
     def get(self):
         out = {}
@@ -160,14 +356,25 @@ class reread:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["flags"] = self.flags
-        out["elapsed"] = self.elapsed
+        out["direct"] = self.direct
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["iodepth"] = self.iodepth
+        out["overlap"] = self.overlap
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class write:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE, 
         flags=os.O_CREAT | os.O_RDWR, mode=stat.S_IRUSR | stat.S_IWUSR,
-        fsync=False, dryrun=False):
+        fsync=False, pattern="char",
+        access="seq", seed=None, iodepth=1, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = "write"
         self.f = f
         self.fsize = fsize
@@ -175,9 +382,21 @@ class write:
         self.flags = flags
         self.mode = mode
         self.fsync = fsync
+        self.direct = direct_state(flags)
+        self.pattern = pattern
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.iodepth = iodepth
+        self.overlap = 0.0
+        self.sampling = sampling
         self.dryrun = dryrun
         self.opcnt = 0
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -186,7 +405,6 @@ class write:
                 (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
             return
 
-        blk = '0' * self.bsize
         cnt = int(self.fsize / self.bsize)
         
         # Since we write in block unit, adjust actually written fsize
@@ -194,33 +412,65 @@ class write:
             cnt += 1
             self.fsize = self.bsize * cnt
         self.opcnt = cnt
+        # open() + cnt * write() + [fsync()] + close()
+        self.elapsed = new_elapsed(cnt + 2 + int(self.fsync), self.sampling)
+        blks = blocks(self.bsize, self.pattern, '0', cnt,
+            self.direct == "on")
+        stamp = stamper(self.bsize, self.pattern, cnt,
+            self.direct == "on")
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
 
         verbose(" write: os.open(%s, %d, %d)" %
             (self.f, self.flags, self.mode), VERBOSE_MORE)
-        s = timer()
-        fd = os.open(self.f, self.flags, self.mode)
-        self.elapsed.append(timer() - s)
+        s = clock()
+        try: fd = os.open(self.f, self.flags, self.mode)
+        except OSError:
+            direct_refused(self)
+            s = clock()
+            fd = os.open(self.f, self.flags, self.mode)
+        add_control(self.elapsed, clock() - s)
+        if idx is not None: os.ftruncate(fd, self.fsize)
 
         verbose(" write: os.write(%s, %d) * %d" %
             (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
-        while cnt > 0:
-            s = timer()
-            res = os.write(fd, blk)
-            self.elapsed.append(timer() - s)
-            if res != self.bsize:
-                warning("written bytes (%d) != bsize (%d)"
-                    % (res, self.bsize))
-            cnt -= 1
+        if self.iodepth > 1:
+            self.overlap = aio.run(self, fd, idx, ramp, deadline, '0')
+        else:
+            while cnt > 0:
+                if idx is not None:
+                    os.lseek(fd, idx[self.opcnt - cnt] * self.bsize,
+                        os.SEEK_SET)
+                blk = blks[cnt % len(blks)]
+                if stamp is not None:
+                    n = self.opcnt - cnt
+                    if idx is not None: n = idx[n]
+                    stamp(cnt, n)
+                s = clock()
+                res = os.write(fd, blk)
+                e = clock()
+                if s >= ramp: self.elapsed.add(e - s)
+                if res != self.bsize:
+                    warning("written bytes (%d) != bsize (%d)"
+                        % (res, self.bsize))
+                cnt -= 1
+                if e >= deadline: break
+                if cnt == 0 and self.runtime is not None:
+                    # Duration run, start over the file
+                    cnt = self.opcnt
+                    if idx is None: os.lseek(fd, 0, os.SEEK_SET)
 
         if self.fsync:
-            s = timer()
+            s = clock()
             os.fsync(fd)
-            self.elapsed.append(timer() - s)
+            add_control(self.elapsed, clock() - s)
         
         verbose(" write: os.close(%d)" % fd, VERBOSE_MORE)
-        s = timer()
+        s = clock()
         os.close(fd)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
 
     def get(self):
         out = {}
@@ -229,16 +479,27 @@ class write:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["flags"] = self.flags
+        out["direct"] = self.direct
         out["mode"] = self.mode
         out["fsync"] = self.fsync
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["iodepth"] = self.iodepth
+        out["overlap"] = self.overlap
+        out["elapsed"] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class rewrite:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE, 
         flags=os.O_RDWR, mode=stat.S_IRUSR | stat.S_IWUSR,
-        fsync=False, dryrun=False):
+        fsync=False, pattern="char",
+        access="seq", seed=None, iodepth=1, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = "rewrite"
         self.f = f
         self.fsize = fsize
@@ -246,9 +507,21 @@ class rewrite:
         self.flags = flags
         self.mode = mode
         self.fsync = fsync
+        self.direct = direct_state(flags)
+        self.pattern = pattern
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.iodepth = iodepth
+        self.overlap = 0.0
+        self.sampling = sampling
         self.dryrun = dryrun
         self.opcnt = 0
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -257,7 +530,6 @@ class rewrite:
                 (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
             return
 
-        blk = '1' * self.bsize
         cnt = int(self.fsize / self.bsize)
         
         # Since we write in block unit, adjust actually written fsize
@@ -265,33 +537,65 @@ class rewrite:
             cnt += 1
             self.fsize = self.bsize * cnt
         self.opcnt = cnt
+        # open() + cnt * write() + [fsync()] + close()
+        self.elapsed = new_elapsed(cnt + 2 + int(self.fsync), self.sampling)
+        blks = blocks(self.bsize, self.pattern, '1', cnt,
+            self.direct == "on")
+        stamp = stamper(self.bsize, self.pattern, cnt,
+            self.direct == "on")
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
 
         verbose(" rewrite: os.open(%s, %d)" % 
             (self.f, self.flags), VERBOSE_MORE)
-        s = timer()
-        fd = os.open(self.f, self.flags, self.mode)
-        self.elapsed.append(timer() - s)
+        s = clock()
+        try: fd = os.open(self.f, self.flags, self.mode)
+        except OSError:
+            direct_refused(self)
+            s = clock()
+            fd = os.open(self.f, self.flags, self.mode)
+        add_control(self.elapsed, clock() - s)
+        if idx is not None: os.ftruncate(fd, self.fsize)
 
         verbose(" rewrite: os.open(%s, %d, %d)" %
             (self.f, self.flags, self.mode), VERBOSE)
-        while cnt > 0:
-            s = timer()
-            res = os.write(fd, blk)
-            self.elapsed.append(timer() - s)
-            if res != self.bsize:
-                warning("written bytes (%d) != bsize (%d)"
-                    % (res, self.bsize))
-            cnt -= 1
+        if self.iodepth > 1:
+            self.overlap = aio.run(self, fd, idx, ramp, deadline, '1')
+        else:
+            while cnt > 0:
+                if idx is not None:
+                    os.lseek(fd, idx[self.opcnt - cnt] * self.bsize,
+                        os.SEEK_SET)
+                blk = blks[cnt % len(blks)]
+                if stamp is not None:
+                    n = self.opcnt - cnt
+                    if idx is not None: n = idx[n]
+                    stamp(cnt, n)
+                s = clock()
+                res = os.write(fd, blk)
+                e = clock()
+                if s >= ramp: self.elapsed.add(e - s)
+                if res != self.bsize:
+                    warning("written bytes (%d) != bsize (%d)"
+                        % (res, self.bsize))
+                cnt -= 1
+                if e >= deadline: break
+                if cnt == 0 and self.runtime is not None:
+                    # Duration run, start over the file
+                    cnt = self.opcnt
+                    if idx is None: os.lseek(fd, 0, os.SEEK_SET)
 
         if self.fsync:
-            s = timer()
+            s = clock()
             os.fsync(fd)
-            self.elapsed.append(timer() - s)
+            add_control(self.elapsed, clock() - s)
         
         verbose(" rewrite: os.close(%d)" % fd, VERBOSE_MORE)
-        s = timer()
+        s = clock()
         os.close(fd)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
 
     def get(self):
         out = {}
@@ -300,23 +604,43 @@ class rewrite:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["flags"] = self.flags
+        out["direct"] = self.direct
         out["mode"] = self.mode
         out["fsync"] = self.fsync
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["iodepth"] = self.iodepth
+        out["overlap"] = self.overlap
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class fread:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE,
-        mode='r', bufsize=-1, dryrun=False):
+        mode='r', bufsize=-1, readinto=True,
+        access="seq", seed=None, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = 'fread'
         self.f = f
         self.fsize = fsize
         self.bsize = bsize
         self.mode = mode
         self.bufsize = bufsize
+        self.readinto = readinto
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -328,28 +652,52 @@ class fread:
         cnt = int(self.fsize / self.bsize)
         if self.fsize % self.bsize != 0: cnt += 1
         self.opcnt = cnt
+        # open() + cnt * read() + close()
+        self.elapsed = new_elapsed(cnt + 2, self.sampling)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
 
         verbose(" fread: open(%s, %s, %d)" %
             (self.f, self.mode, self.bufsize), VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f = _open(self.f, self.mode, self.bufsize)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
 
         verbose(" fread: f.read(%s) * %d" %
             (self.bsize, self.fsize / self.bsize), VERBOSE)
+        readinto = None
+        if self.readinto:
+            buf = readbuf(self.bsize)
+            readinto = f.readinto
+        rewind = False
         while cnt > 0:
-            s = timer()
-            res = f.read(self.bsize)
-            self.elapsed.append(timer() - s)
-            if len(res) != self.bsize:
+            s = clock()
+            # Seeking a stream flushes or drops its buffer, thus timed
+            if idx is not None:
+                f.seek(idx[self.opcnt - cnt] * self.bsize)
+            elif rewind:
+                f.seek(0)
+                rewind = False
+            if readinto: res = readinto(buf)
+            else: res = len(f.read(self.bsize))
+            e = clock()
+            if s >= ramp: self.elapsed.add(e - s)
+            if res != self.bsize:
                 warning("fread bytes (%d) != bsize (%d)"
-                    % (len(res), self.bsize))
+                    % (res, self.bsize))
             cnt -= 1
+            if e >= deadline: break
+            if cnt == 0 and self.runtime is not None:
+                # Duration run, start over the file
+                cnt = self.opcnt
+                rewind = True
 
         verbose(" fread: f.close()", VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f.close()
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
     
     def get(self):
         out = {}
@@ -358,21 +706,38 @@ class fread:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["mode"] = self.mode
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class freread:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE,
-        mode='r', bufsize=-1, dryrun=False):
+        mode='r', bufsize=-1, readinto=True,
+        access="seq", seed=None, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = 'freread'
         self.f = f
         self.fsize = fsize
         self.bsize = bsize
         self.mode = mode
         self.bufsize = bufsize
+        self.readinto = readinto
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -384,28 +749,52 @@ class freread:
         cnt = int(self.fsize / self.bsize)
         if self.fsize % self.bsize != 0: cnt += 1
         self.opcnt = cnt
+        # open() + cnt * read() + close()
+        self.elapsed = new_elapsed(cnt + 2, self.sampling)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
         
         verbose(" freread: open(%s, %s, %d)" %
             (self.f, self.mode, self.bufsize), VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f = _open(self.f, self.mode, self.bufsize)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
 
         verbose(" freread: f.read(%d) * %d" %
             (self.bsize, self.fsize / self.bsize), VERBOSE)
+        readinto = None
+        if self.readinto:
+            buf = readbuf(self.bsize)
+            readinto = f.readinto
+        rewind = False
         while cnt > 0:
-            s = timer()
-            res = f.read(self.bsize)
-            self.elapsed.append(timer() - s)
-            if len(res) != self.bsize:
+            s = clock()
+            # Seeking a stream flushes or drops its buffer, thus timed
+            if idx is not None:
+                f.seek(idx[self.opcnt - cnt] * self.bsize)
+            elif rewind:
+                f.seek(0)
+                rewind = False
+            if readinto: res = readinto(buf)
+            else: res = len(f.read(self.bsize))
+            e = clock()
+            if s >= ramp: self.elapsed.add(e - s)
+            if res != self.bsize:
                 warning("freread bytes (%d) != bsize (%d)"
-                    % (len(res), self.bsize))
+                    % (res, self.bsize))
             cnt -= 1
+            if e >= deadline: break
+            if cnt == 0 and self.runtime is not None:
+                # Duration run, start over the file
+                cnt = self.opcnt
+                rewind = True
         
         verbose(" freread: f.close()", VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f.close()
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
     
     def get(self):
         out = {}
@@ -414,13 +803,21 @@ class freread:
         out["fsize"] = self.fsize
         out["bsize"] = self.bsize
         out["mode"] = self.mode
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class fwrite:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE,
-        mode='w', bufsize=-1, fsync=False, dryrun=False):
+        mode='w', bufsize=-1, fsync=False, pattern="char",
+        access="seq", seed=None, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = 'fwrite'
         self.f = f
         self.fsize = fsize
@@ -428,8 +825,17 @@ class fwrite:
         self.mode = mode
         self.bufsize = bufsize
         self.fsync = fsync
+        self.pattern = pattern
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -438,37 +844,63 @@ class fwrite:
                 (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
             return
 
-        blk = '2' * self.bsize
         cnt = int(self.fsize / self.bsize)
         # Since we write in block unit, adjust actually written fsize
         if self.fsize % self.bsize != 0:
             cnt += 1
             self.fsize = self.bsize * cnt
         self.opcnt = cnt
+        # open() + cnt * write() + [fsync()] + close()
+        self.elapsed = new_elapsed(cnt + 2 + int(self.fsync), self.sampling)
+        blks = blocks(self.bsize, self.pattern, '2', cnt)
+        stamp = stamper(self.bsize, self.pattern, cnt)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
         
         verbose(" fwrite: open(%s, %s, %d)" %
             (self.f, self.mode, self.bufsize), VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f = _open(self.f, self.mode, self.bufsize)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        if idx is not None: f.truncate(self.fsize)
 
+        rewind = False
         while cnt > 0:
-            s = timer()
+            blk = blks[cnt % len(blks)]
+            if stamp is not None:
+                n = self.opcnt - cnt
+                if idx is not None: n = idx[n]
+                stamp(cnt, n)
+            s = clock()
+            # Seeking a stream flushes or drops its buffer, thus timed
+            if idx is not None:
+                f.seek(idx[self.opcnt - cnt] * self.bsize)
+            elif rewind:
+                f.seek(0)
+                rewind = False
             f.write(blk)
-            self.elapsed.append(timer() - s)
+            e = clock()
+            if s >= ramp: self.elapsed.add(e - s)
             cnt -= 1
+            if e >= deadline: break
+            if cnt == 0 and self.runtime is not None:
+                # Duration run, start over the file
+                cnt = self.opcnt
+                rewind = True
 
         if self.fsync:
             verbose(" fwrite: f.flush(); os.fsync(%d)" % f.fileno())
-            s = timer()
+            s = clock()
             f.flush()
             os.fsync(f.fileno())
-            self.elapsed.append(timer() - s)
+            add_control(self.elapsed, clock() - s)
 
         verbose(" fwrite: f.close()", VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f.close()
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
     
     def get(self):
         out = {}
@@ -478,13 +910,21 @@ class fwrite:
         out["bsize"] = self.bsize
         out["mode"] = self.mode
         out["fsync"] = self.fsync
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
 
 class frewrite:
     def __init__(self, f, fsize=DEFAULT_FSIZE, bsize=DEFAULT_BLKSIZE,
-        mode='w', bufsize=-1, fsync=False, dryrun=False):
+        mode='w', bufsize=-1, fsync=False, pattern="char",
+        access="seq", seed=None, runtime=None, ramp_time=0.0,
+        sampling=None, dryrun=False):
         self.name = 'frewrite'
         self.f = f
         self.fsize = fsize
@@ -492,8 +932,17 @@ class frewrite:
         self.mode = mode
         self.bufsize = bufsize
         self.fsync = fsync
+        self.pattern = pattern
+        self.access = access
+        self.seed = seed
+        self.runtime = runtime
+        self.ramp_time = ramp_time
+        # Barrier release time set by worker, duration runs start from it
+        self.start = None
+        self.bytes = 0
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
@@ -502,37 +951,63 @@ class frewrite:
                 (self.f, self.bsize, self.fsize/self.bsize), VERBOSE)
             return
 
-        blk = '3' * self.bsize
         cnt = int(self.fsize / self.bsize)
         # Since we write in block unit, adjust actually written fsize
         if self.fsize % self.bsize != 0:
             cnt += 1
             self.fsize = self.bsize * cnt
         self.opcnt = cnt
+        # open() + cnt * write() + [fsync()] + close()
+        self.elapsed = new_elapsed(cnt + 2 + int(self.fsync), self.sampling)
+        blks = blocks(self.bsize, self.pattern, '3', cnt)
+        stamp = stamper(self.bsize, self.pattern, cnt)
+        # Offsets generated before timing, not measured
+        idx = offsets.blocks(self.access, cnt, self.seed)
+        ramp, deadline = window(self)
         
         verbose(" frewrite: open(%s, %s, %d)" %
             (self.f, self.mode, self.bufsize), VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f = _open(self.f, self.mode, self.bufsize)
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        if idx is not None: f.truncate(self.fsize)
 
+        rewind = False
         while cnt > 0:
-            s = timer()
+            blk = blks[cnt % len(blks)]
+            if stamp is not None:
+                n = self.opcnt - cnt
+                if idx is not None: n = idx[n]
+                stamp(cnt, n)
+            s = clock()
+            # Seeking a stream flushes or drops its buffer, thus timed
+            if idx is not None:
+                f.seek(idx[self.opcnt - cnt] * self.bsize)
+            elif rewind:
+                f.seek(0)
+                rewind = False
             f.write(blk)
-            self.elapsed.append(timer() - s)
+            e = clock()
+            if s >= ramp: self.elapsed.add(e - s)
             cnt -= 1
+            if e >= deadline: break
+            if cnt == 0 and self.runtime is not None:
+                # Duration run, start over the file
+                cnt = self.opcnt
+                rewind = True
 
         if self.fsync:
             verbose(" frewrite: f.flush(); os.fsync(%d)" % f.fileno())
-            s = timer()
+            s = clock()
             f.flush()
             os.fsync(f.fileno())
-            self.elapsed.append(timer() - s)
+            add_control(self.elapsed, clock() - s)
 
         verbose(" frewrite: f.close()", VERBOSE_MORE)
-        s = timer()
+        s = clock()
         f.close()
-        self.elapsed.append(timer() - s)
+        add_control(self.elapsed, clock() - s)
+        self.bytes = transferred(self)
     
     def get(self):
         out = {}
@@ -542,31 +1017,43 @@ class frewrite:
         out["bsize"] = self.bsize
         out["mode"] = self.mode
         out["fsync"] = self.fsync
-        out["elapsed"] = self.elapsed
+        out["access"] = self.access
+        out["seed"] = self.seed
+        out["runtime"] = self.runtime
+        out["ramp_time"] = self.ramp_time
+        out["bytes"] = self.bytes
+        out["elapsed"] = self.elapsed.get()
+        out["sampling"] = self.sampling
         out["synctime"] = self.synctime
         return out
         
 # Metadata Primitives
 class mkdir:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        dryrun=False):
+        batch=1, batch_sample=0, sampling=None, dryrun=False):
         self.name = 'mkdir'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" mkdir: os.mkdir(%d directories)" % self.opcnt, VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
         
-        for f in self.files:
-            s = timer()
-            os.mkdir(f)
-            self.elapsed.append(timer() - s)
+        if self.batch > 1: batched(self, os.mkdir)
+        else:
+            for f in self.files:
+                s = clock()
+                os.mkdir(f)
+                self.elapsed.add(clock() - s)
         
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -576,30 +1063,41 @@ class mkdir:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class rmdir:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, 
-        factor=DEFAULT_FACTOR, dryrun=False):
+        factor=DEFAULT_FACTOR, batch=1, batch_sample=0, sampling=None,
+        dryrun=False):
         self.name = 'rmdir'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" rmdir: os.rmdir(%d directories)" % self.opcnt, VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
         
-        for f in self.files:
-            s = timer()
-            os.rmdir(f)
-            self.elapsed.append(timer() - s)
+        if self.batch > 1: batched(self, os.rmdir)
+        else:
+            for f in self.files:
+                s = clock()
+                os.rmdir(f)
+                self.elapsed.add(clock() - s)
         
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -609,34 +1107,40 @@ class rmdir:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class creat:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR,
         flags=os.O_CREAT | os.O_WRONLY | os.O_TRUNC, 
-        mode=stat.S_IRUSR | stat.S_IWUSR, dryrun=False):
+        mode=stat.S_IRUSR | stat.S_IWUSR, sampling=None, dryrun=False):
         self.name = 'creat'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.flags = flags
         self.mode = mode
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
     
     def exe(self):
         verbose(" creat: os.close(os.open(%d files))" % 
             len(self.files), VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
 
         for f in self.files:
-            s = timer()
+            s = clock()
             os.close(os.open(f, self.flags, self.mode))
-            self.elapsed.append(timer() - s)
+            self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -646,29 +1150,37 @@ class creat:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class access:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        mode=os.F_OK, dryrun=False):
+        mode=os.F_OK, batch=1, batch_sample=0, sampling=None, dryrun=False):
         self.name = 'access'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.mode = mode
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" access: os.access(%d files)" % self.opcnt, VERBOSE)
-        for f in self.files:
-            s = timer()
-            os.access(f, self.mode)
-            self.elapsed.append(timer() - s)
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
+        if self.batch > 1: batched(self, os.access, self.mode)
+        else:
+            for f in self.files:
+                s = clock()
+                os.access(f, self.mode)
+                self.elapsed.add(clock() - s)
         
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -678,32 +1190,38 @@ class access:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class open: # shadows __builtin__.open
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        flags=os.O_RDONLY, mode=stat.S_IRUSR, dryrun=False):
+        flags=os.O_RDONLY, mode=stat.S_IRUSR, sampling=None, dryrun=False):
         self.name = 'open'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.flags = flags
         self.mode = mode
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" open: os.open(%d files)" % self.opcnt, VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
         
         for f in self.files:
-            s = timer()
+            s = clock()
             fd = os.open(f, self.flags, self.mode)
-            self.elapsed.append(timer() - s)
+            self.elapsed.add(clock() - s)
             os.close(fd)
         
         if not self.dryrun:
@@ -714,33 +1232,37 @@ class open: # shadows __builtin__.open
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class open_close: # shadows __builtin__.open
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        flags=os.O_RDONLY, mode=stat.S_IRUSR, dryrun=False):
+        flags=os.O_RDONLY, mode=stat.S_IRUSR, sampling=None, dryrun=False):
         self.name = 'open_close'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.flags = flags
         self.mode = mode
+        self.sampling = sampling
         self.dryrun = dryrun
         assert len(self.files) == self.opcnt
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" open_close: os.close(os.open(%d files))" % 
             self.opcnt, VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
         
         for f in self.files:
-            s = timer()
+            s = clock()
             os.close(os.open(f, self.flags, self.mode))
-            self.elapsed.append(timer() - s)
+            self.elapsed.add(clock() - s)
         
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -750,30 +1272,39 @@ class open_close: # shadows __builtin__.open
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class stat_exist:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, 
-        factor=DEFAULT_FACTOR, dryrun=False):
+        factor=DEFAULT_FACTOR, batch=1, batch_sample=0, sampling=None,
+        dryrun=False):
         self.name = 'stat_exist'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" stat_exist: os.stat(%d existing files)" % self.opcnt,
             VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
 
-        for f in self.files:
-            s = timer()
-            os.stat(f)
-            self.elapsed.append(timer() - s)
+        if self.batch > 1: batched(self, os.stat)
+        else:
+            for f in self.files:
+                s = clock()
+                os.stat(f)
+                self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -783,31 +1314,38 @@ class stat_exist:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class stat_non:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, 
-        factor=DEFAULT_FACTOR, dryrun=False):
+        factor=DEFAULT_FACTOR, sampling=None, dryrun=False):
         self.name = 'stat_non'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" stat_non: os.stat(%d non-existing files)" % self.opcnt,
             VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
 
-        for f in map(lambda f:f+'.non', self.files):
-            s = timer()
+        for f in self.files:
+            f += '.non'
+            s = clock()
             try: os.stat(f)
             except OSError: pass
-            self.elapsed.append(timer() - s)
+            self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -817,31 +1355,40 @@ class stat_non:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class utime:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, 
-        factor=DEFAULT_FACTOR, times=None, dryrun=False):
+        factor=DEFAULT_FACTOR, times=None, batch=1, batch_sample=0,
+        sampling=None, dryrun=False):
         self.name = 'utime'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.times = times
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" utime: os.utime(%d files, %s)" % 
             (self.opcnt, self.times), VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
 
-        for f in self.files:
-            s = timer()
-            os.utime(f, self.times)
-            self.elapsed.append(timer() - s)
+        if self.batch > 1: batched(self, os.utime, self.times)
+        else:
+            for f in self.files:
+                s = clock()
+                os.utime(f, self.times)
+                self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -851,31 +1398,42 @@ class utime:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class chmod:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, 
-        factor=DEFAULT_FACTOR, mode=stat.S_IEXEC, dryrun=False):
+        factor=DEFAULT_FACTOR, mode=stat.S_IEXEC, batch=1, batch_sample=0,
+        sampling=None, dryrun=False):
         self.name = 'chmod'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
         self.mode = mode
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
    
     def exe(self):
         verbose(" chmod: os.chmod(%d files, 0x%x)" % 
             (self.opcnt, self.mode), VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
         
-        for f in self.files:
-            s = timer()
-            os.chmod(f, self.mode)
-            self.elapsed.append(timer() - s)
+        if self.batch > 1: batched(self, os.chmod, self.mode)
+        else:
+            for f in self.files:
+                s = clock()
+                os.chmod(f, self.mode)
+                self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -885,66 +1443,79 @@ class chmod:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class rename:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        dryrun=False):
+        sampling=None, dryrun=False):
         self.name = 'rename'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" rename: os.rename(%d files)" % self.opcnt, VERBOSE)
         if self.dryrun: return
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
 
-        fromtos = map(lambda f:(f, f+".to"), self.files)
-
-        for f, t in fromtos:
-            s = timer()
+        for f in self.files:
+            t = f + ".to"
+            s = clock()
             os.rename(f, t)
-            self.elapsed.append(timer() - s)
+            self.elapsed.add(clock() - s)
 
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
             
             # rename back
-            for f, t in fromtos: os.rename(t, f)
+            for f in self.files: os.rename(f + ".to", f)
     
     def get(self):
         out = {}
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
         out['synctime'] = self.synctime
         return out
 
 class unlink:
     def __init__(self, files, opcnt=DEFAULT_OPCNT, factor=DEFAULT_FACTOR, 
-        dryrun=False):
+        batch=1, batch_sample=0, sampling=None, dryrun=False):
         self.name = 'unlink'
         self.files = files
         self.opcnt = opcnt
         self.factor = factor
+        self.batch = batch
+        self.batch_sample = batch_sample
+        self.sampling = sampling
         self.dryrun = dryrun
-        self.elapsed = []
+        self.elapsed = new_elapsed()
         self.synctime = None
 
     def exe(self):
         verbose(" unlink: os.unlink(%d files)" % self.opcnt, VERBOSE)
         if self.dryrun: return
-
-        for f in self.files:
-            s = timer()
-            os.unlink(f)
-            self.elapsed.append(timer() - s)
+        self.elapsed = new_elapsed(self.opcnt, self.sampling)
+
+        if self.batch > 1: batched(self, os.unlink)
+        else:
+            for f in self.files:
+                s = clock()
+                os.unlink(f)
+                self.elapsed.add(clock() - s)
         
         if not self.dryrun:
             assert self.opcnt == len(self.elapsed)
@@ -954,6 +1525,130 @@ class unlink:
         out['name'] = self.name
         out['opcnt'] = self.opcnt
         out['factor'] = self.factor
-        out['elapsed'] = self.elapsed
+        out['dirs'] = shared_dirs(self.files)
+        out['batch'] = self.batch
+        out['batch_sample'] = self.batch_sample
+        out['elapsed'] = self.elapsed.get()
+        out['sampling'] = self.sampling
+        out['synctime'] = self.synctime
+        return out
+
+# Directory Listing Primitives
+# Elapsed time of each pass over the whole directory is recorded, few
+# passes are made thus always kept raw. The directory is grown to entries
+# by prepare(), called by workers before the operation starts
+class readdir:
+    def __init__(self, d, grower, entries, passes=DEFAULT_PASSES,
+        dryrun=False):
+        self.name = 'readdir'
+        self.dir = d
+        self.grower = grower
+        self.entries = entries
+        self.passes = passes
+        self.dryrun = dryrun
+        self.elapsed = ElapsedArray()
+        self.synctime = None
+
+    def prepare(self):
+        if not self.dryrun: self.grower.grow(self.entries)
+
+    def exe(self):
+        verbose(" readdir: os.listdir(%s) of %d entries * %d" %
+            (self.dir, self.entries, self.passes), VERBOSE)
+        if self.dryrun: return
+        self.elapsed = ElapsedArray(self.passes)
+
+        for i in xrange(self.passes):
+            s = clock()
+            n = len(os.listdir(self.dir))
+            self.elapsed.add(clock() - s)
+            assert n == self.entries
+
+    def get(self):
+        out = {}
+        out['name'] = self.name
+        out['entries'] = self.entries
+        out['passes'] = self.passes
+        out['elapsed'] = self.elapsed.get()
+        out['synctime'] = self.synctime
+        return out
+
+class scandir:
+    def __init__(self, d, grower, entries, passes=DEFAULT_PASSES,
+        dryrun=False):
+        self.name = 'scandir'
+        self.dir = d
+        self.grower = grower
+        self.entries = entries
+        self.passes = passes
+        self.dryrun = dryrun
+        self.elapsed = ElapsedArray()
+        self.synctime = None
+
+    def prepare(self):
+        if not self.dryrun: self.grower.grow(self.entries)
+
+    def exe(self):
+        verbose(" scandir: scandir(%s) of %d entries * %d" %
+            (self.dir, self.entries, self.passes), VERBOSE)
+        if self.dryrun: return
+        self.elapsed = ElapsedArray(self.passes)
+
+        for i in xrange(self.passes):
+            n = 0
+            s = clock()
+            # Entry type comes from d_type of getdents(), no stat()
+            for entry in _scandir(self.dir):
+                entry.is_dir()
+                n += 1
+            self.elapsed.add(clock() - s)
+            assert n == self.entries
+
+    def get(self):
+        out = {}
+        out['name'] = self.name
+        out['entries'] = self.entries
+        out['passes'] = self.passes
+        out['elapsed'] = self.elapsed.get()
+        out['synctime'] = self.synctime
+        return out
+
+class stat_all:
+    def __init__(self, d, grower, entries, passes=DEFAULT_PASSES,
+        dryrun=False):
+        self.name = 'stat_all'
+        self.dir = d
+        self.grower = grower
+        self.entries = entries
+        self.passes = passes
+        self.dryrun = dryrun
+        self.elapsed = ElapsedArray()
+        self.synctime = None
+
+    def prepare(self):
+        if not self.dryrun: self.grower.grow(self.entries)
+
+    def exe(self):
+        verbose(" stat_all: os.lstat(os.listdir(%s)) of %d entries * %d" %
+            (self.dir, self.entries, self.passes), VERBOSE)
+        if self.dryrun: return
+        self.elapsed = ElapsedArray(self.passes)
+
+        # Equivalent of "ls -l"
+        for i in xrange(self.passes):
+            n = 0
+            s = clock()
+            for f in os.listdir(self.dir):
+                os.lstat("%s/%s" % (self.dir, f))
+                n += 1
+            self.elapsed.add(clock() - s)
+            assert n == self.entries
+
+    def get(self):
+        out = {}
+        out['name'] = self.name
+        out['entries'] = self.entries
+        out['passes'] = self.passes
+        out['elapsed'] = self.elapsed.get()
         out['synctime'] = self.synctime
         return out
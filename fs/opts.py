@@ -27,6 +27,14 @@ import stat
 
 from modules.common import *
 from modules.opts import Options as BaseOptions
+from record import MODES as RECORD_MODES, parse_sampling
+from modules.bufpool import PATTERNS
+from offsets import ACCESSES
+from progress import FORMATS as PROGRESS_FORMATS
+
+ENGINES = ["thread", "process"]
+LAYOUTS = ["private", "shared"]
+PLACEMENTS = ["rank", "hash"]
 
 class Options(BaseOptions):
     """
@@ -66,6 +74,22 @@ class Options(BaseOptions):
             type="int", dest="nthreads", metavar="NUM", default=None,
             help="number of concurrent threads (default: 1)")
         
+        self.optParser.add_option("-e", "--engine", action="store",
+            type="choice", dest="engine", metavar="ENGINE", default=None,
+            choices=ENGINES,
+            help="execution engine of workers: thread/process "
+                 "(default: thread)")
+        
+        self.optParser.add_option("--record", action="store",
+            type="choice", dest="record", metavar="MODE", default=None,
+            choices=RECORD_MODES,
+            help="latency recording mode: raw/hist (default: raw)")
+        
+        self.optParser.add_option("--direct", action="store_true",
+            dest="direct", default=None,
+            help="bypass page cache by O_DIRECT in read/reread/write/"
+                 "rewrite (default: disabled)")
+        
         self.optParser.add_option("-f", "--file", action="append",
             type="string", dest="use_files",metavar="PATH", default=None,
             help="files to use")
@@ -98,11 +122,21 @@ class Options(BaseOptions):
             S_IREAD, S_IWRITE, S_IEXEC, S_IRWXU, S_IRUSR, S_IWUSR, \
             S_IXUSR, S_IRWXG, S_IRGRP, S_IWGRP, S_IXGRP, S_IRWXO, \
             S_IROTH, S_IWOTH, S_IXOTH
-        from oper import OPS_META, OPS_IO
+        from oper import OPS_META, OPS_IO, O_DIRECT
         
         if opt == "verbosity": return int(val)
         elif opt == "dryrun": return bool(eval(str(val)))
         elif opt == "nthreads": return int(val)
+        elif opt == "engine":
+            if val not in ENGINES:
+                fatal("unknown engine \"%s\", choose from %s" 
+                    % (val, ", ".join(ENGINES)))
+            return val
+        elif opt == "record":
+            if val not in RECORD_MODES:
+                fatal("unknown recording mode \"%s\", choose from %s"
+                    % (val, ", ".join(RECORD_MODES)))
+            return val
         elif opt == "confirm": return bool(val)
         elif opt == 'wdir': return os.path.abspath(val)
         elif opt == 'logdir':
@@ -116,7 +150,18 @@ class Options(BaseOptions):
             return map(lambda v:parse_datasize(v), val.split(','))
         elif opt == "bsize":
             return map(lambda v:parse_datasize(v), val.split(','))
+        elif opt == "iodepth":
+            iodepth = map(lambda v:int(v), val.split(','))
+            if min(iodepth) < 1: fatal("iodepth must be at least 1")
+            return iodepth
+        elif opt == "direct":
+            direct = bool(eval(str(val)))
+            if direct and O_DIRECT == 0:
+                fatal("O_DIRECT is not supported on %s" % sys.platform)
+            return direct
         elif opt == "flags":
+            if "O_DIRECT" in val and O_DIRECT == 0:
+                fatal("O_DIRECT is not supported on %s" % sys.platform)
             if val.startswith("O_"): return eval(val)
             else: return str(val)
         elif opt == "mode":
@@ -144,7 +189,97 @@ class Options(BaseOptions):
                 #io.append('write')
                 io = sorted(list_unique(io), key=lambda o:OPS_IO.index(o))
             return io
+        elif opt == "listing":
+            from oper import OPS_LIST, _scandir
+            listing = []
+            for o in val.split(','):
+                o = o.strip().lower()
+                if o == "scandir" and _scandir is None:
+                    warning("scandir needs Python 3.5+ or module scandir, "
+                        "ignored")
+                elif o in OPS_LIST: listing.append(o)
+            return sorted(list_unique(listing),
+                key=lambda o:OPS_LIST.index(o))
+        elif opt == "dirsize":
+            return map(lambda v:parse_count(v), val.split(','))
+        elif opt == "passes": return int(val)
         elif opt == "fsync": return bool(eval(str(val)))
+        elif opt == "readinto": return bool(eval(str(val)))
+        elif opt == "pattern":
+            if val not in PATTERNS:
+                fatal("unknown fill pattern \"%s\", choose from %s"
+                    % (val, ", ".join(PATTERNS)))
+            return val
+        elif opt == "access_pattern":
+            if val not in ACCESSES:
+                fatal("unknown access pattern \"%s\", choose from %s"
+                    % (val, ", ".join(ACCESSES)))
+            return val
+        elif opt == "seed":
+            if val == "": return None
+            else: return int(val)
+        elif opt == "runtime":
+            if val in ["", "0"]: return None
+            runtime = parse_timespan(val)
+            if runtime <= 0: fatal("runtime must be positive")
+            return runtime
+        elif opt == "ramp_time":
+            if val == "": return 0.0
+            return parse_timespan(val)
+        elif opt == "layout":
+            if val not in LAYOUTS:
+                fatal("unknown layout \"%s\", choose from %s"
+                    % (val, ", ".join(LAYOUTS)))
+            return val
+        elif opt == "shared_dirs":
+            shared_dirs = int(val)
+            if shared_dirs < 1: fatal("shared_dirs must be at least 1")
+            return shared_dirs
+        elif opt == "placement":
+            if val not in PLACEMENTS:
+                fatal("unknown placement \"%s\", choose from %s"
+                    % (val, ", ".join(PLACEMENTS)))
+            return val
+        elif opt == "batch":
+            batch = int(val)
+            if batch < 1: fatal("batch must be at least 1")
+            return batch
+        elif opt == "batch_sample":
+            batch_sample = int(val)
+            if batch_sample < 0: fatal("batch_sample must not be negative")
+            return batch_sample
+        elif opt == "sampling":
+            try: return parse_sampling(val)
+            except ValueError:
+                fatal("invalid sampling \"%s\", use N or 1/N" % val)
+        elif opt == "progress":
+            if val == "" or val == "0": return None
+            interval = parse_timespan(val)
+            if interval <= 0: fatal("progress must be positive")
+            return interval
+        elif opt == "progress_format":
+            if val not in PROGRESS_FORMATS:
+                fatal("unknown progress format \"%s\", choose from %s"
+                    % (val, ", ".join(PROGRESS_FORMATS)))
+            return val
+        elif opt == "progress_file":
+            if val == "": return None
+            return os.path.abspath(val)
+        elif opt == "timeseries":
+            if val == "" or val == "0": return None
+            interval = parse_timespan(val)
+            if interval <= 0: fatal("timeseries must be positive")
+            return interval
+        elif opt == "stall": return float(val)
+        elif opt == "compress":
+            level = int(val)
+            if level < 0 or level > 9: fatal("compress must be 0-9")
+            return level
+        elif opt == "shards":
+            if val == "": return None
+            return os.path.abspath(val)
+        elif opt == "stride": return int(val)
+        elif opt == "zipf_theta": return float(val)
         elif opt == "times":
             if val == "": return None
         elif opt == "bufsize":
@@ -178,6 +313,50 @@ wdir = ./
 # Number of concurrent benchmarking thread
 nthreads = 1
 
+# Execution engine of benchmarking threads
+#   thread: workers are threads of one process (default)
+#   process: workers are separate processes, free from interpreter lock
+engine = thread
+
+# Recording mode of system call latencies
+#   raw: keep elapsed time of every call (default)
+#   hist: keep constant-size latency histograms, report percentiles only
+record = raw
+
+# Bypass page cache by O_DIRECT in read, reread, write and rewrite
+# (Linux only), file size and block size must be multiples of the
+# logical block size of the device, operations fall back to buffered
+# I/O if the file system refuses O_DIRECT
+direct = False
+
+# Report calls/sec and bytes/sec of every thread and host every
+# progress seconds while running, e.g., progress = 10s, empty to disable
+# (in GXP mode the first host reports the sum of all hosts)
+progress =
+# Format of progress reports
+#   console: one line per report (default)
+#   json: one JSON object per line
+progress_format = console
+# File appended with progress reports, empty for standard error
+progress_file =
+
+# Record calls and bytes completed by every thread in buckets of
+# timeseries seconds, e.g., 100ms, empty to disable (default), buckets
+# with throughput below stall percent of the median are reported as
+# stalls, buckets of ramp-up (ramp_time) are left out
+timeseries =
+stall = 10
+
+# Directory where every host saves results with latencies of all calls
+# into fsbench-<hid>.db in GXP mode, indexed by table shards of
+# fsbench.db of the first host, which then gathers statistics of threads
+# only, empty to disable, per-directory statistics of shared_dirs need
+# latencies of all calls and are left out with shards
+shards =
+# zlib level (1-9) of compression of results sent between hosts, 0 to
+# disable
+compress = 1
+
 # Ask user whether to proceed on critical situations
 confirm = True
 
@@ -199,6 +378,19 @@ meta =
 # io = read,reread,write,rewrite,fread,freread,fwrite,frewrite
 io = 
 
+# Directory listing operations, each thread grows a directory through
+# dirsize entries and lists it by every operation at each size
+#   readdir: os.listdir()
+#   scandir: scandir() with entry types, needs Python 3.5+ or module scandir
+#   stat_all: os.listdir() and os.lstat() of every entry, i.e., "ls -l"
+# e.g.,
+# listing = readdir,scandir,stat_all
+listing =
+# Directory sizes in entries, e.g., 1K,10K,100K,1M,10M
+dirsize = 1K,10K
+# Listings of the directory at each size
+passes = 3
+
 # Overwrite following local settings
 override = True
 
@@ -206,11 +398,58 @@ override = True
 opcnt = 10
 factor = 16
 
+# Directory layout of metadata operations
+#   private: every thread works in a directory tree of its own (default)
+#   shared: threads of all hosts work in shared_dirs directories under
+#     wdir/paramark-shared to measure contention on directories, the
+#     report shows latency of each shared directory (recording mode raw),
+#     computed from sampled calls only if the operation sets sampling
+layout = private
+shared_dirs = 1
+# Placement of entries in shared directories
+#   rank: entry i of every thread goes to directory i % shared_dirs
+#   hash: directory is hashed from rank of thread and i
+placement = rank
+
+# Calls of mkdir, rmdir, access, stat_exist, utime, chmod and unlink
+# timed together by one pair of clock readings, for file systems fast
+# enough that timer and interpreter overhead of each call exceed the
+# call itself, every call of a batch is recorded with the batch average
+batch = 1
+# Time the calls of one batch in every batch_sample batches one by one
+# to keep per-call latency samples, 0 to time batches only, unlike
+# sampling of an operation, which drops calls from its latencies
+batch_sample = 0
+
 # File size and block size
 # e.g., fsize=1K,2M,3G, bsize=1KB,2mb,3gb
 fsize = 1M
 bsize = 1K
 
+# Requests in flight of read, reread, write and rewrite, e.g., 1,4,16,32
+# depth above 1 runs them by asynchronous engine of a thread pool, and
+# records submit-to-complete latency of each request; threads share the
+# interpreter lock between requests, so small requests served from page
+# cache run slower than with depth 1 (4K blocks: about a third), depth
+# pays off for devices or servers slower than that overhead
+iodepth = 1
+
+# Run each I/O operation for a duration instead of one pass of fsize,
+# e.g., runtime = 60s (ms, s, m and h are accepted), blocks are visited
+# again from the start until runtime is over, calls issued in ramp_time
+# are warm-up and excluded from results, metadata operations are not
+# affected and always make opcnt calls
+runtime =
+ramp_time =
+
+# Access patterns are set by "access_pattern" of each I/O operation
+# Seed of random and zipf offsets, random if not set, thread i uses seed+i
+seed =
+# Distance in blocks between accesses of stride pattern
+stride = 16
+# Exponent of zipf pattern, larger value concentrates on fewer blocks
+zipf_theta = 1.2
+
 # Report configuration
 
 ##########################################################################
@@ -222,7 +461,7 @@ bsize = 1K
 #
 # Options for flags
 # O_RDONLY, O_WRONLY, RDWR, O_APPEND, O_CREAT, O_EXCL
-# O_TRUNC or their inclusive OR
+# O_TRUNC, O_DIRECT or their inclusive OR
 #
 # Options for mode
 # S_ISUID, S_ISGID, S_ENFMT, S_ISVTX, S_IREAD,
@@ -235,60 +474,77 @@ bsize = 1K
 [mkdir]
 opcnt = 0
 factor = 16
+# Sampling of calls kept for latency distributions, exact count,
+# sum, min and max are kept for all calls (recording mode raw)
+#   empty: keep every call
+#   1/N: keep one in every N calls
+#   N: keep N calls picked uniformly at random (reservoir)
+sampling =
 
 [rmdir]
 opcnt = 0
 factor = 16
+sampling =
 
 [creat]
 opcnt = 0
 factor = 16
 flags = O_CREAT | O_WRONLY | O_TRUNC 
 mode = S_IRUSR | S_IWUSR
+sampling =
 
 [access]
 opcnt = 0
 # F_OK, R_OK, W_OK, X_OK or their inclusive OR
 factor = 16
 mode = F_OK
+sampling =
 
 [open]
 opcnt = 0
 factor = 16
 flags = O_RDONLY
 mode = S_IRUSR
+sampling =
 
 [open_close]
 opcnt = 0
 factor = 16
 flags = O_RDONLY
 mode = S_IRUSR
+sampling =
 
 [stat_exist]
 opcnt = 0
 factor = 16
+sampling =
 
 [stat_non]
 opcnt = 0
 factor = 16
+sampling =
 
 [utime]
 opcnt = 0
 factor = 16
 times =
+sampling =
 
 [chmod]
 opcnt = 0
 factor = 16
 mode = S_IEXEC
+sampling =
 
 [rename]
 opcnt = 0
 factor = 16
+sampling =
 
 [unlink]
 opcnt = 0
 factor = 16
+sampling =
 
 # I/O operation
 [read]
@@ -296,12 +552,21 @@ fsize = 0
 bsize = 0
 flags = O_RDONLY
 mode = S_IRUSR
+# Read into a reusable per-thread buffer instead of allocating
+# a new string per block
+readinto = True
+# Access pattern: seq, random, zipf, stride or reverse
+access_pattern = seq
+sampling =
 
 [reread]
 fsize = 0
 bsize = 0
 flags = O_RDONLY
 mode = S_IRUSR
+readinto = True
+access_pattern = seq
+sampling =
 
 [write]
 fsize = 0
@@ -309,6 +574,12 @@ bsize = 0
 flags = O_CREAT | O_RDWR
 mode = S_IRUSR | S_IWUSR
 fsync = False
+# Fill pattern of written blocks: char, zero or random
+# random defeats compressing and deduplicating file systems, its blocks
+# are stamped with a unique header before each write
+pattern = char
+access_pattern = seq
+sampling =
 
 [rewrite] 
 fsize = 0
@@ -316,6 +587,9 @@ bsize = 0
 flags = O_CREAT | O_RDWR
 mode = S_IRUSR | S_IWUSR
 fsync = False
+pattern = char
+access_pattern = seq
+sampling =
 
 [fread]
 fsize = 0
@@ -323,12 +597,18 @@ bsize = 0
 # 'r', 'w', 'a', 'b', '+', or their combinations
 mode = r
 bufsize = 
+readinto = True
+access_pattern = seq
+sampling =
 
 [freread]
 fsize = 0
 bsize = 0
 mode = r
 bufsize = 
+readinto = True
+access_pattern = seq
+sampling =
 
 [fwrite]
 fsize = 0
@@ -336,6 +616,9 @@ bsize = 0
 mode = w
 bufsize = 
 fsync = False
+pattern = char
+access_pattern = seq
+sampling =
 
 [frewrite]
 fsize = 0
@@ -343,4 +626,7 @@ bsize = 0
 mode = w
 bufsize =
 fsync = False
+pattern = char
+access_pattern = seq
+sampling =
 """
@@ -0,0 +1,264 @@
+#############################################################################
+# ParaMark: Benchmarking Suite for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#############################################################################
+
+# fs/progress.py
+# Live Progress Reporting and Throughput Time Series
+
+import sys
+import threading
+import multiprocessing
+import json
+from array import array
+
+from modules.common import *
+from modules.clock import clock
+
+__all__ = ['FORMATS', 'new_slots', 'Reporter', 'Timeline', 'rates',
+    'stalls']
+
+FORMATS = ["console", "json"]
+
+# Index of counters in slot of each worker
+CALLS = 0
+BYTES = 1
+
+def new_slots(n):
+    """
+    Return counters of n workers, each one written by its worker only,
+    thus without locks, and shared with worker processes
+    """
+    return [multiprocessing.RawArray('d', [0, 0]) for i in range(n)]
+
+def rates(times, vals, interval):
+    """
+    Return rate of each bucket of a time series, where times are bucket
+    ends and the first bucket spans interval, i.e., the empty bucket
+    marking start of a series of Timeline
+    """
+    res = []
+    prev = times[0] - interval
+    for t, v in zip(times, vals):
+        res.append(v / max(t - prev, 1e-9))
+        prev = t
+    return res
+
+def stalls(rates, threshold):
+    """
+    Return median rate and indices of buckets with rate below threshold
+    percent of median, the first and last buckets are the start marker
+    or partial and never taken as stalls
+    """
+    if len(rates) == 0: return 0.0, []
+    inner = rates[1:-1]
+    if len(inner) == 0: inner = rates
+    med = sorted(inner)[len(inner) // 2]
+    limit = med * threshold / 100.0
+    return med, [i for i in range(1, len(rates) - 1) if rates[i] < limit]
+
+class Reporter(threading.Thread):
+    """
+    Publish calls/sec and bytes/sec of every worker and of the host every
+    interval seconds, from counters bumped by elapsed time storage. In
+    GXP mode, hosts send their reports to all, the first host publishes
+    the sum over hosts.
+    """
+    def __init__(self, slots, interval, fmt="console", path=None, hid=0,
+        chan=None):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.slots = slots
+        self.interval = interval
+        self.fmt = fmt
+        self.path = path
+        self.hid = hid
+        self.chan = chan
+        self.stopped = threading.Event()
+        self.hosts = {}     # latest report of each host, GXP mode only
+        self.last = [(0.0, 0.0)] * len(slots)
+        self.f = None
+        if chan is not None: chan.on(chan.PROGRESS, self.remote)
+
+    def run(self):
+        self.start_time = timer()
+        self.prev = self.start_time
+        if self.path: self.f = open(self.path, "a")
+        else: self.f = sys.stderr
+        while not self.stopped.wait(self.interval):
+            self.report()
+        if self.path: self.f.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def sample(self):
+        """Return report of this host since the previous one"""
+        now = timer()
+        span = now - self.prev
+        self.prev = now
+        threads = []
+        for i, slot in enumerate(self.slots):
+            calls, nbytes = slot[CALLS], slot[BYTES]
+            pcalls, pbytes = self.last[i]
+            self.last[i] = (calls, nbytes)
+            threads.append([(calls - pcalls) / span, (nbytes - pbytes) / span])
+        return {"time": round(now - self.start_time, 3), "hid": self.hid,
+            "ops": sum([t[0] for t in threads]),
+            "bytes": sum([t[1] for t in threads]), "threads": threads}
+
+    def report(self):
+        rec = self.sample()
+        if self.chan is None:
+            self.publish(rec)
+            return
+        self.chan.send(self.chan.PROGRESS, json.dumps(rec))
+        if self.hid != 0: return
+        # Reports of this round arrive through the reader of GXP pipes,
+        # slower hosts are represented by their previous report
+        hosts = [self.hosts[h] for h in sorted(self.hosts.keys())]
+        if len(hosts) == 0: return
+        self.publish({"time": rec["time"], "hid": -1,
+            "ops": sum([h["ops"] for h in hosts]),
+            "bytes": sum([h["bytes"] for h in hosts]),
+            "hosts": [[h["hid"], h["ops"], h["bytes"]] for h in hosts]})
+
+    def remote(self, msg):
+        rec = json.loads(msg)
+        self.hosts[rec["hid"]] = rec
+
+    def publish(self, rec):
+        if self.fmt == "json":
+            self.f.write(json.dumps(rec) + "\n")
+        else:
+            if rec.has_key("hosts"):
+                parts = ["h%d %d ops/s %s" % (h, o, unit_str(b, "/s", 1))
+                    for h, o, b in rec["hosts"]]
+            else:
+                parts = ["t%d %d ops/s %s" % (i, o, unit_str(b, "/s", 1))
+                    for i, (o, b) in enumerate(rec["threads"])]
+            self.f.write("[%8.1fs] %d ops/s %s (%s)\n" % (rec["time"],
+                rec["ops"], unit_str(rec["bytes"], "/s", 1),
+                ", ".join(parts)))
+        self.f.flush()
+
+class Timeline(threading.Thread):
+    """
+    Time series of calls and bytes of each operation of one worker, in
+    buckets ending every interval seconds from epoch, the start of run,
+    so that buckets of workers of a host are aligned. The worker flushes
+    the series when an operation begins and ends, so that calls are
+    charged to the operation making them, calls of ramp-up are left out.
+    """
+    def __init__(self, slot, interval, epoch):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self.slot = slot
+        self.interval = interval
+        self.epoch = epoch
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.series = {}
+        self.last = (0.0, 0.0)
+        self.prev = 0.0     # end of the last bucket
+        self.oper = -1      # running operation, -1 between operations
+        self.ramp = 0       # clock value when ramp-up of oper ends
+        self.deadline = None    # clock value when a duration run ends
+
+    def run(self):
+        k = 1
+        while not self.stopped.wait(
+            max(0, self.epoch + k * self.interval - timer())):
+            self.flush(k * self.interval)
+            k = int((timer() - self.epoch) / self.interval) + 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def begin(self, i, ramp=0, deadline=None):
+        """
+        Charge calls from now on to operation i, until end(), calls
+        are recorded between clock values ramp and deadline
+        """
+        self.lock.acquire()
+        try:
+            self.flush_locked(None)
+            self.oper = i
+            self.ramp = ramp
+            self.deadline = deadline
+        finally: self.lock.release()
+
+    def end(self):
+        self.lock.acquire()
+        try:
+            self.flush_locked(None)
+            self.oper = -1
+        finally: self.lock.release()
+
+    def flush(self, t):
+        self.lock.acquire()
+        try: self.flush_locked(t)
+        finally: self.lock.release()
+
+    def flush_locked(self, t):
+        """
+        Close the bucket of the running operation at tick t, or now at
+        a boundary of operation if t is None
+        """
+        boundary = t is None
+        if boundary: t = timer() - self.epoch
+        # Calls of a tick close to the previous flush, e.g., a late tick
+        # past a boundary, are left to the next tick
+        elif t - self.prev < self.interval / 2: return
+        now = clock()
+        if self.oper >= 0 and self.deadline is not None and \
+            now > self.deadline:
+            # Calls in flight at the end of a duration run complete past
+            # it, the last bucket is closed by end() at the deadline
+            if not boundary: return
+            t -= (now - self.deadline) / 1e9
+        start, self.prev = self.prev, t
+        calls, nbytes = self.slot[CALLS], self.slot[BYTES]
+        pcalls, pbytes = self.last
+        self.last = (calls, nbytes)
+        if self.oper < 0: return
+        if now < self.ramp:
+            # The first bucket starts when ramp-up ends
+            self.prev = t + (self.ramp - now) / 1e9
+            return
+        # Empty buckets at boundaries carry no time of the operation
+        if boundary and calls == pcalls: return
+        if not self.series.has_key(self.oper):
+            # Series starts with an empty bucket marking its start, so
+            # that every bucket spans from the end of the previous one
+            self.series[self.oper] = (array('d', [start]), array('d', [0]),
+                array('d', [0]))
+        times, c, b = self.series[self.oper]
+        times.append(t)
+        c.append(calls - pcalls)
+        b.append(nbytes - pbytes)
+
+    def get(self, i):
+        """
+        Return time series of operation i, times are bucket ends in
+        seconds from start of run
+        """
+        if not self.series.has_key(i): return None
+        times, calls, nbytes = self.series[i]
+        return {"interval": self.interval, "time": times, "calls": calls,
+            "bytes": nbytes}
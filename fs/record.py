@@ -0,0 +1,212 @@
+#############################################################################
+# ParaMark: Benchmarking Suite for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#############################################################################
+
+# fs/record.py
+# Per-Call Measurement Recording
+
+import random
+import threading
+from array import array
+
+from modules.hist import Histogram
+from modules import clock
+
+__all__ = ['ElapsedArray', 'ElapsedHistogram', 'ElapsedSample',
+    'new_elapsed', 'add_control', 'parse_sampling']
+
+MODES = ["raw", "hist"]
+
+# Elapsed times are recorded in integer nanoseconds of modules.clock
+if array('l').itemsize >= 8: NS_TYPECODE = 'l'
+else: NS_TYPECODE = 'd'
+
+# Recording mode, set from configuration before loads are generated
+#   raw: keep elapsed time of every call
+#   hist: keep a constant-size latency histogram per operation
+mode = "raw"
+
+# Progress counters of the calling worker, taken by storage it creates,
+# see fs/progress.py
+#   slot: [calls, bytes] shared with the progress reporter
+#   unit: bytes moved by each data call of the running operation
+current = threading.local()
+
+def parse_sampling(val):
+    """
+    Return sampling of calls expressed by val, None to keep every call,
+    ("every", N) for "1/N", i.e., one in every N calls, or
+    ("reservoir", N) for "N", i.e., N calls picked uniformly at random
+    """
+    val = val.strip()
+    if val == "": return None
+    if val.startswith("1/"): kind, n = "every", int(val[2:])
+    else: kind, n = "reservoir", int(val)
+    if n < 1: raise ValueError(val)
+    if kind == "every" and n == 1: return None
+    return kind, n
+
+def new_elapsed(size=0, sampling=None):
+    """
+    Return elapsed time storage for size calls in current recording mode,
+    calls are sampled in mode raw if sampling is given
+    """
+    if mode == "hist": e = ElapsedHistogram()
+    elif sampling is not None: e = ElapsedSample(sampling)
+    else: e = ElapsedArray(size)
+    e.slot = getattr(current, "slot", None)
+    e.unit = getattr(current, "unit", 0)
+    return e
+
+def add_control(elapsed, e):
+    """
+    Record elapsed time e of a call moving no data, i.e., open(), close()
+    or fsync() of I/O primitives, in elapsed without counting bytes
+    """
+    unit = elapsed.unit
+    elapsed.unit = 0
+    elapsed.add(e)
+    elapsed.unit = unit
+
+class ElapsedArray:
+    """
+    Elapsed nanoseconds of each call kept in a typed array,
+    preallocated to the number of calls expected by the primitive
+    """
+    TYPECODE = NS_TYPECODE
+    slot = None
+    unit = 0
+
+    def __init__(self, size=0):
+        self.buf = array(self.TYPECODE, [0]) * size
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def add(self, e):
+        try: self.buf[self.n] = e
+        except IndexError: self.buf.append(e)
+        self.n += 1
+        slot = self.slot
+        if slot is not None:
+            slot[0] += 1
+            slot[1] += self.unit
+
+    def get(self):
+        """Return recorded samples in seconds, clock overhead subtracted"""
+        return clock.corrected_array(self.buf, self.n)
+
+class ElapsedHistogram(Histogram):
+    """
+    Elapsed time of calls kept in a histogram, the first and last calls
+    (i.e., open() and close() of I/O primitives) are also kept exactly
+    """
+    slot = None
+    unit = 0
+
+    def __init__(self, size=0):
+        Histogram.__init__(self)
+        self.first = None
+        self.last = None
+
+    def add(self, e):
+        e = clock.corrected(e)
+        self.record(e)
+        if self.first is None: self.first = e
+        self.last = e
+        slot = self.slot
+        if slot is not None:
+            slot[0] += 1
+            slot[1] += self.unit
+
+    def inner(self):
+        """Return histogram without the first and last calls"""
+        h = self.copy()
+        if self.count > 0: h.discard(self.first)
+        if self.count > 1: h.discard(self.last)
+        return h
+
+    def get(self):
+        # Shared counters are not part of results
+        self.slot = None
+        return self
+
+class ElapsedSample:
+    """
+    Exact count, sum, min and max of elapsed time of all calls, with
+    only sampled calls kept for distributions, either one in every N
+    calls or a uniform reservoir of N calls
+    """
+    slot = None
+    unit = 0
+
+    def __init__(self, sampling):
+        self.kind, self.n = sampling
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.first = None
+        self.last = None
+        self.samples = array('d')
+        self.calls = array('l')     # call index of each sample
+
+    def __len__(self):
+        return self.count
+
+    def add(self, e):
+        e = clock.corrected(e)
+        i = self.count
+        self.count += 1
+        self.sum += e
+        if e < self.min: self.min = e
+        if e > self.max: self.max = e
+        if self.first is None: self.first = e
+        self.last = e
+        if self.kind == "every":
+            if i % self.n == 0:
+                self.samples.append(e)
+                self.calls.append(i)
+        elif i < self.n:
+            self.samples.append(e)
+            self.calls.append(i)
+        else:
+            j = random.randint(0, i)
+            if j < self.n:
+                self.samples[j] = e
+                self.calls[j] = i
+        slot = self.slot
+        if slot is not None:
+            slot[0] += 1
+            slot[1] += self.unit
+
+    def points(self):
+        """Return samples in order of calls"""
+        return array('d', [e for _, e in sorted(zip(self.calls,
+            self.samples))])
+
+    def inner(self):
+        """Return samples in order of calls without the first and last"""
+        last = self.count - 1
+        return array('d', [e for i, e in sorted(zip(self.calls,
+            self.samples)) if i != 0 and i != last])
+
+    def get(self):
+        # Shared counters are not part of results
+        self.slot = None
+        return self
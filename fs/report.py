@@ -35,7 +35,8 @@ import modules.DHTML as DHTML
 import modules.num as num
 import bench
 import data
-from oper import TYPE_META, TYPE_IO, OPS_META, OPS_IO
+import progress
+from oper import TYPE_META, TYPE_IO, OPS_META, OPS_IO, OPS_LIST
 
 LOGSCALE_THRESHOLD = 1000
 
@@ -82,6 +83,14 @@ class Report():
               (time.strftime("%a %b %d %Y %H:%M:%S %Z",
                time.localtime(eval(runtime["end"])))),
               (eval(runtime["end"]) - eval(runtime["start"])))))
+        if runtime.has_key("clock"):
+            res.append(("Timer", "%s (overhead %s ns, resolution %s ns)"
+                % (runtime["clock"], runtime["clock_overhead"],
+                   runtime["clock_resolution"])))
+        if runtime.has_key("direct"):
+            res.append(("Direct I/O", runtime["direct"]))
+        if runtime.has_key("duration"):
+            res.append(("Duration", runtime["duration"]))
         res.append(("User", "%s (%s)" % (runtime["user"], runtime["uid"])))
         res.append(("Command", "%s" % runtime["cmdline"]))
         if not self.cfg.nolog:
@@ -91,11 +100,17 @@ class Report():
 
     def meta_thread_vals(self, oper, hid, unit='auto', figure=False):
         rows = []
-        for hid,pid,tid,opcnt,factor,elapsed,_,agg, \
+        # Latencies are loaded only to be drawn
+        cols = "hid,pid,tid,opcnt,factor,%s,agg,opavg,opmin,opmax,opstd" \
+            % (figure and "elapsed" or "NULL")
+        for hid,pid,tid,opcnt,factor,elapsed,agg, \
             opavg,opmin,opmax,opstd in \
-            self.db.select_rawdata_all(oper):
-            if figure:
-                opdist = map(lambda e:1/e, elapsed)
+            self.db.select_rawdata_cols(oper, cols, hid):
+            # elapsed is not kept in recording mode "hist"
+            if figure and elapsed is None:
+                opdist_figname = elapsed_figname = accagg_figname = None
+            elif figure:
+                opdist = num.reciprocal(elapsed)
                 opdist_figname = "opdist_%s_%d_%d_%d_%d_%d.png" % \
                     (oper, hid, pid, tid, opcnt, factor)
                 self.gplot.impulse_chart(data=opdist,
@@ -148,111 +163,87 @@ class Report():
 
     def meta_host_vals(self, oper, hid, unit='auto', figure=False):
         rows = []
-        res = Table()
-        for _,_,tid,opcnt,factor,_,synctime,agg,_,_,_,_ in \
-            self.db.select_rawdata_hid(oper, hid):
-            r = res.get(opcnt, factor)
-            if r is None:
-                thdaggs = []
-                syncs = []
-            else: thdaggs, syncs = r
-            thdaggs.append(agg)
-            syncs.append(synctime)
-            res.set(opcnt, factor, (thdaggs, syncs))
-
-        for oc in res.get_rows():
-            for ft in res.get_cols():
-                thdaggs, syncs = res.get(oc, ft)
-                agg = oc * len(thdaggs) / num.average(syncs)
-                thdavg = num.average(thdaggs)
-                thdmin = num.min(thdaggs)
-                thdmax = num.max(thdaggs)
-                thdstd = num.std(thdaggs)
-                
-                # figure generation
-                if figure:
-                    thddist_figname = "thddist_%s_%d_%d_%d.png" % \
-                        (oper, hid, oc, ft)
-                    self.gplot.impulse_chart(data=thdaggs,
-                        name=thddist_figname,
-                        title="Distribution of Per-Thread Throughput",
-                        xlabel="Thread", 
-                        ylabel="%s Throughput (ops/sec)" % oper,
-                        xmin=-1, xmax=len(thdaggs))
-
-                if unit == 'auto': 
-                    agg = "%s ops/s" % round(agg, 3)
-                    thdavg = "%s ops/s" % round(thdavg, 3)
-                    thdmin = "%s ops/s" % round(thdmin, 3)
-                    thdmax = "%s ops/s" % round(thdmax, 3)
-                    thdstd = "%s ops/s" % round(thdstd, 3)
-                
-                row = [oper,hid,oc,ft,agg,thdavg,thdmin,thdmax,thdstd]
-                if figure: row.append(thddist_figname)
-                rows.append(row)
+        for r in self.db.select_thread_stats(oper, ["opcnt", "factor"],
+            hid=hid, values=figure):
+            oc, ft, nthreads, sync, _, thdavg, thdmin, thdmax, \
+                thdstd = r[:9]
+            if figure: thdaggs = r[9]
+            agg = oc * nthreads / sync
+            
+            # figure generation
+            if figure:
+                thddist_figname = "thddist_%s_%d_%d_%d.png" % \
+                    (oper, hid, oc, ft)
+                self.gplot.impulse_chart(data=thdaggs,
+                    name=thddist_figname,
+                    title="Distribution of Per-Thread Throughput",
+                    xlabel="Thread", 
+                    ylabel="%s Throughput (ops/sec)" % oper,
+                    xmin=-1, xmax=len(thdaggs))
+
+            if unit == 'auto': 
+                agg = "%s ops/s" % round(agg, 3)
+                thdavg = "%s ops/s" % round(thdavg, 3)
+                thdmin = "%s ops/s" % round(thdmin, 3)
+                thdmax = "%s ops/s" % round(thdmax, 3)
+                thdstd = "%s ops/s" % round(thdstd, 3)
+            
+            row = [oper,hid,oc,ft,agg,thdavg,thdmin,thdmax,thdstd]
+            if figure: row.append(thddist_figname)
+            rows.append(row)
 
         return rows
 
     def meta_all_vals(self, oper, unit='auto', figure=False):
         rows = []
-        res = Table()
-        for _,_,tid,opcnt,factor,_,synctime,agg,_,_,_,_ in \
-            self.db.select_rawdata_all(oper):
-            r = res.get(opcnt, factor)
-            if r is None:
-                thdaggs = []
-                syncs = []
-            else: thdaggs, syncs = r
-            thdaggs.append(agg)
-            syncs.append(synctime)
-            res.set(opcnt, factor, (thdaggs, syncs))
-
-        for oc in res.get_rows():
-            for ft in res.get_cols():
-                thdaggs, syncs = res.get(oc, ft)
-                agg = oc * len(thdaggs) / num.average(syncs)
-                thdavg = num.average(thdaggs)
-                thdmin = num.min(thdaggs)
-                thdmax = num.max(thdaggs)
-                thdstd = num.std(thdaggs)
-                
-                # figure generation
-                if figure:
-                    thddist_figname = "thddist_%s_all_%d_%d.png" % \
-                        (oper, oc, ft)
-                    self.gplot.impulse_chart(data=thdaggs,
-                        name=thddist_figname,
-                        title="Distribution of Per-Thread Throughput",
-                        xlabel="Thread", 
-                        ylabel="%s Throughput (ops/sec)" % oper,
-                        xmin=-1, xmax=len(thdaggs))
-                
-                if unit == 'auto':
-                    agg = "%s ops/s" % round(agg, 3)
-                    thdavg = "%s ops/s" % round(thdavg, 3)
-                    thdmin = "%s ops/s" % round(thdmin, 3)
-                    thdmax = "%s ops/s" % round(thdmax, 3)
-                    thdstd = "%s ops/s" % round(thdstd, 3)
-                
-                row = [oper,oc,ft,agg,thdavg,thdmin,thdmax,thdstd]
-                if figure: row.append(thddist_figname)
-                rows.append(row)
+        for r in self.db.select_thread_stats(oper, ["opcnt", "factor"],
+            values=figure):
+            oc, ft, nthreads, sync, _, thdavg, thdmin, thdmax, \
+                thdstd = r[:9]
+            if figure: thdaggs = r[9]
+            agg = oc * nthreads / sync
+            
+            # figure generation
+            if figure:
+                thddist_figname = "thddist_%s_all_%d_%d.png" % \
+                    (oper, oc, ft)
+                self.gplot.impulse_chart(data=thdaggs,
+                    name=thddist_figname,
+                    title="Distribution of Per-Thread Throughput",
+                    xlabel="Thread", 
+                    ylabel="%s Throughput (ops/sec)" % oper,
+                    xmin=-1, xmax=len(thdaggs))
+            
+            if unit == 'auto':
+                agg = "%s ops/s" % round(agg, 3)
+                thdavg = "%s ops/s" % round(thdavg, 3)
+                thdmin = "%s ops/s" % round(thdmin, 3)
+                thdmax = "%s ops/s" % round(thdmax, 3)
+                thdstd = "%s ops/s" % round(thdstd, 3)
+            
+            row = [oper,oc,ft,agg,thdavg,thdmin,thdmax,thdstd]
+            if figure: row.append(thddist_figname)
+            rows.append(row)
 
         return rows
         
     def io_thread_vals(self, oper, hid, unit='auto', figure=False):
         rows = []
         unit_suffix = "/s"
-        for _,pid,tid,fsize,bsize,elapsed,_,agg,aggnoclose, \
-            opavg,opmin,opmax,opstd in \
-            self.db.select_rawdata_hid(oper, hid):
+        cols = "pid,tid,fsize,bsize,%s,agg,aggnoclose,opavg,opmin," \
+            "opmax,opstd,iodepth" % (figure and "elapsed" or "NULL")
+        for pid,tid,fsize,bsize,elapsed,agg,aggnoclose, \
+            opavg,opmin,opmax,opstd,iodepth in \
+            self.db.select_rawdata_cols(oper, cols, hid):
             # figure generation
-            if figure:
+            if figure and elapsed is None:
+                opdist_figname = elapsed_figname = accagg_figname = None
+            elif figure:
                 if unit == 'auto':
                     op_unit, op_unit_val = unit_size(opavg)
-                opdist = map(lambda e:bsize/e/op_unit_val, elapsed[1:-1])
-                opdist_figname = "opdist_%s_%s_%s_%s_%s_%s.png" % \
-                    (oper, hid, pid, tid, fsize, bsize)
+                opdist = num.reciprocal(elapsed[1:-1], bsize / op_unit_val)
+                opdist_figname = "opdist_%s_%s_%s_%s_%s_%s_%s.png" % \
+                    (oper, hid, pid, tid, fsize, bsize, iodepth)
                 self.gplot.impulse_chart(data=opdist, 
                     name=opdist_figname,
                     title="Distribution of Per-Operation Throughput",
@@ -265,8 +256,8 @@ class Report():
                 if num.max(elapsed) / num.min(elapsed) > \
                     LOGSCALE_THRESHOLD:
                     ylog = True
-                elapsed_figname = "elapsed_%s_%s_%s_%s_%s_%s.png" % \
-                    (oper, hid, pid, tid, fsize, bsize)
+                elapsed_figname = "elapsed_%s_%s_%s_%s_%s_%s_%s.png" % \
+                    (oper, hid, pid, tid, fsize, bsize, iodepth)
                 self.gplot.impulse_chart(
                     data=map(lambda e:e/elap_unit_val, elapsed), 
                     name=elapsed_figname,
@@ -278,8 +269,8 @@ class Report():
                 if unit == 'auto':
                     accagg_unit, accagg_unit_val = unit_size(agg)
 
-                accagg_figname = "accagg_%s_%s_%s_%s_%s_%s.png" % \
-                    (oper, hid, pid, tid, fsize, bsize)
+                accagg_figname = "accagg_%s_%s_%s_%s_%s_%s_%s.png" % \
+                    (oper, hid, pid, tid, fsize, bsize, iodepth)
                 t_bytes = 0
                 t_elapsed = elapsed[0]
                 accagg = [0.0] # open()
@@ -307,11 +298,11 @@ class Report():
                 opstd = unit_str(opstd, unit_suffix)
             
             if figure:
-                rows.append([oper,hid,tid,fsize,bsize,agg,aggnoclose,
+                rows.append([oper,hid,tid,fsize,bsize,iodepth,agg,aggnoclose,
                     opavg,opmin,opmax,opstd,
                     opdist_figname,elapsed_figname,accagg_figname])
             else:
-                rows.append([oper,hid,tid,fsize,bsize,agg,aggnoclose,
+                rows.append([oper,hid,tid,fsize,bsize,iodepth,agg,aggnoclose,
                     opavg,opmin,opmax,opstd])
 
         return rows
@@ -319,112 +310,245 @@ class Report():
     def io_host_vals(self, oper, hid, unit='auto', figure=False):
         unit_suffix = "/s"
         rows = []
-        res = Table()
-        for _,_,tid,fsize,bsize,_,synctime,agg,_,_,_,_,_ in \
-            self.db.select_rawdata_hid(oper, hid):
-            r = res.get(fsize, bsize)
-            if r is None:
-                thdaggs = []
-                syncs = []
-            else: thdaggs, syncs = r
-            thdaggs.append(agg)
-            syncs.append(synctime)
-            res.set(fsize, bsize, (thdaggs, syncs))
-
-        for fs in res.get_rows():
-            for bs in res.get_cols():
-                thdaggs, syncs = res.get(fs, bs)
-                agg = fs * len(thdaggs) / num.average(syncs)
-                thdavg = num.average(thdaggs)
-                thdmin = num.min(thdaggs)
-                thdmax = num.max(thdaggs)
-                thdstd = num.std(thdaggs)
-                
-                # figure generation
-                if figure:
-                    thd_unit, thd_unit_val = unit_size(thdavg)
-                    thddist = map(lambda t:t/thd_unit_val, thdaggs)
-                    thddist_figname = "thddist_%s_%d_%d_%d.png" % \
-                        (oper, hid, fs, bs)
-                    self.gplot.impulse_chart(data=thddist,
-                        name=thddist_figname,
-                        title="Distribution of Per-Thread Throughput",
-                        xlabel="Thread", 
-                        ylabel="%s Throughput (%s/sec)" \
-                            % (oper, thd_unit),
-                        xmin=-1, xmax=len(thdaggs))
-
-                # unit conversion
-                if unit == 'auto':
-                    fs = unit_str(fs)
-                    bs = unit_str(bs)
-                    agg = unit_str(agg, unit_suffix)
-                    thdavg = unit_str(thdavg, unit_suffix)
-                    thdmin = unit_str(thdmin, unit_suffix)
-                    thdmax = unit_str(thdmax, unit_suffix)
-                    thdstd = unit_str(thdstd, unit_suffix)
-                
-                row = [oper,hid,fs,bs,agg,thdavg,thdmin,thdmax,thdstd]
-                if figure: row.append(thddist_figname)
-                rows.append(row)
+        for r in self.db.select_thread_stats(oper,
+            ["fsize", "bsize", "iodepth"], "bytes", hid=hid, values=figure):
+            # fs is converted to string below
+            fs, bs, qd, _, sync, nbytes, thdavg, thdmin, thdmax, \
+                thdstd = r[:10]
+            if figure: thdaggs = r[10]
+            agg = nbytes / sync
+            
+            # figure generation
+            if figure:
+                thd_unit, thd_unit_val = unit_size(thdavg)
+                thddist = map(lambda t:t/thd_unit_val, thdaggs)
+                thddist_figname = "thddist_%s_%d_%d_%d_%d.png" % \
+                    (oper, hid, fs, bs, qd)
+                self.gplot.impulse_chart(data=thddist,
+                    name=thddist_figname,
+                    title="Distribution of Per-Thread Throughput",
+                    xlabel="Thread", 
+                    ylabel="%s Throughput (%s/sec)" \
+                        % (oper, thd_unit),
+                    xmin=-1, xmax=len(thdaggs))
+
+            # unit conversion
+            if unit == 'auto':
+                fs = unit_str(fs)
+                bs = unit_str(bs)
+                agg = unit_str(agg, unit_suffix)
+                thdavg = unit_str(thdavg, unit_suffix)
+                thdmin = unit_str(thdmin, unit_suffix)
+                thdmax = unit_str(thdmax, unit_suffix)
+                thdstd = unit_str(thdstd, unit_suffix)
+            
+            row = [oper,hid,fs,bs,qd,agg,thdavg,thdmin,thdmax,thdstd]
+            if figure: row.append(thddist_figname)
+            rows.append(row)
         
         return rows
     
     def io_all_vals(self, oper, unit='auto', figure=False):
         unit_suffix = "/s"
         rows = []
-        res = Table()
-        for _,_,tid,fsize,bsize,_,synctime,agg,_,_,_,_,_ in \
-            self.db.select_rawdata_all(oper):
-            r = res.get(fsize, bsize)
-            if r is None:
-                thdaggs = []
-                syncs = []
-            else: thdaggs, syncs = r
-            thdaggs.append(agg)
-            syncs.append(synctime)
-            res.set(fsize, bsize, (thdaggs, syncs))
-
-        for fs in res.get_rows():
-            for bs in res.get_cols():
-                thdaggs, syncs = res.get(fs, bs)
-                agg = fs * len(thdaggs) / num.average(syncs)
-                thdavg = num.average(thdaggs)
-                thdmin = num.min(thdaggs)
-                thdmax = num.max(thdaggs)
-                thdstd = num.std(thdaggs)
-                
-                # figure generation
-                if unit == 'auto':
-                    thd_unit, thd_unit_val = unit_size(thdavg)
-                
-                if figure:
-                    thddist = map(lambda t:t/thd_unit_val, thdaggs)
-                    thddist_figname = "thddist_%s_all_%d_%d.png" % \
-                        (oper, fs, bs)
-                    self.gplot.impulse_chart(data=thddist,
-                        name=thddist_figname,
-                        title="Distribution of Per-Thread Throughput",
-                        xlabel="Thread", 
-                        ylabel="%s Throughput (%s/sec)" % (oper, thd_unit),
-                        xmin=-1, xmax=len(thdaggs))
-
-                # unit conversion
-                if unit == 'auto':
-                    fs = unit_str(fs)
-                    bs = unit_str(bs)
-                    agg = unit_str(agg, unit_suffix)
-                    thdavg = unit_str(thdavg, unit_suffix)
-                    thdmin = unit_str(thdmin, unit_suffix)
-                    thdmax = unit_str(thdmax, unit_suffix)
-                    thdstd = unit_str(thdstd, unit_suffix)
-                
-                row = [oper,fs,bs,agg,thdavg,thdmin,thdmax,thdstd]
-                if figure: row.append(thddist_figname)
-                rows.append(row)
+        for r in self.db.select_thread_stats(oper,
+            ["fsize", "bsize", "iodepth"], "bytes", values=figure):
+            # fs is converted to string below
+            fs, bs, qd, _, sync, nbytes, thdavg, thdmin, thdmax, \
+                thdstd = r[:10]
+            if figure: thdaggs = r[10]
+            agg = nbytes / sync
+            
+            # figure generation
+            if unit == 'auto':
+                thd_unit, thd_unit_val = unit_size(thdavg)
+            
+            if figure:
+                thddist = map(lambda t:t/thd_unit_val, thdaggs)
+                thddist_figname = "thddist_%s_all_%d_%d_%d.png" % \
+                    (oper, fs, bs, qd)
+                self.gplot.impulse_chart(data=thddist,
+                    name=thddist_figname,
+                    title="Distribution of Per-Thread Throughput",
+                    xlabel="Thread", 
+                    ylabel="%s Throughput (%s/sec)" % (oper, thd_unit),
+                    xmin=-1, xmax=len(thdaggs))
+
+            # unit conversion
+            if unit == 'auto':
+                fs = unit_str(fs)
+                bs = unit_str(bs)
+                agg = unit_str(agg, unit_suffix)
+                thdavg = unit_str(thdavg, unit_suffix)
+                thdmin = unit_str(thdmin, unit_suffix)
+                thdmax = unit_str(thdmax, unit_suffix)
+                thdstd = unit_str(thdstd, unit_suffix)
+            
+            row = [oper,fs,bs,qd,agg,thdavg,thdmin,thdmax,thdstd]
+            if figure: row.append(thddist_figname)
+            rows.append(row)
     
         return rows
                 
+    def iodepth_vals(self, oper):
+        """
+        Return (fsize, bsize, [(iodepth, agg), ...]) of overall throughput
+        swept over more than one queue depth
+        """
+        res = {}
+        for row in self.io_all_vals(oper, None):
+            res.setdefault((row[1], row[2]), []).append((row[3], row[4]))
+        return [(fs, bs, sorted(points)) for (fs, bs), points in
+            sorted(res.items()) if len(points) > 1]
+
+    def hist_opers(self, opers):
+        """Return operations having latency histograms"""
+        tables = self.db.get_tables()
+        return [o for o in opers if "%s_hist" % o in tables]
+
+    def meta_hist_vals(self, oper, unit='auto'):
+        rows = []
+        for hid,tid,opcnt,factor,count,p50,p99,p999,pmax in \
+            sorted(self.db.select_rawdata_cols("%s_hist" % oper,
+                "hid,tid,opcnt,factor,count,p50,p99,p999,max")):
+            if unit == 'auto':
+                if hid == -1: hid = "all"
+                if tid == -1: tid = "all"
+                p50 = time_str(p50)
+                p99 = time_str(p99)
+                p999 = time_str(p999)
+                pmax = time_str(pmax)
+            rows.append([oper,hid,tid,opcnt,factor,count,p50,p99,p999,pmax])
+        return rows
+
+    def dirs_opers(self, opers):
+        """Return operations run in shared directories"""
+        tables = self.db.get_tables()
+        return [o for o in opers if "%s_dirs" % o in tables]
+
+    def meta_dirs_vals(self, oper, unit='auto'):
+        rows = []
+        for opcnt,factor,d,count,threads,avg,std,p99,pmax in \
+            sorted(self.db.select_rawdata_cols("%s_dirs" % oper,
+                "opcnt,factor,dir,count,threads,avg,std,p99,max")):
+            if unit == 'auto':
+                avg = time_str(avg)
+                std = time_str(std)
+                p99 = time_str(p99)
+                pmax = time_str(pmax)
+            rows.append([oper,opcnt,factor,d,count,threads,avg,std,p99,
+                pmax])
+        return rows
+
+    def list_vals(self, oper, unit='auto'):
+        """
+        Return per-entry listing cost and aggregated entries/sec of each
+        directory size over all threads, scale is the per-entry cost
+        relative to that of the smallest directory
+        """
+        res = {}
+        for entries,agg,costavg,costmin,costmax in \
+            self.db.select_rawdata_cols(oper,
+                "entries,agg,costavg,costmin,costmax"):
+            res.setdefault(entries, []).append((agg,costavg,costmin,costmax))
+        rows = []
+        base = None
+        for entries in sorted(res.keys()):
+            aggs, avgs, mins, maxs = zip(*res[entries])
+            agg = num.sum(aggs)
+            costavg = num.average(avgs)
+            costmin = num.min(mins)
+            costmax = num.max(maxs)
+            if base is None: base = costavg
+            scale = costavg / base
+            if unit == 'auto':
+                agg = "%.2f" % agg
+                costavg = time_str(costavg)
+                costmin = time_str(costmin)
+                costmax = time_str(costmax)
+                scale = "%.2f" % scale
+            rows.append([oper,entries,len(aggs),agg,costavg,costmin,costmax,
+                scale])
+        return rows
+
+    def ts_opers(self, opers):
+        """Return operations having throughput time series"""
+        tables = self.db.get_tables()
+        return [o for o in opers if "%s_ts" % o in tables]
+
+    def meta_ts_vals(self, oper, unit='auto', figure=False):
+        rows = []
+        for hid,pid,tid,opcnt,factor,interval,times,calls,med,stalls, \
+            stalled in sorted(self.db.select_rawdata_cols("%s_ts" % oper,
+                "hid,pid,tid,opcnt,factor,interval,time,calls,median,"
+                "stalls,stalled")):
+            if figure:
+                ts_figname = "ts_%s_%d_%d_%d_%d_%d.png" % \
+                    (oper, hid, pid, tid, opcnt, factor)
+                self.gplot.line_chart(xdata=times,
+                    ydata=progress.rates(times, calls, interval),
+                    name=ts_figname,
+                    title="Throughput over Time",
+                    xlabel="Time (seconds)",
+                    ylabel="%s throughput (ops/sec)" % oper)
+            if unit == 'auto':
+                if hid == -1: hid = "all"
+                if tid == -1: tid = "all"
+                med = "%s ops/s" % round(med, 3)
+                stalled = time_str(stalled)
+            row = [oper,hid,tid,opcnt,factor,len(times),med,stalls,stalled]
+            if figure: row.append(ts_figname)
+            rows.append(row)
+        return rows
+
+    def io_ts_vals(self, oper, unit='auto', figure=False):
+        rows = []
+        for hid,pid,tid,fsize,bsize,iodepth,interval,times,nbytes,med, \
+            stalls,stalled in sorted(self.db.select_rawdata_cols(
+                "%s_ts" % oper, "hid,pid,tid,fsize,bsize,iodepth,interval,"
+                "time,bytes,median,stalls,stalled")):
+            if figure:
+                ts_unit, ts_unit_val = unit_size(med)
+                ts_figname = "ts_%s_%d_%d_%d_%d_%d_%d.png" % \
+                    (oper, hid, pid, tid, fsize, bsize, iodepth)
+                self.gplot.line_chart(xdata=times,
+                    ydata=map(lambda r:r/ts_unit_val,
+                        progress.rates(times, nbytes, interval)),
+                    name=ts_figname,
+                    title="Throughput over Time",
+                    xlabel="Time (seconds)",
+                    ylabel="%s throughput (%s/sec)" % (oper, ts_unit))
+            if unit == 'auto':
+                if hid == -1: hid = "all"
+                if tid == -1: tid = "all"
+                fsize = unit_str(fsize)
+                bsize = unit_str(bsize)
+                med = unit_str(med, "/s")
+                stalled = time_str(stalled)
+            row = [oper,hid,tid,fsize,bsize,iodepth,len(times),med,stalls,
+                stalled]
+            if figure: row.append(ts_figname)
+            rows.append(row)
+        return rows
+
+    def io_hist_vals(self, oper, unit='auto'):
+        rows = []
+        for hid,tid,fsize,bsize,iodepth,count,p50,p99,p999,pmax in \
+            sorted(self.db.select_rawdata_cols("%s_hist" % oper,
+                "hid,tid,fsize,bsize,iodepth,count,p50,p99,p999,max")):
+            if unit == 'auto':
+                if hid == -1: hid = "all"
+                if tid == -1: tid = "all"
+                fsize = unit_str(fsize)
+                bsize = unit_str(bsize)
+                p50 = time_str(p50)
+                p99 = time_str(p99)
+                p999 = time_str(p999)
+                pmax = time_str(pmax)
+            rows.append([oper,hid,tid,fsize,bsize,iodepth,count,p50,p99,p999,
+                pmax])
+        return rows
+
 class TextReport(Report):
     def __init__(self, datadir, db, cfg):
         Report.__init__(self, datadir, db, cfg)
@@ -453,6 +577,39 @@ class TextReport(Report):
         if len(hids) > 1: self.meta_host_report(opers, hids)
         if len(hids) >= 1 or len(tids) > 1:
             self.meta_thread_report(opers, hids)
+        if len(self.hist_opers(opers)) > 0:
+            self.meta_hist_report(self.hist_opers(opers))
+        if len(self.dirs_opers(opers)) > 0:
+            self.meta_dirs_report(self.dirs_opers(opers))
+        if len(self.ts_opers(opers)) > 0:
+            self.meta_ts_report(self.ts_opers(opers))
+        self.f.flush()
+
+    def meta_ts_report(self, opers):
+        self.f.write("Meta:Throughput Stalls\n")
+        rows = [["oper", "hid", "tid", "opcnt", "factor", "buckets",
+            "median", "stalls", "stalled"]]
+        for oper in opers: rows.extend(self.meta_ts_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
+        self.f.flush()
+
+    def meta_dirs_report(self, opers):
+        self.f.write("Meta:Per-Directory Contention\n")
+        rows = [["oper", "opcnt", "factor", "dir", "count", "threads",
+            "avg", "std", "p99", "max"]]
+        for oper in opers: rows.extend(self.meta_dirs_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
+        self.f.flush()
+
+    def meta_hist_report(self, opers):
+        self.f.write("Meta:Latency Percentiles\n")
+        rows = [["oper", "hid", "tid", "opcnt", "factor", "count",
+            "p50", "p99", "p99.9", "max"]]
+        for oper in opers: rows.extend(self.meta_hist_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
         self.f.flush()
 
     def meta_thread_report(self, opers, hids):
@@ -497,11 +654,33 @@ class TextReport(Report):
         if len(hids) > 1: self.io_host_report(opers, hids)
         if len(hids) >= 1 or len(tids) > 1:
             self.io_thread_report(opers, hids)
+        if len(self.hist_opers(opers)) > 0:
+            self.io_hist_report(self.hist_opers(opers))
+        if len(self.ts_opers(opers)) > 0:
+            self.io_ts_report(self.ts_opers(opers))
+        self.f.flush()
+
+    def io_ts_report(self, opers):
+        self.f.write("IO:Throughput Stalls\n")
+        rows = [["oper", "hid", "tid", "fsize", "bsize", "qd", "buckets",
+            "median", "stalls", "stalled"]]
+        for oper in opers: rows.extend(self.io_ts_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
+        self.f.flush()
+
+    def io_hist_report(self, opers):
+        self.f.write("IO:Latency Percentiles\n")
+        rows = [["oper", "hid", "tid", "fsize", "bsize", "qd", "count",
+            "p50", "p99", "p99.9", "max"]]
+        for oper in opers: rows.extend(self.io_hist_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
         self.f.flush()
 
     def io_thread_report(self, opers, hids):
         self.f.write("IO:Per-Thread Performance\n")
-        rows = [["oper", "hid", "tid", "fsize", "bsize", "agg", 
+        rows = [["oper", "hid", "tid", "fsize", "bsize", "qd", "agg", 
             "agg w/o close()", "opAvg", "opMin", "opMax", "opStd"]]
         for oper in opers:
             for hid in hids: rows.extend(self.io_thread_vals(oper, hid))
@@ -511,8 +690,8 @@ class TextReport(Report):
     
     def io_host_report(self, opers, hids):
         self.f.write("IO:Per-Host Performance\n")
-        rows = [["oper", "hid", "fsize", "bsize", "agg", "thdAvg", "thdMin", 
-            "thdMax", "thdStd"]]
+        rows = [["oper", "hid", "fsize", "bsize", "qd", "agg", "thdAvg",
+            "thdMin", "thdMax", "thdStd"]]
         for oper in opers:
             for hid in hids: rows.extend(self.io_host_vals(oper, hid))
         print_text_table(self.f, rows)
@@ -521,13 +700,26 @@ class TextReport(Report):
 
     def io_all_report(self, opers):
         self.f.write("IO:Overall Performance\n")
-        rows = [["oper", "fsize", "bsize", "agg", "thdAvg", "thdMin",
+        rows = [["oper", "fsize", "bsize", "qd", "agg", "thdAvg", "thdMin",
             "thdMax", "thdStd"]]
         for oper in opers: rows.extend(self.io_all_vals(oper))
         print_text_table(self.f, rows)
         self.f.write("\n")
         self.f.flush()
     
+    def list_section(self):
+        opers = sorted(list_intersect([OPS_LIST, self.db.get_tables()]),
+            key=lambda t:OPS_LIST.index(t))
+        if len(opers) == 0: return
+        verbose(" writing \"Directory Listing Section\" ...", VERBOSE_MORE)
+        self.f.write("# Directory Listing Scaling\n")
+        rows = [["oper", "entries", "threads", "entries/s", "costAvg",
+            "costMin", "costMax", "scale"]]
+        for oper in opers: rows.extend(self.list_vals(oper))
+        print_text_table(self.f, rows)
+        self.f.write("\n")
+        self.f.flush()
+
     def write(self):
         self.start = timer2()
         if self.cfg.textreport and self.cfg.nolog: # Quick report
@@ -540,6 +732,7 @@ class TextReport(Report):
         self.runtime_section()
         self.meta_section()
         self.io_section()
+        self.list_section()
         
         if self.cfg.textreport and self.cfg.nolog:
             self.f.flush()
@@ -550,14 +743,6 @@ class TextReport(Report):
 class HTMLReport(Report):
     def __init__(self, datadir, db, cfg):
         Report.__init__(self, datadir, db, cfg)
-        try:
-            import modules.plot as plot
-            self.gplot = plot.GnuPlot(self.fdir)
-        except ImportError:
-            message(
-"""Failed to generate HTML report, try "-r" with "--text-report" or "--csv-report",
-see "-h" for details.""")
-            sys.exit(1)
         
         # Load configurations from default to user specified
         cfg = ConfigParser.ConfigParser()
@@ -570,7 +755,7 @@ see "-h" for details.""")
             fp.write(PARAMARK_DEFAULT_REPORT_CONFIG_STRING)
             fp.close()
         else:
-            cfg.read("%s/report.conf")
+            cfg.read("%s/report.conf" % self.datadir)
         
         # Convert configs to options for convenience
         self.opts ={}
@@ -585,6 +770,17 @@ see "-h" for details.""")
             for k, v in cfg.items(section):
                 self.opts[section][k] = eval(v)
 
+        try:
+            import modules.plot as plot
+            self.gplot = plot.GnuPlot(self.fdir,
+                self.opts["html"].get("figcache", True),
+                self.opts["html"].get("plotjobs", 0))
+        except ImportError:
+            message(
+"""Failed to generate HTML report, try "-r" with "--text-report" or "--csv-report",
+see "-h" for details.""")
+            sys.exit(1)
+
         # HTML default settings
         self.MAIN_FILE = "report.html"
         self.CSS_FILE = "report.css"
@@ -623,6 +819,7 @@ see "-h" for details.""")
         self.runtime_section(doc, body)
         self.meta_section(doc, body)
         self.io_section(doc, body)
+        self.list_section(doc, body)
         self.footnote_section(doc, body)
 
     def runtime_section(self, doc, body):
@@ -666,11 +863,65 @@ see "-h" for details.""")
             self.io_host_report(opers, hids, doc, body)
         if len(hids) >= 1 or len(tids) > 1:
             self.io_thread_report(opers, hids, doc, body)
+        qdopers = [o for o in opers if len(self.iodepth_vals(o)) > 0]
+        if len(qdopers) > 0:
+            self.io_iodepth_report(qdopers, doc, body)
+        if len(self.hist_opers(opers)) > 0:
+            self.io_hist_report(self.hist_opers(opers), doc, body)
+        if len(self.ts_opers(opers)) > 0:
+            self.io_ts_report(self.ts_opers(opers), doc, body)
+
+    def io_ts_report(self, opers, doc, body):
+        verbose(" writing I/O throughput over time report ...", VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE, "Throughput over Time"))
+        tHead = [["oper", "hid", "tid", "fsize", "bsize", "qd", "buckets",
+            "median", "stalls", "stalled", "timeline"]]
+        rows = []
+        for oper in opers:
+            for res in self.io_ts_vals(oper, 'auto', True):
+                figlink = "figures/%s" % res[-1]
+                res[-1] = doc.HREF(doc.IMG(figlink,
+                    attrs={"class":"thumbnail"}), figlink)
+                rows.append(res)
+        body.appendChild(doc.table(tHead, rows))
+
+    def io_iodepth_report(self, opers, doc, body):
+        verbose(" writing I/O queue depth report ...", VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE,
+            "Throughput vs. Queue Depth"))
+        tHead = [["oper", "fsize", "bsize", "qdAgg"]]
+        rows = []
+        for oper in opers:
+            for fs, bs, points in self.iodepth_vals(oper):
+                agg_unit, agg_unit_val = unit_size(max([a for _,a in points]))
+                figname = "qdagg_%s_%d_%d.png" % (oper, fs, bs)
+                self.gplot.line_chart(
+                    xdata=[qd for qd,_ in points],
+                    ydata=[a/agg_unit_val for _,a in points],
+                    name=figname,
+                    title="Aggregated Throughput vs. Queue Depth",
+                    xlabel="Queue depth",
+                    ylabel="%s Throughput (%s/sec)" % (oper, agg_unit),
+                    xlog=True)
+                figlink = "figures/%s" % figname
+                rows.append([oper, unit_str(fs), unit_str(bs),
+                    doc.HREF(doc.IMG(figlink, attrs={"class":"thumbnail"}),
+                        figlink)])
+        body.appendChild(doc.table(tHead, rows))
+
+    def io_hist_report(self, opers, doc, body):
+        verbose(" writing I/O latency percentiles report ...", VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE, "Latency Percentiles"))
+        tHead = [["oper", "hid", "tid", "fsize", "bsize", "qd", "count",
+            "p50", "p99", "p99.9", "max"]]
+        rows = []
+        for oper in opers: rows.extend(self.io_hist_vals(oper))
+        body.appendChild(doc.table(tHead, rows))
             
     def io_thread_report(self, opers, hids, doc, body):
         body.appendChild(doc.H(self.SUBSECTION_SIZE, 
             "Per-Thread Performance"))
-        tHead = [["oper", "hid", "tid", "fsize", "bsize", "agg", 
+        tHead = [["oper", "hid", "tid", "fsize", "bsize", "qd", "agg", 
             "agg w/o close()", "opAvg", "opMin", "opMax", "opStd", 
             "opDist", "elasped", "accAgg"]]
         rows = []
@@ -678,6 +929,9 @@ see "-h" for details.""")
             for hid in hids:
                 for res in self.io_thread_vals(oper, hid, 'auto', True):
                     for i in range(-3,0):
+                        if res[i] is None:
+                            res[i] = "-"
+                            continue
                         figlink = "figures/%s" % res[i]
                         res[i] = doc.HREF(doc.IMG(figlink,
                             attrs={"class":"thumbnail"}), figlink)
@@ -688,7 +942,7 @@ see "-h" for details.""")
         verbose(" writing I/O host performance report ...", VERBOSE_ALL)
         body.appendChild(doc.H(self.SUBSECTION_SIZE, 
             "Per-Host Performance"))
-        tHead = [["oper", "hid", "fsize", "bsize", "agg", \
+        tHead = [["oper", "hid", "fsize", "bsize", "qd", "agg", \
             "thdAvg", "thdMin", "thdMax", "thdStd", "thdDist"]]
         rows = []
         for oper in opers:
@@ -704,7 +958,7 @@ see "-h" for details.""")
         verbose(" writing I/O overall performance report ...", VERBOSE_ALL)
         body.appendChild(doc.H(self.SUBSECTION_SIZE, 
             "Overall Performance"))
-        tHead = [["oper", "fsize", "bsize", "agg", "thdAvg", "thdMin", \
+        tHead = [["oper", "fsize", "bsize", "qd", "agg", "thdAvg", "thdMin", \
             "thdMax", "thdStd", "thdDist"]]
         rows = []
         for oper in opers:
@@ -732,6 +986,48 @@ see "-h" for details.""")
         if len(hids) > 1: self.meta_host_report(opers, hids, doc, body)
         if len(hids) >= 1 or len(tids) > 1:
             self.meta_thread_report(opers, hids, doc, body)
+        if len(self.hist_opers(opers)) > 0:
+            self.meta_hist_report(self.hist_opers(opers), doc, body)
+        if len(self.dirs_opers(opers)) > 0:
+            self.meta_dirs_report(self.dirs_opers(opers), doc, body)
+        if len(self.ts_opers(opers)) > 0:
+            self.meta_ts_report(self.ts_opers(opers), doc, body)
+
+    def meta_ts_report(self, opers, doc, body):
+        verbose(" writing metadata throughput over time report ...",
+            VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE, "Throughput over Time"))
+        tHead = [["oper", "hid", "tid", "opcnt", "factor", "buckets",
+            "median", "stalls", "stalled", "timeline"]]
+        rows = []
+        for oper in opers:
+            for res in self.meta_ts_vals(oper, 'auto', True):
+                figlink = "figures/%s" % res[-1]
+                res[-1] = doc.HREF(doc.IMG(figlink,
+                    attrs={"class":"thumbnail"}), figlink)
+                rows.append(res)
+        body.appendChild(doc.table(tHead, rows))
+
+    def meta_dirs_report(self, opers, doc, body):
+        verbose(" writing metadata per-directory contention report ...",
+            VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE,
+            "Per-Directory Contention"))
+        tHead = [["oper", "opcnt", "factor", "dir", "count", "threads",
+            "avg", "std", "p99", "max"]]
+        rows = []
+        for oper in opers: rows.extend(self.meta_dirs_vals(oper))
+        body.appendChild(doc.table(tHead, rows))
+
+    def meta_hist_report(self, opers, doc, body):
+        verbose(" writing metadata latency percentiles report ...",
+            VERBOSE_ALL)
+        body.appendChild(doc.H(self.SUBSECTION_SIZE, "Latency Percentiles"))
+        tHead = [["oper", "hid", "tid", "opcnt", "factor", "count",
+            "p50", "p99", "p99.9", "max"]]
+        rows = []
+        for oper in opers: rows.extend(self.meta_hist_vals(oper))
+        body.appendChild(doc.table(tHead, rows))
     
     def meta_thread_report(self, opers, hids, doc, body):
         body.appendChild(doc.H(self.SUBSECTION_SIZE, 
@@ -743,6 +1039,9 @@ see "-h" for details.""")
             for hid in hids:
                 for res in self.meta_thread_vals(oper, hid, 'auto', True):
                     for i in range(-3,0):
+                        if res[i] is None:
+                            res[i] = "-"
+                            continue
                         figlink = "figures/%s" % res[i]
                         res[i] = doc.HREF(doc.IMG(figlink,
                             attrs={"class":"thumbnail"}), figlink)
@@ -782,6 +1081,39 @@ see "-h" for details.""")
                 rows.append(res)
         body.appendChild(doc.table(tHead, rows))
 
+    def list_section(self, doc, body):
+        opers = sorted(list_intersect([OPS_LIST, self.db.get_tables()]),
+            key=lambda t:OPS_LIST.index(t))
+        if len(opers) == 0: return
+        verbose(" writing \"Directory Listing Section\" ...", VERBOSE_MORE)
+        body.appendChild(doc.H(self.SECTION_SIZE,
+            "Directory Listing Scaling"))
+        tHead = [["oper", "entries", "threads", "entries/s", "costAvg",
+            "costMin", "costMax", "scale"]]
+        rows = []
+        for oper in opers: rows.extend(self.list_vals(oper))
+        body.appendChild(doc.table(tHead, rows))
+
+        tHead = [["oper", "costDist"]]
+        rows = []
+        for oper in opers:
+            points = [(r[1], r[4]) for r in self.list_vals(oper, None)]
+            if len(points) < 2: continue
+            cost_unit, cost_unit_val = unit_time(max([c for _,c in points]))
+            figname = "listcost_%s.png" % oper
+            self.gplot.line_chart(
+                xdata=[e for e,_ in points],
+                ydata=[c/cost_unit_val for _,c in points],
+                name=figname,
+                title="Per-Entry Cost vs. Directory Size",
+                xlabel="Entries in directory",
+                ylabel="%s cost per entry (%s)" % (oper, cost_unit),
+                xlog=True)
+            figlink = "figures/%s" % figname
+            rows.append([oper, doc.HREF(doc.IMG(figlink,
+                attrs={"class":"thumbnail"}), figlink)])
+        if len(rows) > 0: body.appendChild(doc.table(tHead, rows))
+
     def css_file(self):
         verbose(" saving css style file to %s/%s ..." % 
             (self.rdir, self.CSS_FILE))
@@ -794,6 +1126,7 @@ see "-h" for details.""")
         message("Generating HTML report to %s ... " % self.rdir)
         self.main_page()
         self.css_file()
+        self.gplot.wait()
         message("Done!")
 
 class CSVReport(Report):
@@ -823,7 +1156,46 @@ class CSVReport(Report):
         if len(hids) > 1: self.meta_host_report(opers, hids)
         if len(hids) >= 1 or len(tids) > 1:
             self.meta_thread_report(opers, hids)
+        if len(self.hist_opers(opers)) > 0:
+            self.meta_hist_report(self.hist_opers(opers))
+        if len(self.dirs_opers(opers)) > 0:
+            self.meta_dirs_report(self.dirs_opers(opers))
+        if len(self.ts_opers(opers)) > 0:
+            self.meta_ts_report(self.ts_opers(opers))
     
+    def meta_ts_report(self, opers):
+        verbose(" writing metadata throughput stalls csv report ...",
+            VERBOSE_ALL)
+        f = open("%s/meta_ts.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "hid", "tid", "opcnt", "factor", "buckets",
+            "median", "stalls", "stalled"])
+        for oper in opers:
+            csvw.writerows(self.meta_ts_vals(oper, None))
+        f.close()
+
+    def meta_dirs_report(self, opers):
+        verbose(" writing metadata per-directory contention csv report ...",
+            VERBOSE_ALL)
+        f = open("%s/meta_dirs.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "opcnt", "factor", "dir", "count", "threads",
+            "avg", "std", "p99", "max"])
+        for oper in opers:
+            csvw.writerows(self.meta_dirs_vals(oper, None))
+        f.close()
+
+    def meta_hist_report(self, opers):
+        verbose(" writing metadata latency percentiles csv report ...",
+            VERBOSE_ALL)
+        f = open("%s/meta_hist.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "hid", "tid", "opcnt", "factor", "count",
+            "p50", "p99", "p99.9", "max"])
+        for oper in opers:
+            csvw.writerows(self.meta_hist_vals(oper, None))
+        f.close()
+
     def meta_thread_report(self, opers, hids):
         verbose(" writing metadata per-thread csv report ...", VERBOSE_ALL)
         f = open("%s/meta_thread.csv" % self.ddir, "wb")
@@ -868,12 +1240,37 @@ class CSVReport(Report):
         if len(hids) > 1: self.io_host_report(opers, hids)
         if len(hids) >= 1 or len(tids) > 1:
             self.io_thread_report(opers, hids)
+        if len(self.hist_opers(opers)) > 0:
+            self.io_hist_report(self.hist_opers(opers))
+        if len(self.ts_opers(opers)) > 0:
+            self.io_ts_report(self.ts_opers(opers))
     
+    def io_ts_report(self, opers):
+        verbose(" writing I/O throughput stalls csv report ...", VERBOSE_ALL)
+        f = open("%s/io_ts.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "hid", "tid", "fsize", "bsize", "qd",
+            "buckets", "median", "stalls", "stalled"])
+        for oper in opers:
+            csvw.writerows(self.io_ts_vals(oper, None))
+        f.close()
+
+    def io_hist_report(self, opers):
+        verbose(" writing I/O latency percentiles csv report ...",
+            VERBOSE_ALL)
+        f = open("%s/io_hist.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "hid", "tid", "fsize", "bsize", "qd", "count",
+            "p50", "p99", "p99.9", "max"])
+        for oper in opers:
+            csvw.writerows(self.io_hist_vals(oper, None))
+        f.close()
+
     def io_thread_report(self, opers, hids):
         verbose(" writing I/O per-thread csv report ...", VERBOSE_ALL)
         f = open("%s/io_thread.csv" % self.ddir, "wb")
         csvw = csv.writer(f)
-        csvw.writerow(["oper", "hid", "tid", "fsize", "bsize", "agg", 
+        csvw.writerow(["oper", "hid", "tid", "fsize", "bsize", "qd", "agg", 
             "agg w/o close()", "opAvg", "opMin", "opMax", "opStd"])
         for oper in opers:
             for hid in hids:
@@ -884,7 +1281,7 @@ class CSVReport(Report):
         verbose(" writing I/O per-host csv report ...", VERBOSE_ALL)
         f = open("%s/io_host.csv" % self.ddir, "wb")
         csvw = csv.writer(f)
-        csvw.writerow(["oper", "hid", "fsize", "bsize", "agg", "thdAvg", 
+        csvw.writerow(["oper", "hid", "fsize", "bsize", "qd", "agg", "thdAvg", 
             "thdMin", "thdMax", "thdStd"])
         for oper in opers:
             for hid in hids:
@@ -895,17 +1292,31 @@ class CSVReport(Report):
         verbose(" writing I/O overall csv report ...", VERBOSE_ALL)
         f = open("%s/io_overall.csv" % self.ddir, "wb")
         csvw = csv.writer(f)
-        csvw.writerow(["oper", "fsize", "bsize", "agg", "thdAvg", "thdMin",
-            "thdMax", "thdStd"])
+        csvw.writerow(["oper", "fsize", "bsize", "qd", "agg", "thdAvg",
+            "thdMin", "thdMax", "thdStd"])
         for oper in opers:
             csvw.writerows((self.io_all_vals(oper, None)))
         f.close()
 
+    def list_report(self):
+        opers = sorted(list_intersect([OPS_LIST, self.db.get_tables()]),
+            key=lambda t:OPS_LIST.index(t))
+        if len(opers) == 0: return
+        verbose(" writing directory listing csv report ...", VERBOSE_MORE)
+        f = open("%s/list_scaling.csv" % self.ddir, "wb")
+        csvw = csv.writer(f)
+        csvw.writerow(["oper", "entries", "threads", "entries/s", "costAvg",
+            "costMin", "costMax", "scale"])
+        for oper in opers:
+            csvw.writerows(self.list_vals(oper, None))
+        f.close()
+
     def write(self):
         message("Generating CSV report to %s ... " % self.ddir)
         self.runtime_report()
         self.meta_report()
         self.io_report()
+        self.list_report()
         message("Done!")
 
 ##########################################################################
@@ -925,6 +1336,11 @@ format = 'html'
 # plot tools, 'gchar', 'gnuplot', or 'matplotlib'
 plot = 'gnuplot'
 imageformat = 'png'
+# skip figures whose data and chart parameters are unchanged since they
+# were drawn
+figcache = True
+# number of gnuplot processes drawing figures, 0 for one per CPU
+plotjobs = 0
 """
 
 # Be careful about browser compatibility!
@@ -0,0 +1,140 @@
+#############################################################################
+# ParaMark: A Benchmark for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+# Distributed under GNU General Public Licence version 3
+#############################################################################
+
+#
+# modules/bufpool.py
+# Page-aligned I/O buffers shared by benchmark workers
+#
+
+import os
+import mmap
+import struct
+import threading
+
+__all__ = ["PATTERNS", "blocks", "addresses", "stamper", "readbuf"]
+
+# Fill patterns of write buffers
+#   char: repeated character given by the primitive
+#   zero: all zero bytes
+#   random: random bytes, incompressible, blocks taken from rotating
+#           windows over a wider span, each stamped with a unique header
+#           before written so that no two written blocks are equal
+PATTERNS = ["char", "zero", "random"]
+
+RANDOM_SPAN = 1048576
+RANDOM_STEP = 4093      # prime, so windows do not fall on block boundaries
+ALIGN = mmap.PAGESIZE   # alignment of direct I/O buffers
+MAX_VIEWS = 1024
+HEADER = struct.Struct("<8sQ")  # random nonce of writer, block number
+
+def view(buf, offset, size):
+    """Return a zero-copy view of size bytes of buf from offset"""
+    try:
+        return memoryview(buf)[offset:offset + size]
+    except TypeError:   # Python 2 mmap only has the old buffer interface
+        return buffer(buf, offset, size)
+
+class BufferPool:
+    """
+    Anonymous mmap buffers, which are page-aligned, keyed by size and fill
+    pattern. Write buffers of char and zero patterns are never modified
+    after filling, thus are shared by all operations and threads of a
+    process. Random write buffers are stamped before each write and read
+    buffers are written into, thus both are private to each thread and
+    reused by all its operations.
+    """
+    def __init__(self):
+        self.bufs = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get(self, size, pattern="char", char='0'):
+        if pattern == "random": return self.get_private(size, pattern)
+        if pattern != "char": char = None
+        key = (size, pattern, char)
+        self.lock.acquire()
+        try:
+            if not self.bufs.has_key(key):
+                self.bufs[key] = self.fill(mmap.mmap(-1, size), pattern, char)
+            return self.bufs[key]
+        finally:
+            self.lock.release()
+
+    def get_private(self, size, pattern="zero"):
+        """Return a writable buffer of size bytes of calling thread"""
+        try: bufs = self.local.bufs
+        except AttributeError: bufs = self.local.bufs = {}
+        key = (size, pattern)
+        if not bufs.has_key(key):
+            bufs[key] = self.fill(mmap.mmap(-1, size), pattern, None)
+        return bufs[key]
+
+    def fill(self, buf, pattern, char):
+        size = len(buf)
+        chunk = 1048576
+        buf.seek(0)
+        if pattern == "random":
+            while buf.tell() < size:
+                buf.write(os.urandom(min(chunk, size - buf.tell())))
+        elif pattern == "zero":
+            pass    # anonymous mapping is zero-filled
+        else:
+            buf.write(char * size)
+        return buf
+
+pool = BufferPool()
+
+def windows(size, pattern="char", char='0', count=1, aligned=False):
+    """
+    Return buffer and offsets of windows of size bytes to write, cycled
+    through by primitives for count writes, windows start at ALIGN
+    boundaries if aligned is set, as required by direct I/O
+    """
+    if pattern != "random":
+        return pool.get(size, pattern, char), [0]
+    step = RANDOM_STEP
+    if aligned: step = (step + ALIGN - 1) // ALIGN * ALIGN
+    buf = pool.get(size + RANDOM_SPAN, pattern)
+    return buf, [(i * step) % RANDOM_SPAN
+        for i in range(max(1, min(count, MAX_VIEWS)))]
+
+def blocks(size, pattern="char", char='0', count=1, aligned=False):
+    """Return a list of views of windows(), see windows()"""
+    buf, offsets = windows(size, pattern, char, count, aligned)
+    return [view(buf, off, size) for off in offsets]
+
+def stamper(size, pattern="char", count=1, aligned=False):
+    """
+    Return a function stamping the window of windows() that the i-th
+    write is taken from with block number n, as stamp(i, n), before it is
+    written, or None if pattern needs no stamps. Headers carry a random
+    nonce of each call, thus blocks differ across files and writers.
+    Windows are private to calling thread, stamp from the writing thread.
+    """
+    if pattern != "random": return None
+    buf, offsets = windows(size, pattern, None, count, aligned)
+    nonce = os.urandom(8)
+    pack = HEADER.pack
+    n = len(offsets)
+    def stamp(i, blk):
+        off = offsets[i % n]
+        buf[off:off + HEADER.size] = pack(nonce, blk)
+    return stamp
+
+def address(buf):
+    """Return memory address of a pool buffer, for calls through ctypes"""
+    import ctypes
+    return ctypes.addressof(ctypes.c_char.from_buffer(buf))
+
+def addresses(size, pattern="char", char='0', count=1, aligned=False):
+    """Return a list of memory addresses of windows(), see windows()"""
+    buf, offsets = windows(size, pattern, char, count, aligned)
+    base = address(buf)
+    return [base + off for off in offsets]
+
+def readbuf(size):
+    """Return a reusable buffer of size bytes to read into"""
+    return pool.get_private(size)
@@ -0,0 +1,125 @@
+#############################################################################
+# ParaMark: A Benchmark for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+# Distributed under GNU General Public Licence version 3
+#############################################################################
+
+#
+# modules/clock.py
+# Monotonic nanosecond clock for latency measurement
+#
+
+import sys
+import time
+from array import array
+
+import num
+
+__all__ = ["clock", "calibrate", "corrected", "corrected_array", "share"]
+
+CLOCK_MONOTONIC_RAW = 4     # Linux <time.h>
+
+def _ctypes_clock():
+    """Return clock_gettime(CLOCK_MONOTONIC_RAW) through ctypes, or None"""
+    if not sys.platform.startswith("linux"): return None
+    try:
+        import ctypes
+        import ctypes.util
+        libname = ctypes.util.find_library("rt") or \
+            ctypes.util.find_library("c")
+        # Called holding the interpreter lock, so that no other thread
+        # writes the shared timespec before it is read in one slice
+        clock_gettime = ctypes.PyDLL(libname).clock_gettime
+    except (ImportError, OSError, AttributeError):
+        return None
+    ts = (ctypes.c_long * 2)()     # tv_sec, tv_nsec
+    ref = ctypes.byref(ts)
+
+    def clock():
+        clock_gettime(CLOCK_MONOTONIC_RAW, ref)
+        sec, nsec = ts[:]
+        return sec * 1000000000 + nsec
+
+    if clock_gettime(CLOCK_MONOTONIC_RAW, ref) != 0: return None
+    return clock
+
+def _time_clock():
+    return int(time.time() * 1e9)
+
+def _measure(clock, n):
+    """
+    Return overhead and resolution of clock() by n back-to-back calls,
+    the median interval is taken as overhead
+    """
+    deltas = []
+    for i in xrange(n):
+        s = clock()
+        deltas.append(clock() - s)
+    deltas.sort()
+    nonzero = [d for d in deltas if d > 0]
+    if len(nonzero) > 0: return deltas[n // 2], nonzero[0]
+    return deltas[n // 2], 1
+
+# Pick the finest monotonic clock, all return integer nanoseconds
+if hasattr(time, "perf_counter_ns"):
+    clock = time.perf_counter_ns
+    name = "perf_counter_ns"
+elif hasattr(time, "clock_gettime_ns") and \
+    hasattr(time, "CLOCK_MONOTONIC_RAW"):
+    clock = lambda: time.clock_gettime_ns(time.CLOCK_MONOTONIC_RAW)
+    name = "clock_gettime_ns(CLOCK_MONOTONIC_RAW)"
+else:
+    clock = _ctypes_clock()
+    name = "clock_gettime(CLOCK_MONOTONIC_RAW)"
+    # A call through ctypes may cost more than time.time() is coarse
+    if clock is None or \
+        max(_measure(_time_clock, 2000)) < max(_measure(clock, 2000)):
+        clock = _time_clock
+        name = "time.time"
+
+# Calibrated by calibrate()
+overhead = 0    # nanoseconds spent in clock() between two readings
+resolution = 1  # nanoseconds, smallest non-zero interval observed
+
+def calibrate(n=10000):
+    """
+    Measure overhead and resolution of clock() by n back-to-back calls,
+    the median interval is taken as overhead
+    """
+    global overhead, resolution
+    overhead, resolution = _measure(clock, n)
+    return overhead, resolution
+
+def corrected(ns):
+    """
+    Return seconds of elapsed ns with clock overhead subtracted, never
+    below clock resolution, the shortest time the clock can tell
+    """
+    ns -= overhead
+    if ns < resolution: ns = resolution
+    return ns * 1e-9
+
+def corrected_array(a, n):
+    """
+    Return array of seconds of the first n elapsed ns of typed array a,
+    corrected as by corrected() in bulk, with NumPy if available
+    """
+    if num.HAVE_NUMPY and n > 0:
+        x = num.numpy.frombuffer(a, dtype=a.typecode)[:n]
+        x = num.numpy.maximum(x - overhead, resolution) * 1e-9
+        return num.num_frombuffer(x.tostring())
+    ov = overhead
+    lo = ov + resolution
+    floor = resolution * 1e-9
+    return array('d', [(e - ov) * 1e-9 if e >= lo else floor
+        for e in a[:n]])
+
+def share(ns, k):
+    """
+    Return elapsed ns of each of k calls timed by one pair of clock()
+    readings, so that corrected() of the k shares subtracts overhead
+    only once in total
+    """
+    ns -= overhead
+    if ns < 0: ns = 0
+    return overhead + ns // k
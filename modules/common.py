@@ -72,6 +72,26 @@ def parse_datasize(size):
     if size.endswith('M'): return eval(size[0:-1]) * MB
     if size.endswith('G'): return eval(size[0:-1]) * GB
 
+def parse_count(count):
+    """
+    Return the number expressed by count string with decimal unit,
+    e.g., 1K, 10M
+    """
+    count = count.upper()
+    for unit, val in [('K', 1000), ('M', 1000000), ('G', 1000000000)]:
+        if count.endswith(unit): return int(float(count[0:-1]) * val)
+    return int(count)
+
+def parse_timespan(span):
+    """
+    Return the time span in seconds expressed by span string,
+    e.g., 500ms, 60s, 2m, 1h, seconds if no unit is given
+    """
+    span = span.lower()
+    for unit, secs in [("ms", MSECS), ("s", SECS), ("m", 60), ("h", 3600)]:
+        if span.endswith(unit): return float(span[0:-len(unit)]) * secs
+    return float(span)
+
 def unit_str(size, suffix="", rnd=3):
     """
     Given the size in bytes, return a string with unit.
@@ -83,6 +103,13 @@ def unit_str(size, suffix="", rnd=3):
     else: unit = "TB"
     return "%s %s%s" % (round(float(size)/eval(unit), rnd), unit, suffix)
 
+def time_str(secs, rnd=3):
+    """
+    Given the time in seconds, return a string with unit.
+    """
+    unit, unit_val = unit_time(secs)
+    return "%s %s" % (round(float(secs)/unit_val, rnd), unit)
+
 def unit_size(size):
     """
     Given the size in bytes, 
@@ -237,6 +264,25 @@ def get_filesystem_info(path):
     
     return mountfs
 
+def get_logical_blocksize(path):
+    """
+    Return logical block size of the device holding path, which direct
+    I/O must be aligned to, 512 if not known (e.g., network file systems)
+    """
+    if sys.platform.startswith("linux"):
+        dev = os.stat(path).st_dev
+        sysdir = "/sys/dev/block/%d:%d" % (os.major(dev), os.minor(dev))
+        # A partition keeps queue attributes in its parent device
+        for d in [sysdir, sysdir + "/.."]:
+            try:
+                fp = open(d + "/queue/logical_block_size", "r")
+                size = int(fp.read().strip())
+                fp.close()
+                return size
+            except (IOError, ValueError):
+                continue
+    return 512
+
 # Pretty Print
 def print_text_table(fstream, table, space=2):
     col_max = []
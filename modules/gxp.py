@@ -13,6 +13,14 @@ import sys
 import os
 import socket
 import fcntl
+import struct
+import zlib
+import array
+import cPickle
+import cStringIO
+import threading
+import multiprocessing
+import Queue
 
 def ws(s):
     sys.stdout.write(s)
@@ -79,3 +87,155 @@ def receive(rp):
     msg = rp.read()
     assert msg != ""
     return msg.strip()
+
+# Frame of channel: tag, flags, destination rank (-1 for all) and length
+# of payload following it
+FRAME = struct.Struct("!cBiI")
+# Payload of objects: byte order of arrays, length of pickle and number
+# of arrays, followed by the pickle and each array, a typecode and
+# length header followed by its raw bytes
+OBJECT = struct.Struct("!cII")
+ARRAY = struct.Struct("!cI")
+BYTEORDER = {"little": "<", "big": ">"}[sys.byteorder]
+
+def pack(obj):
+    """
+    Return obj serialized by binary pickle, with typed arrays it refers to
+    appended as raw bytes instead of pickled element by element
+    """
+    arrays = []
+    def persistent_id(o):
+        if type(o) is array.array:
+            arrays.append(o)
+            return str(len(arrays) - 1)
+        return None
+    f = cStringIO.StringIO()
+    p = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+    p.persistent_id = persistent_id
+    p.dump(obj)
+    body = f.getvalue()
+    parts = [OBJECT.pack(BYTEORDER, len(body), len(arrays)), body]
+    for a in arrays:
+        s = a.tostring()
+        parts.append(ARRAY.pack(a.typecode, len(s)))
+        parts.append(s)
+    return "".join(parts)
+
+def unpack(s):
+    order, size, n = OBJECT.unpack_from(s, 0)
+    off = OBJECT.size
+    body = s[off:off + size]
+    off += size
+    arrays = []
+    for i in range(n):
+        typecode, size = ARRAY.unpack_from(s, off)
+        off += ARRAY.size
+        a = array.array(typecode)
+        a.fromstring(s[off:off + size])
+        off += size
+        if order != BYTEORDER: a.byteswap()
+        arrays.append(a)
+    u = cPickle.Unpickler(cStringIO.StringIO(body))
+    u.persistent_load = lambda pid: arrays[int(pid)]
+    return u.load()
+
+class Channel:
+    """
+    Tagged frames over GXP pipes shared by barriers, progress reports and
+    results of all hosts, every frame is seen by every host. A reader
+    thread dispatches frames by tag, so that progress can be received
+    while workers run between barriers. Results are addressed to one
+    rank and skipped unbuffered by others. Payloads larger than MIN_COMPRESS bytes
+    are compressed by zlib at level compress, 0 to disable.
+    """
+    BARRIER = 'B'
+    PROGRESS = 'P'
+    RESULT = 'R'
+    COMPRESSED = 0x1    # flag of zlib compressed payload
+    MIN_COMPRESS = 512
+    CHUNK = 65536       # bytes read at once of payloads of other ranks
+
+    def __init__(self, wp, rp, size, rank=0, compress=0):
+        self.wp = wp
+        self.rp = rp
+        self.size = size
+        self.rank = rank
+        self.compress = compress
+        # Module globals may be gone when the reader runs during
+        # shutdown, frames of others keep arriving meanwhile
+        self.frame = FRAME
+        self.decompress = zlib.decompress
+        # Worker processes inherit these, so they must be process-shared
+        self.lock = multiprocessing.Lock()
+        self.passed = multiprocessing.Semaphore(0)
+        self.results = Queue.Queue()
+        self.handlers = {}
+        self.reader = threading.Thread(target=self.read)
+        self.reader.setDaemon(True)
+
+    def start(self):
+        self.reader.start()
+
+    def on(self, tag, handler):
+        """Call handler(msg) on every frame tagged tag"""
+        self.handlers[tag] = handler
+
+    def send(self, tag, msg="", dest=-1):
+        flags = 0
+        if self.compress > 0 and len(msg) > self.MIN_COMPRESS:
+            z = zlib.compress(msg, self.compress)
+            if len(z) < len(msg):
+                msg = z
+                flags |= self.COMPRESSED
+        self.lock.acquire()
+        try:
+            self.wp.write(FRAME.pack(tag, flags, dest, len(msg)) + msg)
+            self.wp.flush()
+        finally:
+            self.lock.release()
+
+    def barrier(self):
+        """Return when all hosts have arrived"""
+        self.send(self.BARRIER)
+        self.passed.acquire()
+
+    def send_result(self, dest, obj):
+        self.send(self.RESULT, pack(obj), dest)
+
+    def receive(self):
+        """
+        Return next result object sent to this rank, None if pipes are
+        closed
+        """
+        msg = self.results.get()
+        if msg is None: return None
+        return unpack(msg)
+
+    def read(self):
+        arrived = 0
+        while True:
+            header = self.rp.read(self.frame.size)
+            if not header:
+                # Pipes closed, do not leave anyone waiting
+                self.passed.release()
+                self.results.put(None)
+                return
+            tag, flags, dest, size = self.frame.unpack(header)
+            if dest != -1 and dest != self.rank:
+                # Every frame reaches every host through GXP pipes, no
+                # builtins as this may run during shutdown
+                while size > 0:
+                    n = self.CHUNK
+                    if size < n: n = size
+                    if not self.rp.read(n): break
+                    size -= n
+                continue
+            msg = self.rp.read(size)
+            if flags & self.COMPRESSED: msg = self.decompress(msg)
+            if tag == self.BARRIER:
+                arrived += 1
+                if arrived == self.size:
+                    arrived = 0
+                    self.passed.release()
+            elif tag == self.RESULT: self.results.put(msg)
+            elif self.handlers.has_key(tag): self.handlers[tag](msg)
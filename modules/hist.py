@@ -0,0 +1,134 @@
+#############################################################################
+# ParaMark: A Benchmark for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+# Distributed under GNU General Public Licence version 3
+#############################################################################
+
+#
+# modules/hist.py
+# Log-linear latency histogram
+#
+
+import array
+import struct
+
+__all__ = ["Histogram"]
+
+# Values are counted in nanoseconds. Values below 2^SUB_BITS fall in
+# buckets of width one, each power of two above is split into
+# 2^(SUB_BITS-1) linear sub-buckets, bounding relative error to 1/64.
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+SUB_HALF = SUB_COUNT >> 1
+MAX_BITS = 42   # about 73 minutes
+NBUCKETS = SUB_COUNT + (MAX_BITS - SUB_BITS) * SUB_HALF
+
+SCALE = 1e9     # seconds to nanoseconds
+
+HEADER = struct.Struct("<Qddd")     # count, sum, min, max
+
+class Histogram(object):
+    """
+    Fixed-size histogram of latencies in seconds, with exact count,
+    sum, min and max kept aside from the buckets
+    """
+    def __init__(self):
+        self.counts = array.array('L', [0]) * NBUCKETS
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def record(self, e, n=1):
+        self.counts[bucket_index(int(e * SCALE))] += n
+        self.count += n
+        self.sum += e * n
+        if e < self.min: self.min = e
+        if e > self.max: self.max = e
+
+    def discard(self, e, n=1):
+        """
+        Remove n values of e, min and max fall back to bucket values
+        if the exact ones are no longer known
+        """
+        self.counts[bucket_index(int(e * SCALE))] -= n
+        self.count -= n
+        self.sum -= e * n
+        items = self.items()
+        if len(items) == 0:
+            self.min = float("inf")
+            self.max = 0.0
+            return
+        if e <= self.min: self.min = items[0][0]
+        if e >= self.max: self.max = items[-1][0]
+
+    def merge(self, other):
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c: counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        if other.min < self.min: self.min = other.min
+        if other.max > self.max: self.max = other.max
+        return self
+
+    def copy(self):
+        return Histogram().merge(self)
+
+    def items(self):
+        """Return (value, count) of non-empty buckets in increasing order"""
+        return [(bucket_value(i), c) for i, c in enumerate(self.counts) if c]
+
+    def average(self):
+        if self.count == 0: return 0.0
+        return self.sum / self.count
+
+    def percentile(self, p):
+        """Return the value at percentile p (0-100)"""
+        if self.count == 0: return 0.0
+        if p >= 100: return self.max
+        rank = p / 100.0 * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if c and acc >= rank:
+                return min(max(bucket_value(i), self.min), self.max)
+        return self.max
+
+    def tostring(self):
+        return HEADER.pack(self.count, self.sum, self.min, self.max) + \
+            self.counts.tostring()
+
+def fromstring(s):
+    s = str(s)
+    h = Histogram()
+    h.count, h.sum, h.min, h.max = HEADER.unpack(s[:HEADER.size])
+    h.counts = array.array('L')
+    h.counts.fromstring(s[HEADER.size:])
+    return h
+
+def merge(hists):
+    """Return a new histogram merged from a series of histograms"""
+    h = Histogram()
+    for o in hists: h.merge(o)
+    return h
+
+def bucket_index(v):
+    if v < SUB_COUNT:
+        if v < 0: return 0
+        return v
+    k = v.bit_length() - 1
+    if k >= MAX_BITS: return NBUCKETS - 1
+    shift = k - SUB_BITS + 1
+    return SUB_COUNT + (k - SUB_BITS) * SUB_HALF + (v >> shift) - SUB_HALF
+
+def bucket_value(i):
+    """Return the value in seconds at the middle of bucket i"""
+    if i < SUB_COUNT: return (i + 0.5) / SCALE
+    k = (i - SUB_COUNT) // SUB_HALF + SUB_BITS
+    sub = (i - SUB_COUNT) % SUB_HALF + SUB_HALF
+    shift = k - SUB_BITS + 1
+    return ((sub << shift) + ((1 << shift) - 1) / 2.0) / SCALE
@@ -11,6 +11,8 @@
 
 import __builtin__
 import math
+import array
+import itertools
 
 HAVE_NUMPY = False
 try:
@@ -19,23 +21,156 @@ try:
 except ImportError:
     HAVE_NUMPY = False
 
-def num_average(alist):
-    return sum(alist)/len(alist)
+# Two-sided standard normal quantiles of confidence levels
+Z_QUANTILES = {0.8:1.2815516, 0.9:1.6448536, 0.95:1.9599640, 0.98:2.3263479,
+    0.99:2.5758293, 0.999:3.2905267}
 
-def num_std(alist):
-    avg = num_average(alist)
-    total = 0.0
-    for x in alist:
-        total += math.pow((x-avg), 2)
-    return math.sqrt(total/len(alist))
+def num_average(alist, weights=None):
+    if weights is not None:
+        return __builtin__.sum([x * w for x, w in zip(alist, weights)]) / \
+            float(__builtin__.sum(weights))
+    return math.fsum(alist) / len(alist)
+
+def welford(alist, weights=None, scale=None):
+    """
+    Return count, mean, minimum, maximum and variance of alist, or of
+    scale/x of its elements, in one pass without copying alist
+    """
+    n = 0
+    wsum = 0.0
+    avg = 0.0
+    m2 = 0.0
+    lo = hi = None
+    if weights is None: weights = itertools.repeat(1)
+    for x, w in itertools.izip(alist, weights):
+        if scale is not None: x = scale / x
+        n += 1
+        if lo is None or x < lo: lo = x
+        if hi is None or x > hi: hi = x
+        if w == 0: continue
+        wsum += w
+        delta = x - avg
+        avg += delta * w / wsum
+        m2 += w * delta * (x - avg)
+    if wsum == 0: return n, 0.0, lo, hi, 0.0
+    return n, avg, lo, hi, m2 / wsum
+
+def num_std(alist, weights=None):
+    return math.sqrt(welford(alist, weights)[4])
+
+def numpy_std(alist, weights=None):
+    if weights is None: return numpy.std(alist)
+    avg = numpy.average(alist, weights=weights)
+    return math.sqrt(numpy.average((numpy.asarray(alist) - avg) ** 2,
+        weights=weights))
+
+def num_stats(alist, scale=None):
+    n, avg, lo, hi, var = welford(alist, scale=scale)
+    return avg, lo, hi, math.sqrt(var)
+
+def numpy_stats(alist, scale=None):
+    # Extremes of no values are None, as of welford()
+    if len(alist) == 0: return 0.0, None, None, 0.0
+    a = asarray(alist)
+    if scale is not None: a = scale / a
+    return a.mean(), a.min(), a.max(), a.std()
+
+def num_reciprocal(alist, scale=1.0):
+    return [scale / x for x in alist]
+
+def numpy_reciprocal(alist, scale=1.0):
+    return scale / asarray(alist)
+
+def num_percentiles(alist, ps):
+    """
+    Return percentiles ps of alist, linearly interpolated between closest
+    ranks as numpy.percentile() does
+    """
+    a = sorted(alist)
+    res = []
+    for p in ps:
+        k = (len(a) - 1) * p / 100.0
+        i = int(math.floor(k))
+        j = __builtin__.min(i + 1, len(a) - 1)
+        res.append(a[i] + (a[j] - a[i]) * (k - i))
+    return res
+
+def numpy_percentiles(alist, ps):
+    return list(numpy.percentile(asarray(alist), ps))
+
+def percentile(alist, p):
+    return percentiles(alist, [p])[0]
+
+def hmean(alist, weights=None):
+    """
+    Return harmonic mean of alist, the average rate of calls given rates
+    of each call
+    """
+    n, avg, lo, hi, var = welford(alist, weights, 1.0)
+    if avg == 0: return 0.0
+    return 1.0 / avg
+
+def t_quantile(level, df):
+    """
+    Return two-sided quantile of Student's t-distribution of df degrees of
+    freedom, exact for df of 1 and 2, Cornish-Fisher expansion otherwise
+    """
+    if not Z_QUANTILES.has_key(level):
+        raise ValueError("confidence level %s not in %s" %
+            (level, sorted(Z_QUANTILES.keys())))
+    p = (1 + level) / 2.0
+    if df == 1: return math.tan(math.pi * (p - 0.5))
+    if df == 2: return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = Z_QUANTILES[level]
+    g1 = (z ** 3 + z) / 4.0
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96.0
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384.0
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 -
+        945 * z) / 92160.0
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+def confidence(alist, level=0.95):
+    """Return mean of alist and half width of its confidence interval"""
+    n, avg, lo, hi, var = welford(alist)
+    if n < 2: return avg, 0.0
+    return avg, t_quantile(level, n - 1) * math.sqrt(var / (n - 1))
+
+def num_asarray(alist):
+    return alist
+
+def numpy_asarray(alist):
+    # typed buffers are viewed, not copied
+    if isinstance(alist, array.array) and alist.typecode == 'd' and \
+        len(alist) > 0:
+        return numpy.frombuffer(alist, dtype='d')
+    return numpy.asarray(alist, dtype='d')
+
+def num_frombuffer(buf, typecode='d'):
+    a = array.array(typecode)
+    a.fromstring(str(buf))
+    return a
+
+def numpy_frombuffer(buf, typecode='d'):
+    return numpy.frombuffer(buf, dtype=typecode)
 
 if HAVE_NUMPY:
+    # zero-copy view of raw bytes
+    frombuffer = numpy_frombuffer
+    asarray = numpy_asarray
+    reciprocal = numpy_reciprocal
+    stats = numpy_stats
+    percentiles = numpy_percentiles
     sum = numpy.sum
     average = numpy.average
     min = numpy.min
     max = numpy.max
-    std = numpy.std
+    std = numpy_std
 else:
+    frombuffer = num_frombuffer
+    asarray = num_asarray
+    reciprocal = num_reciprocal
+    stats = num_stats
+    percentiles = num_percentiles
     sum = __builtin__.sum
     average = num_average
     min = __builtin__.min
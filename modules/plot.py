@@ -21,11 +21,24 @@
 # Data plotting
 #
 
+import os
 import sys
+import hashlib
+import threading
+import Queue
+import multiprocessing
 from verbose import *
 
 class GnuPlot:
-    def __init__(self, path):
+    # Digest and name of each figure drawn in path, one per line, the
+    # last line of a name wins
+    INDEX_FILE = ".figures"
+
+    def __init__(self, path, cache=True, jobs=1):
+        """
+        Draw figures into path by jobs gnuplot processes, each fed by its
+        own thread from a queue of charts, 0 for one process per CPU
+        """
         try:
             import Gnuplot
         except ImportError:
@@ -34,26 +47,140 @@ class GnuPlot:
 or refer to http://gnuplot-py.sourceforge.net/.""")
             raise ImportError
             
+        if jobs <= 0: jobs = multiprocessing.cpu_count()
         self.p = Gnuplot.Gnuplot()
         self.path = path
+        self.queue = None
+        self.workers = []
+        if jobs > 1:
+            self.queue = Queue.Queue(jobs * 64)
+            for i in range(jobs):
+                p = self.p
+                if i > 0: p = Gnuplot.Gnuplot()
+                t = threading.Thread(target=self.drawer, args=(p,))
+                t.setDaemon(True)
+                t.start()
+                self.workers.append(t)
+        self.digests = {}
+        self.pending = {}   # digest of each figure until it is drawn
+        self.lock = threading.Lock()
+        self.index = None
+        if cache: self.load_index()
+
+    def load_index(self):
+        fn = "%s/%s" % (self.path, self.INDEX_FILE)
+        if os.path.exists(fn):
+            for line in open(fn):
+                digest, name = line.rstrip("\n").split(" ", 1)
+                self.digests[name] = digest
+        # Rewritten without superseded lines
+        self.index = open(fn, "w")
+        for name, digest in sorted(self.digests.items()):
+            self.index.write("%s %s\n" % (digest, name))
+        self.index.flush()
+
+    def cached(self, name, *args):
+        """
+        Return True if figure name was drawn from the same data and chart
+        parameters args and still exists, otherwise keep their digest to
+        be recorded by drawn() as the one of figure name
+        """
+        if self.index is None: return False
+        h = hashlib.sha1(name)
+        for a in args:
+            # Typed buffers are hashed in place, repr() abbreviates them
+            if hasattr(a, "tostring"): h.update(a.tostring())
+            else: h.update(repr(a))
+        digest = h.hexdigest()
+        self.lock.acquire()
+        try:
+            if self.digests.get(name) == digest and \
+                os.path.exists("%s/%s" % (self.path, name)):
+                return True
+            self.pending[name] = digest
+            return False
+        finally:
+            self.lock.release()
+
+    def drawn(self, name):
+        """Record digest of figure name once it is drawn successfully"""
+        self.lock.acquire()
+        try:
+            digest = self.pending.pop(name, None)
+            if digest is None: return
+            self.digests[name] = digest
+            self.index.write("%s %s\n" % (digest, name))
+            self.index.flush()
+        finally:
+            self.lock.release()
     
     def impulse_chart(self, data, name="bar_chart", 
         title="impulse_chart", xlabel="x_label", ylabel="y_label",
         xmin=None, xmax=None, ymin=None, ymax=None,
         xlog=False, ylog=False):
-        self.p.reset()
-        self.p("set terminal png")
-        self.p("set output '%s/%s'" % (self.path, name))
-        self.p.title(title)
-        self.p("set xlabel '%s'" % xlabel)
-        self.p("set ylabel '%s'" % ylabel)
-        if xlog: self.p("set logscale x")
-        if ylog: self.p("set logscale y")
+        if self.cached(name, "impulse", data, title, xlabel, ylabel,
+            xmin, xmax, ymin, ymax, xlog, ylog): return
+        self.submit(name, self.draw_impulse, data, name, title, xlabel,
+            ylabel, xmin, xmax, ymin, ymax, xlog, ylog)
+
+    def draw_impulse(self, p, data, name, title, xlabel, ylabel,
+        xmin, xmax, ymin, ymax, xlog, ylog):
+        p.reset()
+        p("set terminal png")
+        p("set output '%s/%s'" % (self.path, name))
+        p.title(title)
+        p("set xlabel '%s'" % xlabel)
+        p("set ylabel '%s'" % ylabel)
+        if xlog: p("set logscale x")
+        if ylog: p("set logscale y")
         if xmin is None: xmin = 0
         if xmax is None: xmax = len(data)
         # let gnuplot decide range when log scale is set
-        if not xlog: self.p("set xrange [%d:%d]" % (xmin, xmax))
+        if not xlog: p("set xrange [%d:%d]" % (xmin, xmax))
         if ymin is not None and ymax is not None and not ylog:
-            self.p("set yrange [%d:%d]" % (ymin, ymax))
-        self.p("set data style impulses")
-        self.p.plot(data)
+            p("set yrange [%d:%d]" % (ymin, ymax))
+        p("set data style impulses")
+        p.plot(data)
+
+    def line_chart(self, xdata, ydata, name="line_chart",
+        title="line_chart", xlabel="x_label", ylabel="y_label",
+        xlog=False, ylog=False):
+        if self.cached(name, "line", xdata, ydata, title, xlabel, ylabel,
+            xlog, ylog): return
+        self.submit(name, self.draw_line, xdata, ydata, name, title,
+            xlabel, ylabel, xlog, ylog)
+
+    def draw_line(self, p, xdata, ydata, name, title, xlabel, ylabel,
+        xlog, ylog):
+        p.reset()
+        p("set terminal png")
+        p("set output '%s/%s'" % (self.path, name))
+        p.title(title)
+        p("set xlabel '%s'" % xlabel)
+        p("set ylabel '%s'" % ylabel)
+        if xlog: p("set logscale x 2")
+        if ylog: p("set logscale y")
+        else: p("set yrange [0:*]")
+        p("set data style linespoints")
+        p.plot(zip(xdata, ydata))
+
+    def submit(self, name, draw, *args):
+        if self.queue is None:
+            draw(self.p, *args)
+            self.drawn(name)
+        else: self.queue.put((name, draw, args))
+
+    def drawer(self, p):
+        """Draw charts from queue through gnuplot process p"""
+        while True:
+            name, draw, args = self.queue.get()
+            try:
+                draw(p, *args)
+                self.drawn(name)
+            except Exception, e:
+                warning("failed to draw %s: %s" % (name, e))
+            self.queue.task_done()
+
+    def wait(self):
+        """Wait for all submitted figures to be drawn"""
+        if self.queue is not None: self.queue.join()
@@ -0,0 +1,38 @@
+#############################################################################
+# ParaMark: A Benchmark for Parallel/Distributed Systems
+# Copyright (C) 2009,2010  Nan Dun <dunnan@yl.is.s.u-tokyo.ac.jp>
+# Distributed under GNU General Public Licence version 3
+#############################################################################
+
+#
+# tests/test_num.py
+# Tests of numerical functions, run from top directory by
+#   python -m unittest discover -s tests
+#
+
+import unittest
+from array import array
+
+from modules import num
+
+class StatsTest(unittest.TestCase):
+    def test_empty(self):
+        # Calls between open() and close() of an operation may be none
+        for stats in [num.num_stats, num.numpy_stats]:
+            self.assertEqual(stats(array('d')), (0.0, None, None, 0.0))
+            self.assertEqual(stats(array('d', [1.0, 2.0])[1:-1], 4096),
+                (0.0, None, None, 0.0))
+
+    def test_scale(self):
+        avg, lo, hi, std = num.num_stats(array('d', [1.0, 2.0, 4.0]), 4.0)
+        self.assertAlmostEqual(avg, 7.0 / 3)
+        self.assertEqual((lo, hi), (1.0, 4.0))
+
+    @unittest.skipUnless(num.HAVE_NUMPY, "NumPy not installed")
+    def test_numpy(self):
+        a = array('d', [1.0, 2.0, 4.0, 8.0])
+        for x, y in zip(num.numpy_stats(a, 8.0), num.num_stats(a, 8.0)):
+            self.assertAlmostEqual(x, y)
+
+if __name__ == "__main__":
+    unittest.main()